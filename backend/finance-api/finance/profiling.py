@@ -0,0 +1,117 @@
+"""
+Opt-in per-request SQL profiler.
+
+A sampled fraction of requests (settings.SQL_PROFILE_SAMPLE_RATE, 0
+disables) runs with a ``connection.execute_wrapper`` on every database
+connection. Statements are grouped by a normalized fingerprint (literals
+and placeholders become ``?``, IN lists collapse); a fingerprint executed
+more than once in a request is a duplicate, usually an N+1. Profiled
+responses carry ``X-Query-Count``, ``X-DB-Time`` (ms) and
+``X-Query-Duplicates``. Every request slower than settings.SLOW_REQUEST_MS,
+sampled or not, is logged to the settings.SQL_PROFILE_LOGGER logger as one
+JSON line; for a profiled request it includes the query totals and top
+statements by time.
+
+finance-api and hr-api ship this module unchanged (each builds from its own
+directory); anything service-specific belongs in settings, not here.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so executions differing only in values compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(?+)', sql)
+    return _WHITESPACE.sub(' ', sql).strip().lower()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # fingerprint -> [executions, seconds]
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            entry = self.statements.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    @property
+    def duplicates(self):
+        return sum(executions - 1 for executions, _ in self.statements.values())
+
+    def top(self, limit):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {'sql': sql, 'count': executions, 'db_ms': round(seconds * 1000, 3)}
+            for sql, (executions, seconds) in ranked
+        ]
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SQL_PROFILE_SAMPLE_RATE', 0.0)
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500.0)
+        self.top = getattr(settings, 'SQL_PROFILE_TOP', 5)
+        self.logger = logging.getLogger(getattr(settings, 'SQL_PROFILE_LOGGER', __name__))
+
+    def __call__(self, request):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        profile = RequestProfile() if sampled else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if profile is not None:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if profile is not None:
+            response['X-Query-Count'] = str(profile.count)
+            response['X-DB-Time'] = f'{profile.seconds * 1000:.2f}'
+            response['X-Query-Duplicates'] = str(profile.duplicates)
+        if elapsed_ms >= self.slow_ms:
+            match = getattr(request, 'resolver_match', None)
+            entry = {
+                'method': request.method,
+                'path': request.path,
+                'route': match.route if match else None,
+                'status': response.status_code,
+                'duration_ms': round(elapsed_ms, 3),
+                'sampled': sampled,
+            }
+            if profile is not None:
+                entry.update({
+                    'query_count': profile.count,
+                    'db_ms': round(profile.seconds * 1000, 3),
+                    'duplicates': profile.duplicates,
+                    'top_statements': profile.top(self.top),
+                })
+            self.logger.warning('slow request %s', json.dumps(entry))
+        return response
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'finance.profiling.SQLProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +90,15 @@ DATABASES = {
 }
 
 
+# Opt-in SQL profiling: fraction of requests profiled (0 disables), the
+# duration above which any request is written to the slow-request log, and
+# the logger that log goes to.
+SQL_PROFILE_SAMPLE_RATE = float(os.getenv('SQL_PROFILE_SAMPLE_RATE', '0'))
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+SQL_PROFILE_TOP = int(os.getenv('SQL_PROFILE_TOP', '5'))
+SQL_PROFILE_LOGGER = 'finance.profiling'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
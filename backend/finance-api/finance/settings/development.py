@@ -14,6 +14,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 # Add corsheaders middleware
 MIDDLEWARE = [
+    'finance.profiling.SQLProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
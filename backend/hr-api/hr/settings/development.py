@@ -13,6 +13,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 # Add corsheaders middleware
 MIDDLEWARE = [
+    'hr.profiling.SQLProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -0,0 +1,62 @@
+"""Tests for the sampled SQL profiler middleware."""
+
+import json
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from hr.profiling import SQLProfilerMiddleware, fingerprint
+
+
+def run_queries(request):
+    with connection.cursor() as cursor:
+        for value in (1, 2):
+            cursor.execute('SELECT %s', [value])
+    return HttpResponse('ok')
+
+
+def log_entry(logs):
+    return json.loads(logs.records[-1].getMessage().split(' ', 2)[2])
+
+
+class SQLProfilerMiddlewareTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/health/')
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'x'"),
+            'select * from t where id in (?+) and name = ?',
+        )
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=1.0, SLOW_REQUEST_MS=0)
+    def test_profiled_request(self):
+        with self.assertLogs('hr.profiling', 'WARNING') as logs:
+            response = SQLProfilerMiddleware(run_queries)(self.request)
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Duplicates'], '1')
+        entry = log_entry(logs)
+        self.assertTrue(entry['sampled'])
+        self.assertEqual(entry['query_count'], 2)
+        self.assertEqual(entry['top_statements'][0]['sql'], 'select ?')
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=0, SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged_without_sampling(self):
+        with self.assertLogs('hr.profiling', 'WARNING') as logs:
+            response = SQLProfilerMiddleware(run_queries)(self.request)
+        self.assertNotIn('X-Query-Count', response)
+        entry = log_entry(logs)
+        self.assertEqual((entry['path'], entry['status'], entry['sampled']), ('/health/', 200, False))
+        self.assertNotIn('query_count', entry)
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=0, SLOW_REQUEST_MS=60000)
+    def test_fast_unsampled_request_is_untouched(self):
+        with self.assertNoLogs('hr.profiling', 'WARNING'):
+            response = SQLProfilerMiddleware(run_queries)(self.request)
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(SQL_PROFILE_SAMPLE_RATE=0, SLOW_REQUEST_MS=0, SQL_PROFILE_LOGGER='slow_requests')
+    def test_slow_request_log_name_comes_from_settings(self):
+        with self.assertLogs('slow_requests', 'WARNING'):
+            SQLProfilerMiddleware(run_queries)(self.request)
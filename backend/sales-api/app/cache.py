@@ -0,0 +1,284 @@
+"""Report result cache.
+
+Entries are keyed on normalized report parameters and stored as two keys:
+``<key>:data`` lives for ``ttl + stale_ttl`` seconds and ``<key>:fresh``
+for ``ttl`` seconds. While only the data key exists the entry is stale: it
+is still served, and a single background task recomputes it
+(stale-while-revalidate). Order writes drop every entry whose date range
+covers a touched day, so a report never outlives a write it should reflect.
+
+Entries are found through per-day index sets (``report:day:<day>``), so
+an invalidation reads a few sets rather than the keyspace. A recompute
+registers its entry there and leaves a ``<key>:pending`` token before it
+reads the database; invalidation deletes the token along with the entry,
+and the result is only stored if the token is still in place. A recompute
+that raced a write therefore never caches what it read before the write.
+
+Redis is used when REDIS_URL is set, so invalidations are seen by every
+worker; otherwise a bounded in-process LRU is used. Lookups, recomputes
+and recompute latency are exported to Prometheus (see app.metrics) as
+well as summarized by ``stats()``.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.metrics import (
+    REPORT_CACHE_DISCARDED,
+    REPORT_CACHE_LOOKUPS,
+    REPORT_CACHE_RECOMPUTE_DURATION,
+    REPORT_CACHE_RECOMPUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+class MemoryStore:
+    """Bounded in-process LRU with per-key expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._sets: Dict[str, Tuple[float, Set[str]]] = {}
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        now = time.monotonic()
+        values: List[Optional[str]] = []
+        for key in keys:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                self._data.pop(key, None)
+                values.append(None)
+            else:
+                self._data.move_to_end(key)
+                values.append(entry[1])
+        return values
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def put_if(self, guard: str, token: str, values: List[Tuple[str, str, float]]) -> bool:
+        # Never suspends, so the check and the writes are atomic within the event loop.
+        if (await self.get_many([guard]))[0] != token:
+            return False
+        for key, value, ttl in values:
+            await self.set(key, value, ttl)
+        await self.delete([guard])
+        return True
+
+    async def index(self, member: str, sets: List[str], ttl: float) -> None:
+        now = time.monotonic()
+        for name in sets:
+            _, members = self._sets.get(name, (0.0, set()))
+            members.add(member)
+            self._sets[name] = (now + ttl, members)
+        if len(self._sets) > self.max_entries:
+            self._sets = {name: entry for name, entry in self._sets.items() if entry[0] > now}
+
+    async def pop_index(self, sets: List[str]) -> List[str]:
+        now = time.monotonic()
+        members: Set[str] = set()
+        for name in sets:
+            entry = self._sets.pop(name, None)
+            if entry is not None and entry[0] > now:
+                members |= entry[1]
+        return sorted(members)
+
+class RedisStore:
+    """Redis-backed store; connection errors degrade to cache misses."""
+
+    # KEYS[1] is the guard, ARGV[1] the token it must hold; then one (value, ttl ms) per further key.
+    PUT_IF = """
+    if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+    for i = 2, #KEYS do
+        redis.call('SET', KEYS[i], ARGV[2 * i - 2], 'PX', ARGV[2 * i - 1])
+    end
+    redis.call('DEL', KEYS[1])
+    return 1
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._errors = (redis.RedisError, OSError)
+        self._put_if = self._redis.register_script(self.PUT_IF)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        try:
+            return await self._redis.mget(keys)
+        except self._errors as exc:
+            logger.warning("report cache read failed: %s", exc)
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        try:
+            await self._redis.set(key, value, px=int(ttl * 1000))
+        except self._errors as exc:
+            logger.warning("report cache write failed: %s", exc)
+
+    async def delete(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        try:
+            await self._redis.delete(*keys)
+        except self._errors as exc:
+            logger.warning("report cache delete failed: %s", exc)
+
+    async def put_if(self, guard: str, token: str, values: List[Tuple[str, str, float]]) -> bool:
+        args: List[Any] = [token]
+        for _, value, ttl in values:
+            args += [value, int(ttl * 1000)]
+        try:
+            return bool(await self._put_if(keys=[guard] + [key for key, _, _ in values], args=args))
+        except self._errors as exc:
+            logger.warning("report cache write failed: %s", exc)
+            return False
+
+    async def index(self, member: str, sets: List[str], ttl: float) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for name in sets:
+                    pipe.sadd(name, member)
+                    pipe.pexpire(name, int(ttl * 1000))
+                await pipe.execute()
+        except self._errors as exc:
+            logger.warning("report cache index write failed: %s", exc)
+
+    async def pop_index(self, sets: List[str]) -> List[str]:
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.sunion(*sets)
+                pipe.delete(*sets)
+                members, _ = await pipe.execute()
+            return sorted(members)
+        except self._errors as exc:
+            logger.warning("report cache index read failed: %s", exc)
+            return []
+
+class ReportCache:
+    PREFIX = "report:"
+
+    def __init__(self, store: Any, ttl: float, stale_ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # One computation per key at a time, shared by concurrent misses and refreshes.
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.recomputes = 0
+        # Recomputes whose result was dropped because a write invalidated the entry meanwhile.
+        self.discarded = 0
+        self.recompute_seconds_total = 0.0
+        self.recompute_seconds_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ReportCache":
+        redis_url = os.getenv("REDIS_URL")
+        store = RedisStore(redis_url) if redis_url else MemoryStore(int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256")))
+        return cls(store, float(os.getenv("REPORT_CACHE_TTL", "60")), float(os.getenv("REPORT_CACHE_STALE_TTL", "300")))
+
+    @classmethod
+    def key(cls, report: str, start: date, end: date, **params: Any) -> str:
+        extra = ":".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{cls.PREFIX}{report}:{start.isoformat()}:{end.isoformat()}:{extra}"
+
+    @classmethod
+    def _index_keys(cls, key: str) -> List[str]:
+        _, _, start, end, _ = key.split(":", 4)
+        first, last = date.fromisoformat(start), date.fromisoformat(end)
+        return [cls._day_key(first + timedelta(days=offset)) for offset in range((last - first).days + 1)]
+
+    @classmethod
+    def _day_key(cls, day: date) -> str:
+        return f"{cls.PREFIX}day:{day.isoformat()}"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``; ``compute`` must open its own DB session."""
+        data, fresh = await self.store.get_many([key + ":data", key + ":fresh"])
+        if data is not None:
+            if fresh is not None:
+                self.hits += 1
+                REPORT_CACHE_LOOKUPS.labels("hit").inc()
+            else:
+                self.stale_hits += 1
+                REPORT_CACHE_LOOKUPS.labels("stale").inc()
+                self._compute_once(key, compute)
+            return json.loads(data)
+        self.misses += 1
+        REPORT_CACHE_LOOKUPS.labels("miss").inc()
+        return await self._compute_once(key, compute)
+
+    def _compute_once(self, key: str, compute: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._recompute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    def _finished(self, key: str, task: "asyncio.Task[Any]") -> None:
+        self._inflight.pop(key, None)
+        # Retrieve the exception so background refresh failures are logged, not lost.
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("report recompute for %s failed: %r", key, task.exception())
+
+    async def _recompute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        token = uuid.uuid4().hex
+        lifetime = self.ttl + self.stale_ttl
+        # Both before reading the database: from here on an invalidation finds the entry and voids the token.
+        await self.store.index(key, self._index_keys(key), lifetime)
+        await self.store.set(key + ":pending", token, lifetime)
+        started = time.perf_counter()
+        value = await compute()
+        elapsed = time.perf_counter() - started
+        self.recomputes += 1
+        self.recompute_seconds_total += elapsed
+        self.recompute_seconds_max = max(self.recompute_seconds_max, elapsed)
+        REPORT_CACHE_RECOMPUTES.inc()
+        REPORT_CACHE_RECOMPUTE_DURATION.observe(elapsed)
+        stored = await self.store.put_if(
+            key + ":pending", token, [(key + ":data", json.dumps(value), lifetime), (key + ":fresh", "1", self.ttl)]
+        )
+        if not stored:
+            self.discarded += 1
+            REPORT_CACHE_DISCARDED.inc()
+        return value
+
+    async def invalidate(self, days: Iterable[date]) -> None:
+        """Drop every entry whose [start, end] range covers one of ``days``."""
+        touched = sorted(set(days))
+        if not touched:
+            return
+        entries = await self.store.pop_index([self._day_key(day) for day in touched])
+        await self.store.delete([entry + suffix for entry in entries for suffix in (":data", ":fresh", ":pending")])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": type(self.store).__name__,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "recomputes": self.recomputes,
+            "discarded": self.discarded,
+            "recompute_seconds_avg": round(self.recompute_seconds_total / self.recomputes, 6) if self.recomputes else 0.0,
+            "recompute_seconds_max": round(self.recompute_seconds_max, 6),
+        }
+
+report_cache = ReportCache.from_env()
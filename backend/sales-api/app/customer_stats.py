@@ -0,0 +1,216 @@
+"""Per-customer order summaries backing the customer endpoints.
+
+Order writes call ``apply_orders`` inside their own transaction, like the
+sales rollups: a new order adds to its customer's count and total and
+widens the first/last order dates. Removing one (delete, cancellation, or
+the old side of an update) subtracts, and takes the dates from that
+customer's remaining orders, since a removed boundary cannot be undone
+arithmetically; removals are rare next to creates.
+Reading a customer's summary is one primary-key lookup, and list pages
+sorted by lifetime value or order count are index range scans.
+
+The RFM segment depends on today's date, so it is derived from the stored
+row when read rather than stored. ``python -m app.customer_stats`` rebuilds
+the table from scratch, e.g. after a bulk load.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, case, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+from app.models import Customer, CustomerStats, Order
+from app.models.order import OrderStatus
+from app.pagination import decode_cursor_fields, encode_cursor
+from app.rollups import is_counted
+
+# Sort keys accepted by the customer list; statistics sort highest first.
+SORT_KEYS = ("id", "total_spent", "order_count")
+SORT_PATTERN = "^(" + "|".join(SORT_KEYS) + ")$"
+STAT_FIELDS = ("order_count", "total_spent", "first_order_at", "last_order_at")
+
+# Score thresholds (3 is best): days since the last order, orders, money spent.
+RECENCY_DAYS = (30, 90)
+FREQUENCY_ORDERS = (5, 2)
+MONETARY_SPENT = (1000.0, 200.0)
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are stored in UTC.
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+def rfm_segment(
+    order_count: int, total_spent: float, last_order_at: Optional[datetime], now: Optional[datetime] = None
+) -> Optional[str]:
+    """Segment from recency, frequency and monetary scores; None for customers without orders."""
+    if not order_count or last_order_at is None:
+        return None
+    days = ((now or datetime.now(timezone.utc)) - _as_utc(last_order_at)).days
+    recency = 3 if days <= RECENCY_DAYS[0] else 2 if days <= RECENCY_DAYS[1] else 1
+    frequency = 3 if order_count >= FREQUENCY_ORDERS[0] else 2 if order_count >= FREQUENCY_ORDERS[1] else 1
+    monetary = 3 if total_spent >= MONETARY_SPENT[0] else 2 if total_spent >= MONETARY_SPENT[1] else 1
+    if recency == 3 and frequency == 3 and monetary >= 2:
+        return "champion"
+    if recency >= 2 and frequency >= 2:
+        return "loyal"
+    if recency == 3:
+        return "new"
+    if recency == 2:
+        return "promising"
+    return "at_risk" if frequency >= 2 or monetary == 3 else "lost"
+
+def summary(row: Any) -> Dict[str, Any]:
+    """The ``stats`` payload for a row carrying the STAT_FIELDS columns (NULL without a stats row)."""
+    stats = {
+        "order_count": row.order_count or 0,
+        "total_spent": row.total_spent or 0.0,
+        "first_order_at": row.first_order_at,
+        "last_order_at": row.last_order_at,
+    }
+    stats["rfm_segment"] = rfm_segment(stats["order_count"], stats["total_spent"], stats["last_order_at"])
+    return stats
+
+def with_stats(rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Customer rows joined to their stats, with the statistics nested under ``stats``."""
+    customers = []
+    for row in rows:
+        customer = {key: value for key, value in row._asdict().items() if key not in STAT_FIELDS}
+        customer["stats"] = summary(row)
+        customers.append(customer)
+    return customers
+
+async def add_customer(db: AsyncSession, fields: Dict[str, Any]) -> Customer:
+    """Add a customer together with its (empty) stats row; the caller commits.
+
+    Every way of creating a customer goes through here: the stat sorts read
+    customers off customer_stats, so one without a row would never be listed.
+    """
+    customer = Customer(**fields)
+    db.add(customer)
+    await db.flush()
+    db.add(CustomerStats(customer_id=customer.id))
+    return customer
+
+def select_with_stats(columns: Sequence[Any]) -> Select:
+    """``columns`` of customers plus their STAT_FIELDS, NULL for customers without a stats row."""
+    stats_columns = [CustomerStats.__table__.c[name] for name in STAT_FIELDS]
+    return select(*columns, *stats_columns).outerjoin(CustomerStats, CustomerStats.customer_id == Customer.id)
+
+def page_statement(columns: Sequence[Any], sort: str, cursor: Optional[str], limit: int) -> Select:
+    """Page of customers with their stats in ``sort`` order, plus one look-ahead row."""
+    if sort == "id":
+        stmt = select_with_stats(columns)
+        if cursor:
+            stmt = stmt.where(Customer.id > decode_cursor_fields(cursor)["id"])
+        return stmt.order_by(Customer.id).limit(limit + 1)
+    key = CustomerStats.__table__.c[sort]
+    # Every customer gets a stats row, so the page can be read off the stats index.
+    stats_columns = [CustomerStats.__table__.c[name] for name in STAT_FIELDS]
+    stmt = select(*columns, *stats_columns).join(CustomerStats, CustomerStats.customer_id == Customer.id)
+    if cursor:
+        fields = decode_cursor_fields(cursor)
+        try:
+            last_value = float(fields["value"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(key, CustomerStats.customer_id) < tuple_(last_value, fields["id"]))
+    return stmt.order_by(key.desc(), CustomerStats.customer_id.desc()).limit(limit + 1)
+
+def trim_page(rows: Sequence[Any], sort: str, limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+    """Drop the look-ahead row; the next cursor carries the sort value as well as the id."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if sort == "id":
+        return rows, encode_cursor(last.id)
+    return rows, encode_cursor(last.id, value=getattr(last, sort))
+
+async def apply_orders(db: AsyncSession, orders: Iterable[Order], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) the contribution of ``orders`` to their customers' stats.
+
+    Removal runs before the orders are deleted or changed; they are excluded
+    by id when the first/last order dates are looked up again.
+    """
+    per_customer: Dict[int, List[Order]] = defaultdict(list)
+    for order in orders:
+        if order.customer_id is not None and is_counted(order):
+            per_customer[order.customer_id].append(order)
+    if not per_customer:
+        return
+    table = CustomerStats.__table__
+    if sign > 0:
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["customer_id"],
+            set_={
+                "order_count": table.c.order_count + stmt.excluded.order_count,
+                "total_spent": table.c.total_spent + stmt.excluded.total_spent,
+                "first_order_at": case(
+                    (or_(table.c.first_order_at.is_(None), stmt.excluded.first_order_at < table.c.first_order_at),
+                     stmt.excluded.first_order_at),
+                    else_=table.c.first_order_at,
+                ),
+                "last_order_at": case(
+                    (or_(table.c.last_order_at.is_(None), stmt.excluded.last_order_at > table.c.last_order_at),
+                     stmt.excluded.last_order_at),
+                    else_=table.c.last_order_at,
+                ),
+            },
+        )
+        await db.execute(stmt, [
+            {
+                "customer_id": customer_id,
+                "order_count": len(placed),
+                "total_spent": sum(order.total or 0.0 for order in placed),
+                "first_order_at": min(order.created_at for order in placed),
+                "last_order_at": max(order.created_at for order in placed),
+            }
+            for customer_id, placed in per_customer.items()
+        ])
+        return
+    for customer_id, removed in per_customer.items():
+        remaining = and_(
+            Order.customer_id == table.c.customer_id,
+            Order.status != OrderStatus.CANCELLED,
+            Order.id.not_in([order.id for order in removed]),
+        )
+        await db.execute(
+            update(table)
+            .where(table.c.customer_id == customer_id)
+            .values(
+                order_count=table.c.order_count - len(removed),
+                total_spent=table.c.total_spent - sum(order.total or 0.0 for order in removed),
+                # Read off ix_orders_customer_id_id: only this customer's orders.
+                first_order_at=select(func.min(Order.created_at)).where(remaining).scalar_subquery(),
+                last_order_at=select(func.max(Order.created_at)).where(remaining).scalar_subquery(),
+            )
+        )
+
+async def rebuild(db: AsyncSession) -> None:
+    """Recompute every customer's row (including customers without orders) from orders."""
+    counted = and_(Order.customer_id == Customer.id, Order.status != OrderStatus.CANCELLED)
+    await db.execute(delete(CustomerStats))
+    await db.execute(insert(CustomerStats).from_select(
+        ["customer_id", *STAT_FIELDS],
+        select(
+            Customer.id, func.count(Order.id), func.coalesce(func.sum(Order.total), 0.0),
+            func.min(Order.created_at), func.max(Order.created_at),
+        )
+        .select_from(Customer)
+        .outerjoin(Order, counted)
+        .group_by(Customer.id),
+    ))
+
+async def _main() -> None:
+    async with SessionLocal() as db:
+        await rebuild(db)
+        await db.commit()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,169 @@
+"""Liveness, readiness and cold-start timing.
+
+Workers never run DDL at boot: the schema is owned by the Alembic
+migrations in ``migrations/`` and applied once per deploy with
+``alembic upgrade head``. Startup only reads ``alembic_version`` (bounded by
+READINESS_TIMEOUT) and logs when the database is not at a revision this
+code was written for, so a worker is serving within a second whatever
+state the database is in.
+
+``/health/live`` answers from memory and says only that the process is up.
+``/health/ready`` additionally needs a database ping to succeed within
+READINESS_TIMEOUT seconds and the schema to be at this code's head (or at
+a newer revision from a later deploy). Probe results are cached for
+READINESS_CACHE_SECONDS and concurrent probes share one check, so load
+balancers polling every worker cost one query per worker per interval.
+
+Cold start is measured from process start to the end of the startup hook,
+logged, exported as ``app_startup_seconds`` and included in the readiness
+payload.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from prometheus_client import Gauge
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "migrations")
+_IMPORTED_AT = time.time()
+
+STARTUP_SECONDS = Gauge("app_startup_seconds", "Seconds from process start until the app was ready to serve")
+
+def process_started_at() -> float:
+    """Wall-clock start of this process; when this module was imported where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Fields after the parenthesised command name; starttime is field 22 overall.
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            uptime_seconds = float(uptime.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED_AT
+    return time.time() - (uptime_seconds - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+@lru_cache(maxsize=1)
+def known_revisions() -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """(heads, every revision) of the migrations shipped with this code."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    script = ScriptDirectory.from_config(config)
+    return frozenset(script.get_heads()), frozenset(rev.revision for rev in script.walk_revisions())
+
+def schema_status(revision: Optional[str]) -> str:
+    heads, revisions = known_revisions()
+    if revision is None:
+        return "missing"
+    if revision in heads:
+        return "current"
+    # A revision we do not know comes from a newer deploy; migrations stay
+    # backward compatible, so older workers keep serving during the rollout.
+    return "behind" if revision in revisions else "ahead"
+
+@dataclass(frozen=True)
+class Readiness:
+    ready: bool
+    database: str
+    schema: str
+    revision: Optional[str]
+    checked_at: float
+
+    def payload(self) -> Dict[str, Any]:
+        content = asdict(self)
+        del content["checked_at"]
+        content["startup_seconds"] = startup.seconds
+        return content
+
+class ReadinessProbe:
+    def __init__(self, engine: AsyncEngine, cache_seconds: float, timeout: float):
+        self.engine = engine
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self._last: Optional[Readiness] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls, engine: AsyncEngine) -> "ReadinessProbe":
+        return cls(engine, float(os.getenv("READINESS_CACHE_SECONDS", "1")), float(os.getenv("READINESS_TIMEOUT", "0.5")))
+
+    def _fresh(self) -> Optional[Readiness]:
+        last = self._last
+        if last is not None and time.monotonic() - last.checked_at < self.cache_seconds:
+            return last
+        return None
+
+    async def check(self) -> Readiness:
+        cached = self._fresh()
+        if cached is not None:
+            return cached
+        async with self._lock:
+            cached = self._fresh()
+            if cached is None:
+                cached = self._last = await self._probe()
+        return cached
+
+    async def _probe(self) -> Readiness:
+        last = self._last
+        # Once the schema is usable only the ping is repeated; a later
+        # migration can only move it ahead of this code, which stays usable.
+        known = last.revision if last is not None and last.schema in ("current", "ahead") else None
+        try:
+            revision = await asyncio.wait_for(self._query(known), self.timeout)
+        except asyncio.TimeoutError:
+            return self._result("timeout", last)
+        except (DBAPIError, OSError) as exc:
+            logger.warning("readiness ping failed: %s", exc)
+            return self._result("unavailable", last)
+        status = schema_status(revision)
+        return Readiness(status in ("current", "ahead"), "ok", status, revision, time.monotonic())
+
+    def _result(self, database: str, last: Optional[Readiness]) -> Readiness:
+        schema, revision = (last.schema, last.revision) if last is not None else ("unknown", None)
+        return Readiness(False, database, schema, revision, time.monotonic())
+
+    async def _query(self, known: Optional[str]) -> Optional[str]:
+        async with self.engine.connect() as connection:
+            if known is not None:
+                await connection.execute(text("SELECT 1"))
+                return known
+            has_table = await connection.run_sync(
+                lambda sync: sync.dialect.has_table(sync, "alembic_version")
+            )
+            if not has_table:
+                return None
+            return await connection.scalar(text("SELECT version_num FROM alembic_version"))
+
+readiness = ReadinessProbe.from_env(engine)
+
+class Startup:
+    def __init__(self) -> None:
+        self.seconds: Optional[float] = None
+
+    async def complete(self) -> None:
+        """Run the boot-time schema check and record how long the process took to get here."""
+        result = await readiness.check()
+        if result.database != "ok":
+            logger.warning("database %s at startup; readiness recovers once it answers", result.database)
+        elif not result.ready:
+            logger.warning(
+                "schema is %s (revision %s, expected %s); run `alembic upgrade head`",
+                result.schema, result.revision, ", ".join(sorted(known_revisions()[0])),
+            )
+        self.seconds = round(time.time() - process_started_at(), 3)
+        STARTUP_SECONDS.set(self.seconds)
+        logger.info("ready to serve %.3fs after process start", self.seconds)
+
+startup = Startup()
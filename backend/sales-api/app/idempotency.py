@@ -0,0 +1,238 @@
+"""Idempotency keys for POST endpoints.
+
+Routers built with ``APIRouter(route_class=IdempotentRoute)`` honour an
+``Idempotency-Key`` header on POST. Keys are scoped to the caller (the
+authenticated customer, else the client address) and the endpoint, so one
+caller can neither collide with nor read another's responses. The first
+request claims the key by inserting an ``idempotency_keys`` row, then runs
+inside a transaction held open around the handler: its ``get_db`` session
+joins it, so the handler's commit only releases a savepoint, and the
+response's status, headers and body are stored and committed in the same
+transaction as the business writes. Either both are durable or neither is.
+A retry with the same key gets that response replayed byte for byte (plus
+``Idempotent-Replayed: true``) from the idempotency table alone; no
+business table is read or written.
+
+A retry that arrives while the first request is still running waits for
+it: on an in-process event when both landed on this worker, otherwise by
+polling the row. On 5xx responses and unexpected exceptions the whole
+transaction is rolled back and the claim released, so the client can
+retry for real. Claims left behind by a crashed worker (whose transaction
+therefore never committed) are taken over after IDEMPOTENCY_LOCK_SECONDS,
+and stored responses expire after IDEMPOTENCY_TTL seconds. Work a handler
+defers with ``app.database.after_commit`` (cache invalidation, the SQLite
+notification push) runs only once the outer commit has succeeded, and is
+dropped with the transaction otherwise.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.database import RequestTransaction, SessionLocal, engine, request_transaction
+from app.models import IdempotencyKey
+from app.routes.auth import verify_token
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+TTL = timedelta(seconds=float(os.getenv("IDEMPOTENCY_TTL", "86400")))
+# How long a claim may stay unfinished before another request may take it over.
+LOCK = timedelta(seconds=float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60")))
+# Cross-worker waiters re-read the row this often.
+POLL_SECONDS = 0.1
+# Expired rows are purged once every PURGE_EVERY claims in each process.
+PURGE_EVERY = 500
+# Headers recomputed for every response, so never stored.
+_UNSTORED_HEADERS = {"content-length", "date", "server"}
+
+Handler = Callable[[Request], Coroutine[Any, Any, Response]]
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are UTC.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class IdempotencyStore:
+    def __init__(self) -> None:
+        # Keys whose first request is running in this process.
+        self._running: Dict[str, asyncio.Event] = {}
+        self._claims = 0
+
+    async def claim(self, key: str, request_hash: str) -> Optional[datetime]:
+        """Insert the in-progress row and return its created_at; None when another request holds the key."""
+        now = _now()
+        async with SessionLocal() as db:
+            dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+            stmt = dialect.insert(IdempotencyKey).values(
+                key=key, request_hash=request_hash, created_at=now, expires_at=now + TTL,
+            ).on_conflict_do_nothing()
+            claimed = (await db.execute(stmt)).rowcount == 1
+            self._claims += 1
+            if self._claims % PURGE_EVERY == 0:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+            await db.commit()
+        if not claimed:
+            return None
+        self._running[key] = asyncio.Event()
+        return now
+
+    async def load(self, key: str) -> Optional[IdempotencyKey]:
+        async with SessionLocal() as db:
+            return await db.get(IdempotencyKey, key)
+
+    async def take_over(self, record: IdempotencyKey) -> None:
+        """Drop a record that expired or whose owner stopped without finishing.
+
+        Matching on created_at means only that exact claim is dropped, not a
+        fresh one another waiter made in the meantime.
+        """
+        async with SessionLocal() as db:
+            await db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == record.key, IdempotencyKey.created_at == record.created_at,
+            ))
+            await db.commit()
+
+    async def finish(self, connection: AsyncConnection, key: str, claimed_at: datetime, response: Response) -> bool:
+        """Store the response in the handler's transaction; False when the claim was taken over meanwhile."""
+        headers = [(name, value) for name, value in response.headers.items() if name not in _UNSTORED_HEADERS]
+        stored = await connection.execute(update(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at,
+        ).values(status_code=response.status_code, headers=json.dumps(headers), body=response.body))
+        return stored.rowcount == 1
+
+    async def release(self, key: str, claimed_at: datetime) -> None:
+        async with SessionLocal() as db:
+            await db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at,
+            ))
+            await db.commit()
+        self.wake(key)
+
+    def wake(self, key: str) -> None:
+        event = self._running.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, key: str, timeout: float) -> None:
+        event = self._running.get(key)
+        if event is None:
+            await asyncio.sleep(min(POLL_SECONDS, timeout))
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+idempotency_store = IdempotencyStore()
+
+def replay(record: IdempotencyKey) -> Response:
+    response = Response(content=record.body, status_code=record.status_code)
+    # Replace rather than merge: the stored headers include the original content-type.
+    response.raw_headers = [
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(record.headers or "[]")
+    ] + [(b"content-length", str(len(record.body or b"")).encode()), (REPLAYED_HEADER.lower().encode(), b"true")]
+    return response
+
+def caller(request: Request) -> str:
+    """Who the key belongs to: the verified bearer token's subject, else the client address."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return f"user:{verify_token(token).get('sub')}"
+    return f"client:{request.client.host if request.client else '-'}"
+
+async def _respond(request: Request, handler: Handler) -> Response:
+    try:
+        return await handler(request)
+    except HTTPException as exc:
+        if exc.status_code >= 500:
+            raise
+        # Client errors are as deterministic as successes; store the response the handler would render.
+        return await http_exception_handler(request, exc)
+
+async def run_once(request: Request, handler: Handler) -> Response:
+    client_key = request.headers[HEADER]
+    if not client_key or len(client_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters")
+    key = f"{request.method} {request.url.path} {caller(request)} {client_key}"
+    request_hash = hashlib.sha256(await request.body()).hexdigest()
+    deadline = asyncio.get_running_loop().time() + LOCK.total_seconds()
+
+    while (claimed_at := await idempotency_store.claim(key, request_hash)) is None:
+        record = await idempotency_store.load(key)
+        if record is None:
+            continue  # released or taken over in between; try to claim again
+        now = _now()
+        if _utc(record.expires_at) <= now or (
+            record.status_code is None and _utc(record.created_at) + LOCK <= now
+        ):
+            await idempotency_store.take_over(record)
+            continue
+        if record.request_hash != request_hash:
+            raise HTTPException(status_code=422, detail=f"{HEADER} was already used with a different request")
+        if record.status_code is not None:
+            return replay(record)
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise HTTPException(status_code=409, detail=f"A request with this {HEADER} is still in progress")
+        await idempotency_store.wait(key, remaining)
+
+    async with engine.connect() as connection:
+        await connection.begin()
+        if connection.dialect.name == "sqlite":
+            # Take the write lock up front: a deferred transaction that reads first and
+            # writes later deadlocks against the waiters' claim attempts.
+            await connection.exec_driver_sql("BEGIN IMMEDIATE")
+        outer = RequestTransaction(connection)
+        context = request_transaction.set(outer)
+        try:
+            response = await _respond(request, handler)
+            # Work the handler left uncommitted (e.g. before raising a 4xx) is undone, as closing would.
+            for db in outer.sessions:
+                if db.in_transaction():
+                    await db.rollback()
+        except BaseException:
+            await connection.rollback()
+            await idempotency_store.release(key, claimed_at)
+            raise
+        finally:
+            request_transaction.reset(context)
+        if response.status_code >= 500 or not hasattr(response, "body"):
+            await connection.rollback()
+            await idempotency_store.release(key, claimed_at)
+            return response
+        if not await idempotency_store.finish(connection, key, claimed_at, response):
+            # We overran IDEMPOTENCY_LOCK_SECONDS and another request took the key over; it does the work.
+            await connection.rollback()
+            idempotency_store.wake(key)
+            raise HTTPException(status_code=409, detail=f"A request with this {HEADER} is still in progress")
+        await connection.commit()
+    await outer.committed()
+    idempotency_store.wake(key)
+    return response
+
+class IdempotentRoute(APIRoute):
+    """APIRoute whose POST handlers honour the Idempotency-Key header."""
+
+    def get_route_handler(self) -> Handler:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if request.method != "POST" or HEADER.lower() not in request.headers:
+                return await handler(request)
+            return await run_once(request, handler)
+
+        return route_handler
@@ -0,0 +1,280 @@
+"""Background generation of custom reports.
+
+Submissions are persisted as ``report_jobs`` rows and return immediately.
+A fixed pool of asyncio workers (REPORT_JOB_WORKERS per process) computes
+them. Reports are produced a chunk at a time; each chunk is written to
+``report_job_chunks`` in its own short transaction together with the job's
+progress, so neither the worker nor the download ever holds a whole result
+in memory and a long report never pins a connection. Identical parameters
+submitted while a job is still queued or running resolve to that job
+instead of starting a new one.
+
+A running job is leased: the claim stores a random token and every chunk
+write renews ``heartbeat_at``. When a process dies mid-report the heartbeat
+goes stale, and after REPORT_JOB_LEASE_SECONDS the periodic sweep (in any
+process) claims the job again and starts it over; the old worker, should it
+still be alive, notices on its next write and gives up. On shutdown a
+running job is handed back to the queue straight away.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+from app.models import DailySales, Order, ReportJob, ReportJobChunk
+from app.models.report import ReportJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Rows (or days) read per chunk; each chunk is its own short transaction.
+CHUNK_ROWS = 1000
+CHUNK_DAYS = 31
+REQUEUE_RETRY_SECONDS = 5.0
+# Stored chunks read per round trip when a result is downloaded.
+STREAM_CHUNKS = 10
+
+# A report yields (rows, fraction done) once per chunk.
+Chunks = AsyncIterator[Tuple[List[Dict[str, Any]], float]]
+
+async def _sales_by_day(params: Dict[str, Any]) -> Chunks:
+    start, end = date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    total_days = (end - start).days + 1
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(DailySales.day, DailySales.order_count, DailySales.revenue)
+                .where(DailySales.day.between(chunk_start, chunk_end))
+                .order_by(DailySales.day)
+            )
+            rows = [
+                {"day": row.day.isoformat(), "order_count": row.order_count, "revenue": round(row.revenue, 2)}
+                for row in result
+            ]
+        yield rows, ((chunk_end - start).days + 1) / total_days
+        chunk_start = chunk_end + timedelta(days=1)
+
+async def _orders(params: Dict[str, Any]) -> Chunks:
+    start = datetime.combine(date.fromisoformat(params["start"]), time.min, tzinfo=timezone.utc)
+    end = datetime.combine(date.fromisoformat(params["end"]) + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    in_range = (Order.created_at >= start, Order.created_at < end)
+    async with SessionLocal() as db:
+        total = await db.scalar(select(func.count(Order.id)).where(*in_range))
+    done = 0
+    last_id = 0
+    while True:
+        async with SessionLocal() as db:
+            chunk = (await db.execute(
+                select(Order.id, Order.customer_id, Order.status, Order.total, Order.created_at)
+                .where(*in_range, Order.id > last_id)
+                .order_by(Order.id)
+                .limit(CHUNK_ROWS)
+            )).all()
+        if not chunk:
+            break
+        done += len(chunk)
+        last_id = chunk[-1].id
+        yield [
+            {"id": row.id, "customer_id": row.customer_id, "status": row.status.value, "total": row.total, "created_at": row.created_at.isoformat()}
+            for row in chunk
+        ], min(done / total, 1.0) if total else 1.0
+
+REPORT_TYPES: Dict[str, Callable[[Dict[str, Any]], Chunks]] = {
+    "sales_by_day": _sales_by_day,
+    "orders": _orders,
+}
+
+def params_hash(report_type: str, params: Dict[str, Any]) -> str:
+    normalized = json.dumps({"report_type": report_type, **params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+async def result_stream(job_id: str, report_type: str, params: str) -> AsyncIterator[bytes]:
+    """The finished job's result document, assembled from its stored chunks."""
+    yield ('{"report_type": %s, "params": %s, "rows": [' % (json.dumps(report_type), params)).encode()
+    last_seq, separator = -1, ""
+    while True:
+        # Own session: the body is produced after the endpoint (and its dependencies) returned.
+        async with SessionLocal() as db:
+            chunks = (await db.execute(
+                select(ReportJobChunk.seq, ReportJobChunk.rows)
+                .where(ReportJobChunk.job_id == job_id, ReportJobChunk.seq > last_seq)
+                .order_by(ReportJobChunk.seq)
+                .limit(STREAM_CHUNKS)
+            )).all()
+        if not chunks:
+            break
+        for chunk in chunks:
+            yield (separator + chunk.rows).encode()
+            separator = ","
+        last_seq = chunks[-1].seq
+    yield b"]}"
+
+class _LeaseLost(Exception):
+    """The job was claimed by another worker after this one's lease expired."""
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class ReportJobRunner:
+    def __init__(self, workers: int, lease_seconds: float = 60.0):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        # Ids currently in _queue, so repeated sweeps do not queue a job twice.
+        self._pending: Set[str] = set()
+        self._tasks: List["asyncio.Task[None]"] = []
+        # Serializes the dedup check and insert within this process.
+        self._submit_lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReportJobRunner":
+        return cls(int(os.getenv("REPORT_JOB_WORKERS", "2")), float(os.getenv("REPORT_JOB_LEASE_SECONDS", "60")))
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        # In the background, so a slow or unreachable database never holds up startup.
+        self._tasks.append(asyncio.create_task(self._requeue()))
+
+    def _expired(self) -> datetime:
+        return _now() - timedelta(seconds=self.lease_seconds)
+
+    def _claimable(self) -> Any:
+        # Queued, or running under a lease that expired with its worker.
+        stale = and_(ReportJob.status == ReportJobStatus.RUNNING, ReportJob.heartbeat_at < self._expired())
+        return or_(ReportJob.status == ReportJobStatus.QUEUED, stale)
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _requeue(self) -> None:
+        # Picks up jobs queued before a restart, then keeps sweeping for jobs whose
+        # lease expired (or that a dead process queued but never ran); claiming in
+        # _run keeps each of them single-run.
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    for job_id in await db.scalars(select(ReportJob.id).where(self._claimable())):
+                        self._enqueue(job_id)
+            except (OSError, DBAPIError) as exc:
+                logger.warning("cannot requeue pending report jobs yet: %s", exc)
+                await asyncio.sleep(REQUEUE_RETRY_SECONDS)
+                continue
+            await asyncio.sleep(self.lease_seconds)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, db: AsyncSession, report_type: str, params: Dict[str, Any]) -> ReportJob:
+        digest = params_hash(report_type, params)
+        # A running job with an expired lease is abandoned; the sweep restarts it, but a
+        # new submission does not wait on it.
+        live = and_(ReportJob.status == ReportJobStatus.RUNNING, ReportJob.heartbeat_at >= self._expired())
+        async with self._submit_lock:
+            existing: Optional[ReportJob] = await db.scalar(
+                select(ReportJob)
+                .where(ReportJob.params_hash == digest, or_(ReportJob.status == ReportJobStatus.QUEUED, live))
+                .limit(1)
+            )
+            if existing is not None:
+                return existing
+            job = ReportJob(id=uuid.uuid4().hex, report_type=report_type, params=json.dumps(params), params_hash=digest)
+            db.add(job)
+            await db.commit()
+        self._enqueue(job.id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("report job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _write(self, job_id: str, token: str, chunk: Optional[ReportJobChunk] = None, **values: Any) -> None:
+        """Store ``chunk`` and ``values`` and renew the heartbeat, as long as lease ``token`` still holds the job."""
+        async with SessionLocal() as db:
+            held = await db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.lease == token)
+                .values(heartbeat_at=_now(), **values)
+            )
+            if held.rowcount != 1:
+                raise _LeaseLost(job_id)
+            if chunk is not None:
+                db.add(chunk)
+            await db.commit()
+
+    async def _run(self, job_id: str) -> None:
+        lease = uuid.uuid4().hex
+        # Claim the job; another worker or process may already have it.
+        async with SessionLocal() as db:
+            claimed = await db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, self._claimable())
+                .values(status=ReportJobStatus.RUNNING, lease=lease, heartbeat_at=_now(), progress=0.0)
+            )
+            if claimed.rowcount != 1:
+                await db.rollback()
+                return
+            # A job taken over from a dead worker starts over.
+            await db.execute(delete(ReportJobChunk).where(ReportJobChunk.job_id == job_id))
+            await db.commit()
+            job = await db.get(ReportJob, job_id)
+            report_type, params = job.report_type, json.loads(job.params)
+
+        try:
+            seq = 0
+            async for rows, fraction in REPORT_TYPES[report_type](params):
+                chunk = None
+                if rows:
+                    chunk = ReportJobChunk(job_id=job_id, seq=seq, rows=",".join(json.dumps(row) for row in rows))
+                    seq += 1
+                await self._write(job_id, lease, chunk, progress=round(fraction, 4))
+            await self._write(
+                job_id, lease, status=ReportJobStatus.DONE, progress=1.0, lease=None, finished_at=func.now()
+            )
+        except _LeaseLost:
+            logger.warning("report job %s was taken over by another worker", job_id)
+        except asyncio.CancelledError:
+            await self._release(job_id, lease)
+            raise
+        except Exception as exc:
+            logger.exception("report job %s failed", job_id)
+            await self._write(
+                job_id, lease, status=ReportJobStatus.FAILED, error=str(exc), lease=None, finished_at=func.now()
+            )
+
+    async def _release(self, job_id: str, lease: str) -> None:
+        # Shutting down mid-report: queue the job again so the next start picks it up
+        # at once rather than after the lease runs out.
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(ReportJob)
+                    .where(ReportJob.id == job_id, ReportJob.lease == lease)
+                    .values(status=ReportJobStatus.QUEUED, lease=None, heartbeat_at=None)
+                )
+                await db.commit()
+        except (OSError, DBAPIError) as exc:
+            logger.warning("cannot release report job %s, it restarts once its lease expires: %s", job_id, exc)
+
+report_jobs = ReportJobRunner.from_env()
@@ -1,24 +1,17 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from app.routes import customers, products, orders, auth, notifications, reports
-from app.database import engine, Base
-from sqlalchemy.exc import OperationalError
-import time
-
-
-def create_tables_with_retry(retries: int = 10, delay: float = 2.0):
-    """Try to create DB tables with simple retry/backoff when Postgres isn't ready yet."""
-    attempt = 0
-    while attempt < retries:
-        try:
-            Base.metadata.create_all(bind=engine)
-            return
-        except OperationalError:
-            attempt += 1
-            time.sleep(delay)
-    # last attempt (let exception bubble)
-    Base.metadata.create_all(bind=engine)
+from app.database import engine
+from app.health import readiness, startup
+from app.idempotency import REPLAYED_HEADER
+from app.jobs import report_jobs
+from app.notifications import notification_hub
+from app.pagination import NEXT_CURSOR_HEADER
+from app.metrics import MetricsMiddleware, install_query_hooks, metrics_response
+from app.pool import PoolWaitMiddleware, pool_status
+from app.profiling import PROFILE_HEADERS, ProfilingMiddleware, install_profile_hooks
 
 
 app = FastAPI(
@@ -27,10 +20,18 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Ensure tables are created when the app starts
+# No DDL here: the schema is migrated by `alembic upgrade head` (see app.health).
 @app.on_event("startup")
-def on_startup():
-    create_tables_with_retry()
+async def on_startup():
+    await report_jobs.start()
+    await notification_hub.start()
+    await startup.complete()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await notification_hub.stop()
+    await report_jobs.stop()
+    await engine.dispose()
 
 # Add CORS middleware
 app.add_middleware(
@@ -39,7 +40,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", REPLAYED_HEADER, *PROFILE_HEADERS],
 )
+app.add_middleware(PoolWaitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Added last so it wraps everything else and times the whole request.
+app.add_middleware(MetricsMiddleware)
+install_query_hooks(engine.sync_engine)
+install_profile_hooks(engine.sync_engine)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
@@ -53,9 +61,24 @@ app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
 async def root():
     return {"message": "Sales API is running"}
 
+# Liveness: the process is up. Kept at /health for existing probes.
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    result = await readiness.check()
+    return JSONResponse(result.payload(), status_code=200 if result.ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+@app.get("/debug/pool")
+async def debug_pool():
+    return pool_status(engine.pool)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""Prometheus metrics.
+
+HTTP series are labelled by route template (``/api/v1/orders/{order_id}``),
+never the raw path, so label cardinality stays bounded by the number of
+routes. SQLAlchemy cursor events add each statement to the current
+request's query count and DB time, which are observed per route when the
+response finishes.
+"""
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+# Label used for requests that matched no route (404s, scanners).
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ["method"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["method", "route"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_TIME = Counter("db_query_seconds_total", "Time spent in SQL statements")
+REPORT_CACHE_LOOKUPS = Counter(
+    "report_cache_lookups_total", "Report cache lookups by outcome (hit, stale, miss)", ["result"]
+)
+REPORT_CACHE_RECOMPUTES = Counter("report_cache_recomputes_total", "Report recomputes")
+REPORT_CACHE_DISCARDED = Counter(
+    "report_cache_discarded_total", "Report recomputes dropped because a write invalidated the entry meanwhile"
+)
+REPORT_CACHE_RECOMPUTE_DURATION = Histogram(
+    "report_cache_recompute_seconds", "Report recompute latency", buckets=LATENCY_BUCKETS
+)
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+# Statements run while serving the current request; installed by MetricsMiddleware.
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    DB_QUERIES.inc()
+    DB_TIME.inc(elapsed)
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not fire for failed statements; drop their start time.
+    started: List[float] = exception_context.connection.info.get("query_started", []) if exception_context.connection else []
+    if started:
+        started.pop()
+
+def install_query_hooks(engine: Engine) -> None:
+    """Time every statement on ``engine`` (pass ``AsyncEngine.sync_engine``)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+class MetricsMiddleware:
+    """Records count, in-flight and latency per route template, plus per-request DB usage."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            request_query_stats.reset(token)
+            # The router stores the matched route in the scope, so read it only after the call.
+            route = _route_template(scope)
+            REQUESTS.labels(method, route, f"{status // 100}xx").inc()
+            REQUEST_DURATION.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(method, route).observe(stats.count)
+            REQUEST_DB_TIME.labels(method, route).observe(stats.seconds)
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,8 @@
-from .customer import Customer
+from .customer import Customer, CustomerStats
+from .idempotency import IdempotencyKey
+from .notification import Notification, NotificationCounter, NotificationRead
 from .order import Order, OrderItem
-from .product import Product
+from .product import Product, StockEvent
+from .report import DailySales, DailyProductSales, ReportJob, ReportJobChunk
 
-__all__ = ["Customer", "Order", "OrderItem", "Product"]
\ No newline at end of file
+__all__ = ["Customer", "CustomerStats", "IdempotencyKey", "Notification", "NotificationCounter", "NotificationRead", "Order", "OrderItem", "Product", "StockEvent", "DailySales", "DailyProductSales", "ReportJob", "ReportJobChunk"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,4 +15,22 @@ class Customer(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    orders = relationship("Order", back_populates="customer")
\ No newline at end of file
+    orders = relationship("Order", back_populates="customer")
+
+class CustomerStats(Base):
+    """Per-customer order totals, maintained incrementally by app.customer_stats."""
+    __tablename__ = "customer_stats"
+
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    # Cancelled orders are not counted, as in the sales rollups.
+    order_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0.0)
+    first_order_at = Column(DateTime(timezone=True))
+    last_order_at = Column(DateTime(timezone=True))
+
+    # Keyset pages sorted by a statistic (highest first) walk these backwards;
+    # customer_id breaks ties.
+    __table_args__ = (
+        Index("ix_customer_stats_total_spent", "total_spent", "customer_id"),
+        Index("ix_customer_stats_order_count", "order_count", "customer_id"),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """The stored outcome of a POST sent with an ``Idempotency-Key`` header (see app.idempotency)."""
+    __tablename__ = "idempotency_keys"
+
+    # "<METHOD> <path> <caller> <client key>", so a key cannot replay another endpoint's
+    # or another caller's response.
+    key = Column(String, primary_key=True)
+    # sha256 of the request body; a retry must send the same request.
+    request_hash = Column(String(64), nullable=False)
+    # NULL while the first request is still running.
+    status_code = Column(Integer)
+    headers = Column(Text)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
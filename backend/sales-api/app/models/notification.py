@@ -0,0 +1,54 @@
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+from typing import Any
+
+class NotificationType(str, enum.Enum):
+    INFO = "info"
+    SUCCESS = "success"
+    WARNING = "warning"
+    ERROR = "error"
+
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True)
+    # NULL addresses every user (catalog-wide events such as low stock).
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), nullable=True)
+    type: Any = Column(Enum(NotificationType), nullable=False, default=NotificationType.INFO)
+    title = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # A user's feed is "customer_id = :me OR customer_id IS NULL" after an id;
+    # both branches are range scans on this index.
+    __table_args__ = (
+        Index("ix_notifications_customer_id_id", "customer_id", "id"),
+    )
+
+# Customer id of the counter row that counts notifications addressed to everyone.
+EVERYONE = 0
+
+class NotificationCounter(Base):
+    """Per-user read state, so marking everything read updates no notification rows.
+
+    A notification is read when its id is at or below ``read_through`` or it
+    has a NotificationRead row. ``received`` counts notifications addressed to
+    the user (the EVERYONE row counts broadcasts), so the unread count is
+    ``received + everyone.received - read`` without a COUNT(*).
+    """
+    __tablename__ = "notification_counters"
+
+    # No foreign key: row 0 (EVERYONE) is not a customer.
+    customer_id = Column(Integer, primary_key=True, autoincrement=False)
+    received = Column(Integer, nullable=False, default=0, server_default="0")
+    read = Column(Integer, nullable=False, default=0, server_default="0")
+    read_through = Column(Integer, nullable=False, default=0, server_default="0")
+
+class NotificationRead(Base):
+    """A single notification read above the user's ``read_through`` watermark."""
+    __tablename__ = "notification_reads"
+
+    customer_id = Column(Integer, primary_key=True, autoincrement=False)
+    notification_id = Column(Integer, primary_key=True, autoincrement=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -32,9 +32,23 @@ class Order(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Composite indexes matching the list filters; the trailing id keeps
+    # keyset pages (WHERE ... AND id > :cursor ORDER BY id) on the index.
+    __table_args__ = (
+        Index("ix_orders_status_id", "status", "id"),
+        Index("ix_orders_customer_id_id", "customer_id", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
+
+    # Fetch server-generated columns (created_at, updated_at) via RETURNING
+    # so callers do not need a refresh round trip after commit.
+    __mapper_args__ = {"eager_defaults": True}
+
     # Relationships
     customer = relationship("Customer", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order")
+    # Items must be loaded explicitly (selectinload or set_committed_value);
+    # an implicit per-order lazy load would be an N+1 during serialization.
+    items = relationship("OrderItem", back_populates="order", lazy="raise_on_sql")
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Enum
+from sqlalchemy import DDL, Column, Integer, String, Text, Float, DateTime, Enum, Index, UniqueConstraint, event, text
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -9,6 +9,14 @@ class ProductStatus(str, enum.Enum):
     INACTIVE = "inactive"
     DISCONTINUED = "discontinued"
 
+class StockEventKind(str, enum.Enum):
+    LOW = "low"
+    RESTOCKED = "restocked"
+    REMOVED = "removed"
+
+# Reorder point for products created without one; the old global low-stock threshold.
+DEFAULT_REORDER_POINT = 10
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -18,8 +26,76 @@ class Product(Base):
     price = Column(Float)
     cost = Column(Float)
     stock = Column(Integer)
+    reorder_point = Column(Integer, nullable=False, default=DEFAULT_REORDER_POINT, server_default=str(DEFAULT_REORDER_POINT))
     category = Column(String)
     supplier = Column(String)
+    # The supplier's own identifier; (supplier, sku) is the catalog import key.
+    sku = Column(String)
     status: Any = Column(Enum(ProductStatus), default=ProductStatus.ACTIVE)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every write (including stock reservations and imports); the
+    # ETag is built from it, since updated_at is only second-precise on SQLite.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # The partial index holds only products at or below their reorder point,
+    # so the watchlist is an index scan over a small set however large the
+    # catalog grows. (stock, id) serves the explicit ?threshold= override.
+    __table_args__ = (
+        Index(
+            "ix_products_low_stock", "id",
+            postgresql_where=text("stock <= reorder_point"),
+            sqlite_where=text("stock <= reorder_point"),
+        ),
+        Index("ix_products_stock_id", "stock", "id"),
+        UniqueConstraint("supplier", "sku", name="uq_products_supplier_sku"),
+    )
+
+# Search indexes (see app/search.py). Postgres gets a weighted tsvector
+# expression index plus a trigram index on name for fuzzy matches; the
+# expression must stay identical to SEARCH_DOCUMENT for the planner to use
+# it. SQLite gets an FTS5 table kept in sync by triggers.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(supplier, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (({SEARCH_DOCUMENT}))",
+        "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, description, category, supplier, content='products', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, description, category, supplier) "
+        "VALUES (new.id, new.name, new.description, new.category, new.supplier); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description, category, supplier) "
+        "VALUES ('delete', old.id, old.name, old.description, old.category, old.supplier); END",
+        # Only text edits reindex; stock and price updates leave the index alone.
+        "CREATE TRIGGER IF NOT EXISTS products_fts_update "
+        "AFTER UPDATE OF name, description, category, supplier ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description, category, supplier) "
+        "VALUES ('delete', old.id, old.name, old.description, old.category, old.supplier); "
+        "INSERT INTO products_fts(rowid, name, description, category, supplier) "
+        "VALUES (new.id, new.name, new.description, new.category, new.supplier); END",
+    ],
+}
+for _dialect, _statements in _SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+class StockEvent(Base):
+    """A product entering (``low``) or leaving (``restocked``, ``removed``) the low-stock watchlist."""
+    __tablename__ = "stock_events"
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: the feed keeps its history after a product is deleted.
+    product_id = Column(Integer, nullable=False, index=True)
+    kind: Any = Column(Enum(StockEventKind), nullable=False)
+    stock = Column(Integer, nullable=False)
+    reorder_point = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,60 @@
+from sqlalchemy import Column, ForeignKey, Integer, Float, Date, DateTime, Enum, String, Text
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+from typing import Any
+
+class DailySales(Base):
+    """Order-level totals per day, maintained incrementally by app.rollups."""
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class DailyProductSales(Base):
+    """Item-level totals per day and product, maintained incrementally by app.rollups."""
+    __tablename__ = "sales_daily_products"
+
+    day = Column(Date, primary_key=True)
+    # No foreign key: history must survive product deletion.
+    product_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class ReportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class ReportJob(Base):
+    """A custom report computed in the background by app.jobs."""
+    __tablename__ = "report_jobs"
+
+    id = Column(String(32), primary_key=True)
+    report_type = Column(String, nullable=False)
+    params = Column(Text, nullable=False)
+    # sha256 of the normalized parameters; used to deduplicate in-flight submissions.
+    params_hash = Column(String(64), nullable=False, index=True)
+    status: Any = Column(Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.QUEUED)
+    progress = Column(Float, nullable=False, default=0.0)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    # Held by the worker running the job: a random token plus a heartbeat renewed
+    # with every chunk. A RUNNING job whose heartbeat is older than the lease is
+    # abandoned (its process died) and may be claimed again.
+    lease = Column(String(32))
+    heartbeat_at = Column(DateTime(timezone=True))
+
+    __mapper_args__ = {"eager_defaults": True}
+
+class ReportJobChunk(Base):
+    """One chunk of a report job's result rows, JSON-encoded and comma-joined (no brackets)."""
+    __tablename__ = "report_job_chunks"
+
+    job_id = Column(String(32), ForeignKey("report_jobs.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    rows = Column(Text, nullable=False)
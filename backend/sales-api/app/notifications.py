@@ -0,0 +1,327 @@
+"""Persisted user notifications and their push fan-out.
+
+Domain writes (order creation, low stock) call ``add`` inside their own
+transaction, so a notification exists exactly when the write committed.
+Delivery is push: every open ``/notifications/stream`` holds a bounded
+queue in this process's ``NotificationHub``.
+
+On Postgres ``add`` also issues ``pg_notify`` in the writer's transaction,
+which Postgres delivers on commit; each worker LISTENs on one dedicated
+connection and fans the payload out to its own subscribers, so no
+subscriber ever polls the database. Other databases (single-process SQLite
+development) publish to the local hub from a session ``after_commit``
+hook instead.
+
+A subscriber that falls behind, or a listener that loses its connection,
+has its streams closed; EventSource reconnects with ``Last-Event-ID`` and
+the stream backfills the gap from the table before going live again.
+Resuming after an id is only safe if ids become visible in order, so on
+Postgres ``add`` takes a transaction-scoped advisory lock before inserting
+(as the stock feed does) and notification writers commit one at a time.
+
+Read state is per user and never stored on the notification (broadcasts
+are shared rows): a ``read_through`` watermark plus single reads above it,
+with maintained counters for the unread badge (see NotificationCounter).
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Boolean, Select, and_, delete, event, func, insert, or_, select, text, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app import rollups
+from app.database import DATABASE_URL, RequestTransaction
+from app.models import Notification, NotificationCounter, NotificationRead
+from app.models.notification import EVERYONE, NotificationType
+from app.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notifications"
+# pg_advisory_xact_lock key serializing notification inserts ("notifs").
+NOTIFY_LOCK = 0x6E6F74696673
+# Notifications waiting for commit in a non-Postgres session: (transaction, payload).
+_PENDING_KEY = "pending_notifications"
+# Rows per query when a stream backfills after Last-Event-ID.
+BACKFILL_BATCH = 500
+# Comment lines keep idle streams open through proxies; retry is the client's reconnect delay.
+HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_HEARTBEAT_SECONDS", "15"))
+RETRY_MS = 3000
+
+def _payload(row: Any, read: bool = False) -> Dict[str, Any]:
+    return {
+        "id": row.id, "customer_id": row.customer_id, "type": row.type.value, "title": row.title,
+        "message": row.message, "read": read, "created_at": row.created_at,
+    }
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    return f"id: {payload['id']}\nevent: notification\ndata: {dumps(payload).decode()}\n\n"
+
+def order_placed(order: Any) -> Dict[str, Any]:
+    return {
+        "customer_id": order.customer_id, "type": NotificationType.SUCCESS, "title": "Order received",
+        "message": f"Order #{order.id} for {order.total:.2f} has been placed.",
+    }
+
+def low_stock(product_id: int, stock: int, reorder_point: int) -> Dict[str, Any]:
+    return {
+        "type": NotificationType.WARNING, "title": "Low stock",
+        "message": f"Product #{product_id} is down to {stock} (reorder point {reorder_point}).",
+    }
+
+def visible_to(customer_id: int) -> Any:
+    """Notifications addressed to ``customer_id`` or to everyone."""
+    return or_(Notification.customer_id == customer_id, Notification.customer_id.is_(None))
+
+def feed(customer_id: int) -> Select:
+    """The user's notifications with their ``read`` state, derived from the watermark and single reads."""
+    read_through = (
+        select(NotificationCounter.read_through).where(NotificationCounter.customer_id == customer_id).scalar_subquery()
+    )
+    read = or_(Notification.id <= func.coalesce(read_through, 0), NotificationRead.notification_id.is_not(None))
+    return (
+        select(*Notification.__table__.columns, type_coerce(read, Boolean).label("read"))
+        .outerjoin(NotificationRead, and_(
+            NotificationRead.customer_id == customer_id, NotificationRead.notification_id == Notification.id,
+        ))
+        .where(visible_to(customer_id))
+    )
+
+async def unread_count(db: AsyncSession, customer_id: int) -> int:
+    """Two primary-key reads, however many notifications the user has."""
+    counters = {
+        row.customer_id: row for row in (await db.execute(
+            select(NotificationCounter.customer_id, NotificationCounter.received, NotificationCounter.read)
+            .where(NotificationCounter.customer_id.in_([customer_id, EVERYONE]))
+        )).all()
+    }
+    mine, everyone = counters.get(customer_id), counters.get(EVERYONE)
+    received = (mine.received if mine else 0) + (everyone.received if everyone else 0)
+    return max(received - (mine.read if mine else 0), 0)
+
+async def mark_read(db: AsyncSession, customer_id: int, notification_id: int) -> bool:
+    """Mark one notification read; False when it is not visible to the user. Caller commits."""
+    visible = await db.scalar(
+        select(Notification.id).where(Notification.id == notification_id, visible_to(customer_id))
+    )
+    if visible is None:
+        return False
+    read_through = await db.scalar(
+        select(NotificationCounter.read_through).where(NotificationCounter.customer_id == customer_id)
+    )
+    if notification_id <= (read_through or 0):
+        return True
+    stmt = _dialect(db).insert(NotificationRead).values(customer_id=customer_id, notification_id=notification_id)
+    inserted = await db.execute(stmt.on_conflict_do_nothing())
+    # Only the request that actually recorded the read moves the counter.
+    if inserted.rowcount == 1:
+        await rollups.increment(db, NotificationCounter, ["customer_id"], [
+            {"customer_id": customer_id, "received": 0, "read": 1, "read_through": 0}
+        ])
+    return True
+
+async def mark_all_read(db: AsyncSession, customer_id: int) -> None:
+    """Move the user's watermark to the newest notification; no notification row is touched. Caller commits.
+
+    ``read`` (from the counters) and ``read_through`` (from the ids) must
+    describe the same notifications. On Postgres that takes ``add``'s lock:
+    once it is held no insert is in flight, and the statement below sees
+    every committed one in both places. SQLite already serializes writers.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(NOTIFY_LOCK)))
+    latest = select(func.coalesce(func.max(Notification.id), 0)).scalar_subquery()
+    received = (
+        select(func.coalesce(func.sum(NotificationCounter.received), 0))
+        .where(NotificationCounter.customer_id.in_([customer_id, EVERYONE]))
+        .scalar_subquery()
+    )
+    stmt = _dialect(db).insert(NotificationCounter).values(
+        customer_id=customer_id, received=0, read=received, read_through=latest,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["customer_id"], set_={"read": stmt.excluded.read, "read_through": stmt.excluded.read_through},
+    )
+    await db.execute(stmt)
+    # Single reads at or below the new watermark are now implied by it.
+    await db.execute(delete(NotificationRead).where(
+        NotificationRead.customer_id == customer_id,
+        NotificationRead.notification_id <= select(NotificationCounter.read_through)
+        .where(NotificationCounter.customer_id == customer_id).scalar_subquery(),
+    ))
+
+
+def _dialect(db: AsyncSession) -> Any:
+    return postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+async def add(db: AsyncSession, notifications: Iterable[Dict[str, Any]]) -> None:
+    """Insert notifications in the caller's transaction; they are pushed once it commits.
+
+    Each item needs ``title`` and ``message``; ``customer_id`` (None for
+    everyone) and ``type`` are optional.
+    """
+    values = [{"type": NotificationType.INFO, "customer_id": None, **item} for item in notifications]
+    if not values:
+        return
+    postgres = db.bind.dialect.name == "postgresql"
+    if postgres:
+        # Held until commit, so no later id can become visible before this one.
+        await db.execute(select(func.pg_advisory_xact_lock(NOTIFY_LOCK)))
+    rows = (await db.execute(
+        insert(Notification).returning(*Notification.__table__.columns, sort_by_parameter_order=True), values
+    )).all()
+    received: Dict[int, int] = defaultdict(int)
+    for row in rows:
+        received[EVERYONE if row.customer_id is None else row.customer_id] += 1
+    # Broadcasts all bump the single EVERYONE row; low-stock crossings are rare enough for that.
+    await rollups.increment(db, NotificationCounter, ["customer_id"], [
+        {"customer_id": key, "received": count, "read": 0, "read_through": 0} for key, count in sorted(received.items())
+    ])
+    if postgres:
+        # One round trip for the whole batch; Postgres delivers them in this order on commit.
+        await db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": [dumps(_payload(row)).decode() for row in rows]},
+        )
+    else:
+        session = db.sync_session
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        session.info.setdefault(_PENDING_KEY, []).extend((transaction, _payload(row)) for row in rows)
+
+def _within(transaction: Optional[SessionTransaction], ended: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ended:
+            return True
+        transaction = transaction.parent
+    return False
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        payloads = [payload for _, payload in pending]
+        outer = RequestTransaction.joined_by(session)
+        if outer is None:
+            notification_hub.dispatch(payloads)
+        else:
+            # This commit only released a savepoint; push once the request's transaction commits.
+            outer.callbacks.append(lambda: notification_hub.dispatch(payloads))
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction: SessionTransaction) -> None:
+    # Fires for savepoints too: only drop what the rolled-back (sub)transaction added.
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        session.info[_PENDING_KEY] = [entry for entry in pending if not _within(entry[0], previous_transaction)]
+
+class Subscription:
+    def __init__(self, customer_id: int, max_queued: int):
+        self.customer_id = customer_id
+        # None means "closed": the stream ends and the client resumes from Last-Event-ID.
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(max_queued + 1)
+        self.max_queued = max_queued
+
+    def offer(self, payload: Optional[Dict[str, Any]]) -> bool:
+        if payload is not None and self.queue.qsize() < self.max_queued:
+            self.queue.put_nowait(payload)
+            return True
+        # Too slow (or closing): drop what is queued and tell the stream to end.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+        return False
+
+class NotificationHub:
+    def __init__(self, max_queued: int, listen_url: Optional[str]):
+        self.max_queued = max_queued
+        self.listen_url = listen_url
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._listener: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def from_env(cls) -> "NotificationHub":
+        scheme, sep, rest = DATABASE_URL.partition("://")
+        listen_url = "postgresql" + sep + rest if scheme.startswith("postgresql") else None
+        return cls(int(os.getenv("NOTIFICATION_QUEUE_SIZE", "100")), listen_url)
+
+    def subscribe(self, customer_id: int) -> Subscription:
+        subscription = Subscription(customer_id, self.max_queued)
+        self._subscribers.setdefault(customer_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.customer_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.customer_id]
+
+    def dispatch(self, payloads: List[Dict[str, Any]]) -> None:
+        for payload in payloads:
+            if payload["customer_id"] is None:
+                targets = [s for subscriptions in self._subscribers.values() for s in subscriptions]
+            else:
+                targets = list(self._subscribers.get(payload["customer_id"], ()))
+            for subscription in targets:
+                if not subscription.offer(payload):
+                    self.unsubscribe(subscription)
+
+    def close_all(self) -> None:
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.offer(None)
+                self.unsubscribe(subscription)
+
+    async def start(self) -> None:
+        if self.listen_url is not None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        self.close_all()
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, raw: str) -> None:
+        try:
+            self.dispatch([json.loads(raw)])
+        except (ValueError, KeyError):
+            logger.warning("ignoring malformed notification payload: %.200s", raw)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        while True:
+            try:
+                connection = await asyncpg.connect(self.listen_url)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("notification listener cannot connect: %s", exc)
+                await asyncio.sleep(2.0)
+                continue
+            try:
+                await connection.add_listener(CHANNEL, self._on_notify)
+                while not connection.is_closed():
+                    await asyncio.sleep(5.0)
+                    await connection.execute("SELECT 1")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("notification listener lost its connection: %s", exc)
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            # Anything sent while disconnected was missed: make streams resume from the table.
+            self.close_all()
+
+notification_hub = NotificationHub.from_env()
+
+async def backfill(customer_id: int, after_id: int, db: AsyncSession) -> List[Dict[str, Any]]:
+    rows = (await db.execute(
+        feed(customer_id).where(Notification.id > after_id).order_by(Notification.id).limit(BACKFILL_BATCH)
+    )).all()
+    return [_payload(row, row.read) for row in rows]
@@ -0,0 +1,54 @@
+"""Keyset (cursor) pagination shared by the list endpoints.
+
+List endpoints keep returning a plain JSON array; the opaque cursor for the
+next page travels in the X-Next-Cursor response header and is passed back
+as the ``cursor`` query parameter. Pages are keyed on the primary key, so
+every page is an index range scan no matter how deep it is.
+"""
+import base64
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int, **extra: Any) -> str:
+    """Cursor after ``last_id``; ``extra`` carries the other sort keys of non-id orderings."""
+    raw = json.dumps({"id": last_id, **extra}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor_fields(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fields = json.loads(raw)
+        fields["id"] = int(fields["id"])
+        return fields
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def decode_cursor(cursor: str) -> int:
+    return decode_cursor_fields(cursor)["id"]
+
+def keyset(stmt: Select, id_column: Any, cursor: Optional[str], limit: int) -> Select:
+    """Restrict ``stmt`` to the page after ``cursor``, fetching one extra row to detect a next page."""
+    if cursor:
+        stmt = stmt.where(id_column > decode_cursor(cursor))
+    return stmt.order_by(id_column).limit(limit + 1)
+
+def trim(rows: Sequence[Any], limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+    """Drop the look-ahead row; return the page and the cursor of the next one, if any."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+def page(rows: Sequence[Any], limit: int, response: Response) -> Sequence[Any]:
+    """Trim the look-ahead row and advertise the next cursor when there is one."""
+    rows, next_cursor = trim(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
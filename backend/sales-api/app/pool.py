@@ -0,0 +1,147 @@
+"""Connection pool configuration and instrumentation.
+
+Pool sizing comes from the environment so workers can be sized against
+Postgres ``max_connections``:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS (0 disables)
+
+Every checkout is timed. Waits feed a process-wide histogram served by
+``/debug/pool``, and each request's total wait is reported in a
+``Server-Timing: db-pool`` response header. Opening a new connection is
+not waiting for one: connect time is subtracted from the checkout and
+recorded in a histogram of its own, so slow connects do not read as pool
+contention.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class WaitHistogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        index = next((i for i, bound in enumerate(self.buckets) if ms <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Cumulative counts, Prometheus style.
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            running += count
+            cumulative[bound] = running
+        return {"count": self.count, "sum_ms": round(self.total_ms, 3), "max_ms": round(self.max_ms, 3), "buckets_ms": cumulative}
+
+checkout_waits = WaitHistogram(WAIT_BUCKETS_MS)
+connect_times = WaitHistogram(WAIT_BUCKETS_MS)
+# Per-request accumulated checkout wait in ms; installed by PoolWaitMiddleware.
+request_pool_wait: ContextVar[Optional[List[float]]] = ContextVar("request_pool_wait", default=None)
+# Connect time in ms within the checkout in progress; set while one is.
+_checkout_connect: ContextVar[Optional[List[float]]] = ContextVar("_checkout_connect", default=None)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection, and each connect took."""
+
+    def _do_get(self):
+        if _checkout_connect.get() is not None:
+            # QueuePool retries by calling _do_get again; the outermost call measures.
+            return super()._do_get()
+        connecting = [0.0]
+        token = _checkout_connect.set(connecting)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _checkout_connect.reset(token)
+            waited = max((time.perf_counter() - started) * 1000 - connecting[0], 0.0)
+            checkout_waits.observe(waited)
+            accumulated = request_pool_wait.get()
+            if accumulated is not None:
+                accumulated[0] += waited
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            connect_times.observe(elapsed)
+            connecting = _checkout_connect.get()
+            if connecting is not None:
+                connecting[0] += elapsed
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_async_engine keyword arguments for ``url``; SQLite keeps SQLAlchemy's defaults."""
+    if url.startswith("sqlite"):
+        return {}
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedPool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+    statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout_ms:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout_ms)}}
+    return options
+
+def pool_status(pool: Any) -> Dict[str, Any]:
+    status: Dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "checkout_wait": checkout_waits.snapshot(),
+        "connect": connect_times.snapshot(),
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeout=pool.timeout(),
+        )
+    return status
+
+class PoolWaitMiddleware:
+    """Reports the request's total pool checkout wait as ``Server-Timing: db-pool;dur=<ms>``."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        waited = [0.0]
+        token = request_pool_wait.set(waited)
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f"db-pool;dur={waited[0]:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_pool_wait.reset(token)
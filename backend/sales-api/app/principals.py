@@ -0,0 +1,59 @@
+"""Cache of verified bearer tokens to the principal they resolve to.
+
+A hit skips both JWT verification and the customer lookup. Entries never
+outlive the token's ``exp`` claim and are capped at AUTH_CACHE_TTL seconds,
+which bounds staleness in the other workers of a multi-process deployment.
+The customers router drops a customer's entries in this process as soon as
+the customer is updated or deleted.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app import schemas
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, schemas.Customer]]" = OrderedDict()
+        self._tokens_by_customer: Dict[int, Set[str]] = {}
+
+    @classmethod
+    def from_env(cls) -> "PrincipalCache":
+        return cls(int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")), float(os.getenv("AUTH_CACHE_TTL", "60")))
+
+    def get(self, token: str) -> Optional[schemas.Customer]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._drop(token)
+            return None
+        self._entries.move_to_end(token)
+        return entry[1]
+
+    def put(self, token: str, principal: schemas.Customer, token_exp: float) -> None:
+        """Cache ``principal`` until the token expires or the TTL passes, whichever is first."""
+        self._drop(token)
+        self._entries[token] = (min(time.time() + self.ttl, token_exp), principal)
+        self._tokens_by_customer.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_customer(self, customer_id: int) -> None:
+        for token in self._tokens_by_customer.pop(customer_id, set()):
+            self._entries.pop(token, None)
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_customer.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_customer[entry[1].id]
+
+principal_cache = PrincipalCache.from_env()
@@ -0,0 +1,141 @@
+"""Conditional GET and read-through cache for product reads.
+
+Products carry a ``version`` that every write bumps, so ``"<id>-<version>"``
+is a strong validator computed without serializing anything. A list page's
+ETag hashes the (id, version) pairs of its rows.
+
+Bodies are encoded once by the orjson path in app.serialization and kept
+in a bounded in-process LRU: product details keyed on id, list pages keyed
+on (cursor, limit). A hit answers both a plain GET and an
+``If-None-Match`` revalidation without a query or a JSON encode. Product
+writes in this process drop the touched details and every page; entries
+in other workers expire after PRODUCT_CACHE_TTL seconds.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request
+from starlette.responses import Response
+
+from app import schemas
+from app.serialization import dumps, object_to_dict, rows_to_dicts
+
+CacheKey = Tuple[Any, ...]
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    headers: Dict[str, str]
+
+def product_etag(product: Any) -> str:
+    return f'"{product.id}-{product.version}"'
+
+def page_etag(products: Sequence[Any], next_cursor: Optional[str]) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for product in products:
+        digest.update(f"{product.id}-{product.version};".encode())
+    digest.update((next_cursor or "").encode())
+    return f'"p-{digest.hexdigest()}"'
+
+def _last_modified(products: Iterable[Any]) -> Optional[datetime]:
+    stamps = [product.updated_at or product.created_at for product in products]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+def validator_headers(etag: str, products: Iterable[Any]) -> Dict[str, str]:
+    # no-cache: clients may store the body but must revalidate, which is what makes 304s possible.
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    modified = _last_modified(products)
+    if modified is not None:
+        # SQLite hands timestamps back naive; they are UTC.
+        headers["Last-Modified"] = format_datetime(modified.replace(tzinfo=modified.tzinfo or timezone.utc), usegmt=True)
+    return headers
+
+def not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """RFC 9110 evaluation: If-None-Match wins; If-Modified-Since is only consulted without it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+def not_modified_response(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    return Response(status_code=304, headers=headers) if not_modified(request, headers) else None
+
+def json_response(cached: CachedResponse) -> Response:
+    return Response(cached.body, media_type="application/json", headers=cached.headers)
+
+def encode_product(product: Any) -> bytes:
+    return dumps(object_to_dict(product, schemas.Product))
+
+def encode_products(rows: Sequence[Any]) -> bytes:
+    """Encode a page selected as ``schema_columns(Product, schemas.Product)`` rows."""
+    return dumps(rows_to_dicts(rows))
+
+class ProductCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, tuple[float, CachedResponse]]" = OrderedDict()
+        # Bumped by every invalidation; a fill that started before one is discarded,
+        # so a read racing a write cannot cache the pre-write row.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ProductCache":
+        return cls(int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "10000")), float(os.getenv("PRODUCT_CACHE_TTL", "30")))
+
+    @staticmethod
+    def product_key(product_id: int) -> CacheKey:
+        return ("product", product_id)
+
+    @staticmethod
+    def page_key(cursor: Optional[str], limit: int) -> CacheKey:
+        return ("page", cursor or "", limit)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: CacheKey, response: CachedResponse, generation: int) -> None:
+        if generation != self.generation or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, product_ids: Iterable[int] = ()) -> None:
+        """Drop the given products and every cached page (any write can change a page)."""
+        self.generation += 1
+        for product_id in product_ids:
+            self._entries.pop(self.product_key(product_id), None)
+        for key in [key for key in self._entries if key[0] == "page"]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+product_cache = ProductCache.from_env()
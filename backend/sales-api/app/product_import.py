@@ -0,0 +1,186 @@
+"""Streaming catalog import.
+
+The CSV body is decoded and parsed as it arrives, validated, and merged
+in chunks of IMPORT_CHUNK_ROWS rows, so memory is bounded by one chunk
+whatever the file size. Each chunk is its own transaction, so long
+imports never hold row locks that order checkouts are waiting on.
+
+On Postgres a chunk is COPYed into a temporary staging table and merged
+with a single ``INSERT ... SELECT ... ON CONFLICT (supplier, sku) DO
+UPDATE``; SQLite upserts the chunk directly. Existing products only get
+the columns present in the CSV header overwritten, and their version is
+bumped. Stock changes that cross a reorder point are recorded in the
+low-stock feed like any other stock write.
+"""
+import codecs
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import cast, column, func, select, table, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas, stock
+from app.models import Product
+from app.models.product import ProductStatus
+
+IMPORT_CHUNK_ROWS = 5000
+# Rejected rows listed individually in the result; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+REQUIRED_COLUMNS = {"sku", "supplier", "name", "price", "cost", "stock"}
+IMPORT_COLUMNS = ["supplier", "sku", "name", "description", "price", "cost", "stock", "reorder_point", "category", "status"]
+# Columns an import may overwrite on existing products; the key columns never change.
+UPDATABLE_COLUMNS = [name for name in IMPORT_COLUMNS if name not in ("supplier", "sku")]
+
+STAGING_DDL = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS products_import ("
+    "supplier text, sku text, name text, description text, price double precision, cost double precision, "
+    "stock integer, reorder_point integer, category text, status text"
+    ") ON COMMIT DELETE ROWS"
+)
+_IMPORT_FIELDS = set(IMPORT_COLUMNS)
+_staging = table("products_import", *(column(name) for name in IMPORT_COLUMNS))
+
+def _complete_records(buffer: str) -> int:
+    """Length of the prefix of ``buffer`` made of whole CSV records (no open quote at the cut)."""
+    end = position = 0
+    quoted = False
+    while True:
+        newline = buffer.find("\n", position)
+        if newline == -1:
+            return end
+        quoted ^= buffer.count('"', position, newline) % 2 == 1
+        if not quoted:
+            end = newline + 1
+        position = newline + 1
+
+async def csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Parse CSV records from a byte stream without buffering it whole."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        cut = _complete_records(pending)
+        if cut:
+            for record in csv.reader(io.StringIO(pending[:cut])):
+                yield record
+            pending = pending[cut:]
+    pending += decoder.decode(b"", final=True)
+    for record in csv.reader(io.StringIO(pending)):
+        yield record
+
+def parse_row(header: List[str], record: List[str]) -> Dict[str, Any]:
+    """Validate one CSV record; raises ValueError with a readable message."""
+    # Empty cells fall back to the schema defaults.
+    cells = ((name, value.strip()) for name, value in zip(header, record))
+    values = {name: value for name, value in cells if name and value}
+    try:
+        row = schemas.ProductImportRow.model_validate(values)
+    except ValidationError as exc:
+        raise ValueError("; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()))
+    # model_dump rather than the deprecated .dict(): this runs once per CSV row.
+    data = row.model_dump(include=_IMPORT_FIELDS)
+    try:
+        data["status"] = ProductStatus(data["status"] or ProductStatus.ACTIVE.value)
+    except ValueError:
+        raise ValueError(f"status: must be one of {', '.join(status.value for status in ProductStatus)}")
+    return data
+
+class CatalogImport:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.dialect = db.bind.dialect.name
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.update_columns: List[str] = []
+
+    def reject(self, row: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    async def run(self, records: AsyncIterator[List[str]]) -> Dict[str, Any]:
+        header: List[str] = []
+        chunk: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        row_number = 0
+        async for record in records:
+            if not header:
+                header = [name.strip().lower() for name in record]
+                missing = REQUIRED_COLUMNS - set(header)
+                if missing:
+                    raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+                self.update_columns = [name for name in UPDATABLE_COLUMNS if name in header]
+                continue
+            row_number += 1
+            if not any(cell.strip() for cell in record):
+                continue
+            try:
+                data = parse_row(header, record)
+            except ValueError as exc:
+                self.reject(row_number, str(exc))
+                continue
+            # A key repeated within a chunk keeps its last row; ON CONFLICT cannot touch a row twice.
+            chunk[(data["supplier"], data["sku"])] = data
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                await self.merge(list(chunk.values()))
+                chunk = {}
+        if not header:
+            raise ValueError("The CSV is empty")
+        if chunk:
+            await self.merge(list(chunk.values()))
+        return {"inserted": self.inserted, "updated": self.updated, "rejected": self.rejected, "errors": self.errors}
+
+    async def merge(self, rows: List[Dict[str, Any]]) -> None:
+        keys = [(row["supplier"], row["sku"]) for row in rows]
+        before = {
+            (existing.supplier, existing.sku): existing
+            for existing in (await self.db.execute(
+                select(Product.id, Product.supplier, Product.sku, Product.stock, Product.reorder_point)
+                .where(tuple_(Product.supplier, Product.sku).in_(keys))
+            ))
+        }
+        if self.dialect == "postgresql":
+            merged = await self._merge_postgres(rows)
+        else:
+            merged = await self._merge_direct(rows)
+
+        changes: List[stock.StockChange] = []
+        for row in merged:
+            old = before.get((row.supplier, row.sku))
+            changes.append((row.id, old and old.stock, old and old.reorder_point, row.stock, row.reorder_point))
+        await stock.record(self.db, changes)
+        await self.db.commit()
+        self.updated += len(before)
+        self.inserted += len(merged) - len(before)
+
+    def _updates(self, excluded: Any) -> Dict[str, Any]:
+        return {**{name: excluded[name] for name in self.update_columns}, "updated_at": func.now(), "version": Product.version + 1}
+
+    def _returning(self) -> tuple:
+        return Product.id, Product.supplier, Product.sku, Product.stock, Product.reorder_point
+
+    async def _merge_postgres(self, rows: List[Dict[str, Any]]) -> list:
+        connection = await self.db.connection()
+        await connection.execute(text(STAGING_DDL))
+        raw = await connection.get_raw_connection()
+        # Enum columns store member names.
+        records = [tuple(row["status"].name if name == "status" else row[name] for name in IMPORT_COLUMNS) for row in rows]
+        await raw.driver_connection.copy_records_to_table("products_import", records=records, columns=IMPORT_COLUMNS)
+
+        source = select(*(
+            cast(_staging.c.status, Product.status.type) if name == "status" else _staging.c[name]
+            for name in IMPORT_COLUMNS
+        ))
+        stmt = pg_insert(Product).from_select(IMPORT_COLUMNS, source)
+        stmt = stmt.on_conflict_do_update(index_elements=["supplier", "sku"], set_=self._updates(stmt.excluded))
+        return (await self.db.execute(stmt.returning(*self._returning()))).all()
+
+    async def _merge_direct(self, rows: List[Dict[str, Any]]) -> list:
+        stmt = sqlite_insert(Product.__table__)
+        stmt = stmt.on_conflict_do_update(index_elements=["supplier", "sku"], set_=self._updates(stmt.excluded))
+        return (await self.db.execute(stmt.returning(*self._returning()), rows)).all()
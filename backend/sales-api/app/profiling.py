@@ -0,0 +1,166 @@
+"""Opt-in per-request SQL profiler.
+
+A sampled fraction of requests (SQL_PROFILE_SAMPLE_RATE, 0 disables) has
+every statement grouped by a normalized fingerprint: literals and bind
+placeholders become ``?`` and IN lists collapse. A fingerprint executed
+more than once in a request is a duplicate, which is usually an N+1.
+Profiled responses carry ``X-Query-Count``, ``X-DB-Time`` (ms) and
+``X-Query-Duplicates``.
+
+Every request slower than SLOW_REQUEST_MS, sampled or not, is written to
+the ``app.profiling`` logger as one JSON line. The line for a profiled
+request also has its query totals and top SQL_PROFILE_TOP statements by
+time. Requests that are not sampled pay a timer and two context-variable
+lookups per statement.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADERS = ["X-Query-Count", "X-DB-Time", "X-Query-Duplicates"]
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> str:
+    """Normalize ``statement`` so executions differing only in values compare equal."""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip().lower()
+
+class RequestProfile:
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # fingerprint -> [executions, seconds]
+        self.statements: Dict[str, List[Any]] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.setdefault(fingerprint(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    @property
+    def duplicates(self) -> int:
+        """Executions beyond the first of every fingerprint."""
+        return sum(executions - 1 for executions, _ in self.statements.values())
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {"sql": sql, "count": executions, "db_ms": round(seconds * 1000, 3)}
+            for sql, (executions, seconds) in ranked
+        ]
+
+class SqlProfiler:
+    def __init__(self, sample_rate: float, slow_ms: float, top: int):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.top = top
+
+    @classmethod
+    def from_env(cls) -> "SqlProfiler":
+        return cls(
+            float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "0")),
+            float(os.getenv("SLOW_REQUEST_MS", "500")),
+            int(os.getenv("SQL_PROFILE_TOP", "5")),
+        )
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+sql_profiler = SqlProfiler.from_env()
+# Profile of the current request, or None when it was not sampled.
+request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if request_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = request_profile.get()
+    if profile is not None:
+        profile.record(statement, time.perf_counter() - conn.info["profile_started"].pop())
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if request_profile.get() is not None and connection is not None and connection.info.get("profile_started"):
+        connection.info["profile_started"].pop()
+
+def install_profile_hooks(engine: Engine) -> None:
+    """Profile statements on ``engine`` (pass ``AsyncEngine.sync_engine``)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+class ProfilingMiddleware:
+    """Profiles a sample of requests and logs every slow one; see the module docstring."""
+
+    def __init__(self, app: Any, profiler: SqlProfiler = sql_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile() if self.profiler.sampled() else None
+        token = request_profile.set(profile)
+        status = 500
+
+        async def send_with_profile(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    # Streaming bodies may run more statements after this; the log line has the full count.
+                    headers = list(message.get("headers", []))
+                    headers += [
+                        (b"x-query-count", str(profile.count).encode()),
+                        (b"x-db-time", f"{profile.seconds * 1000:.2f}".encode()),
+                        (b"x-query-duplicates", str(profile.duplicates).encode()),
+                    ]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            request_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.profiler.slow_ms:
+                route = scope.get("route")
+                entry = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status,
+                    "duration_ms": round(elapsed_ms, 3),
+                    "sampled": profile is not None,
+                }
+                if profile is not None:
+                    entry.update({
+                        "query_count": profile.count,
+                        "db_ms": round(profile.seconds * 1000, 3),
+                        "duplicates": profile.duplicates,
+                        "top_statements": profile.top(self.profiler.top),
+                    })
+                logger.warning("slow request %s", json.dumps(entry))
@@ -0,0 +1,111 @@
+"""Daily sales rollups backing the report endpoints.
+
+Order writes call ``apply_orders`` inside their own transaction, so the
+rollup tables stay in step with ``orders``/``order_items`` without ever
+rescanning them. Reports then sum at most one row per day (and product)
+in the requested range. ``python -m app.rollups`` rebuilds the tables from
+scratch, e.g. after a backfill or for existing data.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+from app.models import DailyProductSales, DailySales, Order, OrderItem
+from app.models.order import OrderStatus
+
+def order_day(order: Order) -> date:
+    created_at: datetime = order.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+def is_counted(order: Order) -> bool:
+    """Cancelled orders are excluded from revenue and order counts."""
+    return order.status != OrderStatus.CANCELLED
+
+async def increment(db: AsyncSession, model: Any, keys: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+    """Add the non-key values of ``rows`` onto existing rows, inserting missing ones.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE, executed as a single multi-row statement.
+    """
+    if not rows:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    table = model.__table__
+    stmt = dialect.insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + stmt.excluded[name] for name in rows[0] if name not in keys},
+    )
+    await db.execute(stmt, rows)
+
+async def apply_orders(db: AsyncSession, orders: Iterable[Order], sign: int = 1) -> List[date]:
+    """Add (sign=1) or remove (sign=-1) the contribution of ``orders``; items must be loaded.
+
+    Returns the days whose totals changed, for cache invalidation.
+    """
+    daily: Dict[date, List[Any]] = defaultdict(lambda: [0, 0.0])
+    products: Dict[Tuple[date, int], List[Any]] = defaultdict(lambda: [0, 0.0])
+    for order in orders:
+        if not is_counted(order):
+            continue
+        day = order_day(order)
+        daily[day][0] += sign
+        daily[day][1] += sign * (order.total or 0.0)
+        for item in order.items:
+            products[(day, item.product_id)][0] += sign * (item.quantity or 0)
+            products[(day, item.product_id)][1] += sign * (item.total or 0.0)
+
+    await increment(db, DailySales, ["day"], [
+        {"day": day, "order_count": count, "revenue": revenue}
+        for day, (count, revenue) in daily.items()
+    ])
+    await increment(db, DailyProductSales, ["day", "product_id"], [
+        {"day": day, "product_id": product_id, "quantity": quantity, "revenue": revenue}
+        for (day, product_id), (quantity, revenue) in products.items()
+    ])
+    return sorted(daily)
+
+def utc_day(db: AsyncSession) -> Any:
+    """SQL for ``order_day``: the UTC calendar date of ``Order.created_at``.
+
+    Postgres' ``date()`` would use the session time zone; SQLite stores
+    timestamps in UTC already.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", Order.created_at), Date)
+    return func.date(Order.created_at)
+
+async def rebuild(db: AsyncSession) -> None:
+    """Recompute both rollup tables from orders and order items."""
+    day = utc_day(db)
+    counted = Order.status != OrderStatus.CANCELLED
+    await db.execute(delete(DailySales))
+    await db.execute(delete(DailyProductSales))
+    await db.execute(insert(DailySales).from_select(
+        ["day", "order_count", "revenue"],
+        select(day, func.count(Order.id), func.coalesce(func.sum(Order.total), 0.0))
+        .where(counted)
+        .group_by(day),
+    ))
+    await db.execute(insert(DailyProductSales).from_select(
+        ["day", "product_id", "quantity", "revenue"],
+        select(day, OrderItem.product_id, func.sum(OrderItem.quantity), func.coalesce(func.sum(OrderItem.total), 0.0))
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(counted)
+        .group_by(day, OrderItem.product_id),
+    ))
+
+async def _main() -> None:
+    async with SessionLocal() as db:
+        await rebuild(db)
+        await db.commit()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
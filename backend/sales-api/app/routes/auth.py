@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app import schemas, models
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import customer_stats, schemas, models
+from app.database import SessionLocal, get_db
+from app.principals import principal_cache
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from typing import Optional
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 # Secret key for JWT (in production, use environment variable)
 SECRET_KEY = "your-secret-key-change-in-production"
@@ -36,7 +39,34 @@ def verify_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.Customer:
+    return await resolve_principal(token, db)
+
+async def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme), access_token: Optional[str] = None
+) -> schemas.Customer:
+    """get_current_user for long-lived streams.
+
+    EventSource cannot send headers, so the token may also come as
+    ``?access_token=``. The lookup uses its own session, closed before the
+    stream starts, so an open stream never pins a pooled connection.
+    """
+    token = token or access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with SessionLocal() as db:
+        return await resolve_principal(token, db)
+
+async def resolve_principal(token: str, db: AsyncSession) -> schemas.Customer:
+    # A cached token skips both JWT verification and the customer lookup.
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     payload = verify_token(token)
     user_email = payload.get("sub")
     if user_email is None:
@@ -45,20 +75,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(models.Customer).filter(models.Customer.email == user_email).first()
+    user = await db.scalar(select(models.Customer).where(models.Customer.email == user_email))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = schemas.Customer.model_validate(user, from_attributes=True)
+    principal_cache.put(token, principal, payload["exp"])
+    return principal
+
+@router.get("/me", response_model=schemas.Customer)
+async def read_current_user(current_user: schemas.Customer = Depends(get_current_user)):
+    return current_user
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # In a real application, you would verify the username and password
     # For now, we'll just create a token for any valid user
-    user = db.query(models.Customer).filter(models.Customer.email == form_data.username).first()
+    user = await db.scalar(select(models.Customer).where(models.Customer.email == form_data.username))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,15 +109,14 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=schemas.Customer)
-def register(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
+async def register(customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_db)):
     # Check if customer already exists
-    db_customer = db.query(models.Customer).filter(models.Customer.email == customer.email).first()
+    db_customer = await db.scalar(select(models.Customer).where(models.Customer.email == customer.email))
     if db_customer:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new customer
-    db_customer = models.Customer(**customer.dict())
-    db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
+    db_customer = await customer_stats.add_customer(db, customer.dict())
+    await db.commit()
+    await db.refresh(db_customer)
     return db_customer
\ No newline at end of file
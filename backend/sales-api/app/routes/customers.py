@@ -1,55 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from app import schemas, models
+from app import customer_stats, schemas, models
 from app.database import get_db
+from app.idempotency import IdempotentRoute
+from app.principals import principal_cache
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.serialization import list_response, schema_columns
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 @router.post("/", response_model=schemas.Customer)
-def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
-    db_customer = models.Customer(**customer.dict())
-    db.add(db_customer)
+async def create_customer(customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_db)):
     try:
-        db.commit()
+        db_customer = await customer_stats.add_customer(db, customer.dict())
+        await db.commit()
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         # likely duplicate email
         raise HTTPException(status_code=400, detail="Customer with this email already exists")
-    db.refresh(db_customer)
+    await db.refresh(db_customer)
     return db_customer
 
-@router.get("/", response_model=list[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    customers = db.query(models.Customer).offset(skip).limit(limit).all()
-    return customers
+@router.get("/", response_model=list[schemas.CustomerWithStats])
+async def read_customers(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = Query("id", pattern=customer_stats.SORT_PATTERN),
+    db: AsyncSession = Depends(get_db),
+):
+    # Statistics come from customer_stats, never from aggregating orders.
+    columns = schema_columns(models.Customer, schemas.Customer)
+    rows = (await db.execute(customer_stats.page_statement(columns, sort, cursor, limit))).all()
+    customers, next_cursor = customer_stats.trim_page(rows, sort, limit)
+    return list_response(customer_stats.with_stats(customers), next_cursor)
 
-@router.get("/{customer_id}", response_model=schemas.Customer)
-def read_customer(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-    if db_customer is None:
+@router.get("/export")
+async def export_customers(request: Request, fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    stmt = select(*models.Customer.__table__.columns).order_by(models.Customer.id)
+    return export_response(request, stmt, fmt, "customers")
+
+@router.get("/{customer_id}", response_model=schemas.CustomerWithStats)
+async def read_customer(customer_id: int, db: AsyncSession = Depends(get_db)):
+    stmt = customer_stats.select_with_stats(schema_columns(models.Customer, schemas.Customer))
+    row = (await db.execute(stmt.where(models.Customer.id == customer_id))).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return db_customer
+    return customer_stats.with_stats([row])[0]
 
 @router.put("/{customer_id}", response_model=schemas.Customer)
-def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: Session = Depends(get_db)):
-    db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
+async def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: AsyncSession = Depends(get_db)):
+    db_customer = await db.get(models.Customer, customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     
     for key, value in customer.dict(exclude_unset=True).items():
         setattr(db_customer, key, value)
     
-    db.commit()
-    db.refresh(db_customer)
+    await db.commit()
+    principal_cache.invalidate_customer(customer_id)
+    await db.refresh(db_customer)
     return db_customer
 
 @router.delete("/{customer_id}")
-def delete_customer(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_db)):
+    db_customer = await db.get(models.Customer, customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     
-    db.delete(db_customer)
-    db.commit()
-    return {"message": "Customer deleted successfully"}
\ No newline at end of file
+    await db.execute(delete(models.CustomerStats).where(models.CustomerStats.customer_id == customer_id))
+    await db.delete(db_customer)
+    await db.commit()
+    principal_cache.invalidate_customer(customer_id)
+    return {"message": "Customer deleted successfully"}
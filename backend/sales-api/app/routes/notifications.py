@@ -1,23 +1,101 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import notifications, schemas
+from app.database import SessionLocal, get_db
+from app.models import Notification
+from app.notifications import BACKFILL_BATCH, HEARTBEAT_SECONDS, RETRY_MS, backfill, notification_hub, sse_event
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, trim
+from app.routes.auth import get_current_user, get_stream_user
+from app.serialization import list_response, rows_to_dicts
+from typing import AsyncIterator, Optional
+import asyncio
 
 router = APIRouter()
 
-@router.get("/")
-def get_notifications(db: Session = Depends(get_db)):
-    # In a real application, you would fetch notifications from the database
-    return [
-        {"id": 1, "title": "Welcome", "message": "Welcome to our system", "type": "info", "read": False},
-        {"id": 2, "title": "New Order", "message": "You have a new order", "type": "success", "read": False}
-    ]
+@router.get("/", response_model=list[schemas.Notification])
+async def get_notifications(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: schemas.Customer = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Newest first; the cursor walks back towards older notifications.
+    stmt = notifications.feed(current_user.id)
+    if cursor:
+        stmt = stmt.where(Notification.id < decode_cursor(cursor))
+    rows, next_cursor = trim((await db.execute(stmt.order_by(Notification.id.desc()).limit(limit + 1))).all(), limit)
+    return list_response(rows_to_dicts(rows), next_cursor)
+
+@router.get("/stream")
+async def stream_notifications(
+    last_event_id: Optional[int] = Header(None, ge=0),
+    after: Optional[int] = Query(None, ge=0),
+    current_user: schemas.Customer = Depends(get_stream_user),
+):
+    """Server-Sent Events feed of the user's notifications.
+
+    Reconnects resume after ``Last-Event-ID`` (EventSource sends it
+    automatically); a first connection can pass ``?after=`` with the newest
+    id it already listed. Without either the stream starts live.
+    """
+    start = last_event_id if last_event_id is not None else after
+
+    async def events() -> AsyncIterator[str]:
+        # Subscribe before backfilling so nothing committed in between is missed.
+        subscription = notification_hub.subscribe(current_user.id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            # Highest backfilled id. Notification ids commit in order (see app.notifications),
+            # so a queued payload at or below it was already sent by the backfill.
+            last_id = -1
+            if start is not None:
+                last_id = start
+                while True:
+                    async with SessionLocal() as db:
+                        batch = await backfill(current_user.id, last_id, db)
+                    for payload in batch:
+                        yield sse_event(payload)
+                    if batch:
+                        last_id = batch[-1]["id"]
+                    if len(batch) < BACKFILL_BATCH:
+                        break
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    return
+                if payload["id"] > last_id:
+                    yield sse_event(payload)
+        finally:
+            notification_hub.unsubscribe(subscription)
+
+    # X-Accel-Buffering stops nginx from holding events back.
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+@router.get("/unread-count", response_model=schemas.UnreadCount)
+async def get_unread_count(
+    current_user: schemas.Customer = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    return {"unread": await notifications.unread_count(db, current_user.id)}
 
 @router.put("/{notification_id}/read")
-def mark_as_read(notification_id: int, db: Session = Depends(get_db)):
-    # In a real application, you would update the notification in the database
+async def mark_as_read(
+    notification_id: int,
+    current_user: schemas.Customer = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if not await notifications.mark_read(db, current_user.id, notification_id):
+        raise HTTPException(status_code=404, detail="Notification not found")
+    await db.commit()
     return {"message": f"Notification {notification_id} marked as read"}
 
 @router.put("/read-all")
-def mark_all_as_read(db: Session = Depends(get_db)):
-    # In a real application, you would update all notifications in the database
-    return {"message": "All notifications marked as read"}
\ No newline at end of file
+async def mark_all_as_read(current_user: schemas.Customer = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    await notifications.mark_all_read(db, current_user.id)
+    await db.commit()
+    return {"message": "All notifications marked as read"}
@@ -1,18 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import schemas, models
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import attributes, selectinload
+from app import customer_stats, schemas, models, notifications, rollups, stock
 from app.models.order import OrderItem
-from app.database import get_db
+from app.cache import report_cache
+from app.database import after_commit, get_db
+from app.idempotency import IdempotentRoute
+from app.product_cache import product_cache
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.models.order import OrderStatus
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor_fields, encode_cursor, keyset, trim
+from app.serialization import list_response, rows_to_dicts, schema_columns
 
-from sqlalchemy import select
-from typing import Any, Dict, List
+from sqlalchemy import Integer, Select, column, func, insert, select, tuple_, update, values
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
-@router.post("/", response_model=schemas.Order)
-def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
-    # Create the order
-    # Compute subtotal from items; if item price not provided, load product price
+async def _load_product_prices(db: AsyncSession, product_ids: Iterable[int]) -> Dict[int, Any]:
+    """Resolve prices for all referenced products with a single IN (...) query."""
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    rows = (await db.execute(select(models.Product.id, models.Product.price).where(models.Product.id.in_(ids)))).all()
+    return {row.id: row.price for row in rows}
+
+def _price_order(order: schemas.OrderCreate, prices: Dict[int, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Compute item totals and order monetary fields in memory.
+
+    Raises HTTPException(400) for invalid quantities or unknown products.
+    """
     subtotal = 0.0
     db_items: List[Dict[str, Any]] = []
     for item_schema in order.items:
@@ -20,12 +39,10 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
         # Validate quantity
         if item_dict.get('quantity', 0) <= 0:
             raise HTTPException(status_code=400, detail=f"Invalid quantity for product {item_dict.get('product_id')}")
+        if item_dict['product_id'] not in prices:
+            raise HTTPException(status_code=400, detail=f"Product {item_dict['product_id']} not found")
         if not item_dict.get('price'):
-            # fetch product price
-            prod = db.execute(select(models.Product).where(models.Product.id == item_dict['product_id'])).scalars().first()
-            if prod is None:
-                raise HTTPException(status_code=400, detail=f"Product {item_dict['product_id']} not found")
-            item_dict['price'] = prod.price
+            item_dict['price'] = prices[item_dict['product_id']]
         item_dict['total'] = item_dict.get('total') or (item_dict['price'] * item_dict['quantity'])
         subtotal += item_dict['total']
         db_items.append(item_dict)
@@ -40,53 +57,274 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
     order_data['tax'] = tax
     order_data['shipping'] = shipping
     order_data['total'] = total
+    return order_data, db_items
 
-    db_order = models.Order(**order_data)
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+def _wanted(db: AsyncSession, quantities: Dict[int, int]) -> Any:
+    """``(product_id, quantity)`` rows as a FROM clause for one UPDATE ... FROM."""
+    rows = sorted(quantities.items())
+    if db.get_bind().dialect.name == "postgresql":
+        return values(column("product_id", Integer), column("quantity", Integer), name="wanted").data(rows)
+    # SQLite cannot name the columns of an aliased VALUES; they are column1, column2.
+    listed = values(column("column1", Integer), column("column2", Integer)).data(rows)
+    return select(listed.c.column1.label("product_id"), listed.c.column2.label("quantity")).subquery("wanted")
+
+async def _reserve_stock(db: AsyncSession, db_items: List[Dict[str, Any]]) -> None:
+    """Decrement stock for all of ``db_items`` with one conditional UPDATE ... FROM (VALUES ...).
+
+    Reorder-point crossings are appended to the low-stock feed in the same
+    transaction. Raises HTTPException(409) when any product does not have
+    enough stock; the products that did are already decremented, so callers
+    roll back (or release their savepoint) on it.
+    """
+    quantities: Dict[int, int] = defaultdict(int)
+    for item in db_items:
+        quantities[item['product_id']] += item['quantity']
+    if not quantities:
+        return
+    product = models.Product
+    if len(quantities) > 1 and db.get_bind().dialect.name == "postgresql":
+        # Lock rows in a stable order first so concurrent checkouts cannot deadlock.
+        await db.execute(select(product.id).where(product.id.in_(quantities)).order_by(product.id).with_for_update())
+    wanted = _wanted(db, quantities)
+    reserved = (await db.execute(
+        update(product)
+        .where(product.id == wanted.c.product_id, product.stock >= wanted.c.quantity)
+        .values(stock=product.stock - wanted.c.quantity, version=product.version + 1)
+        .returning(product.id, product.stock, product.reorder_point)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if len(reserved) < len(quantities):
+        short = min(set(quantities) - {row.id for row in reserved})
+        raise HTTPException(status_code=409, detail=f"Insufficient stock for product {short}")
+    await stock.record(db, [
+        (row.id, row.stock + quantities[row.id], row.reorder_point, row.stock, row.reorder_point)
+        for row in sorted(reserved, key=lambda row: row.id)
+    ])
 
-    # Create order items
-    for db_item_data in db_items:
-        # item is a mapping with primitive values; OrderItem expects kw args
-        db_item = OrderItem(order_id=db_order.id, product_id=db_item_data['product_id'], quantity=db_item_data['quantity'], price=db_item_data['price'], total=db_item_data['total'])
-        db.add(db_item)
+@router.post("/", response_model=schemas.Order)
+async def create_order(order: schemas.OrderCreate, db: AsyncSession = Depends(get_db)):
+    # Compute subtotal from items; item prices default to the product price
+    prices = await _load_product_prices(db, (item.product_id for item in order.items))
+    order_data, db_items = _price_order(order, prices)
 
-    db.commit()
-    db.refresh(db_order)
+    # Reserve stock, insert header and items and update the sales rollups
+    # and customer stats; all of it commits once.
+    try:
+        await _reserve_stock(db, db_items)
+    except HTTPException:
+        await db.rollback()
+        raise
+    db_order = models.Order(**order_data, items=[OrderItem(**item) for item in db_items])
+    db.add(db_order)
+    await db.flush()
+    days = await rollups.apply_orders(db, [db_order])
+    await customer_stats.apply_orders(db, [db_order])
+    await notifications.add(db, [notifications.order_placed(db_order)])
+    await db.commit()
+    await after_commit(db, lambda: report_cache.invalidate(days))
+    await after_commit(db, lambda: product_cache.invalidate(item['product_id'] for item in db_items))
     return db_order
 
+@router.post("/bulk", response_model=schemas.OrderBulkResponse)
+async def create_orders_bulk(payload: schemas.OrderBulkCreate, db: AsyncSession = Depends(get_db)):
+    # Resolve every referenced product and customer up front: two queries per batch.
+    prices = await _load_product_prices(db, (item.product_id for order in payload.orders for item in order.items))
+    customer_ids = {order.customer_id for order in payload.orders}
+    known_customers = set(await db.scalars(select(models.Customer.id).where(models.Customer.id.in_(customer_ids))))
+
+    # Price everything in memory; a bad order is reported, not raised.
+    results: Dict[int, Dict[str, Any]] = {}
+    priced: List[Tuple[int, Dict[str, Any], List[Dict[str, Any]]]] = []
+    for index, order in enumerate(payload.orders):
+        try:
+            if order.customer_id not in known_customers:
+                raise HTTPException(status_code=400, detail=f"Customer {order.customer_id} not found")
+            order_data, db_items = _price_order(order, prices)
+        except HTTPException as exc:
+            results[index] = {"index": index, "error": exc.detail}
+            continue
+        priced.append((index, order_data, db_items))
+
+    # Reserve stock for the whole batch in one statement. Only when some product
+    # comes up short, undo that and reserve order by order, each in a savepoint,
+    # so the short product fails only the orders that need it.
+    accepted = priced
+    try:
+        async with db.begin_nested():
+            await _reserve_stock(db, [item for _, _, db_items in priced for item in db_items])
+    except HTTPException:
+        accepted = []
+        for index, order_data, db_items in priced:
+            try:
+                async with db.begin_nested():
+                    await _reserve_stock(db, db_items)
+            except HTTPException as exc:
+                results[index] = {"index": index, "error": exc.detail}
+                continue
+            accepted.append((index, order_data, db_items))
+
+    if accepted:
+        # Multi-row INSERT ... RETURNING for headers, then for items, in one transaction.
+        db_orders = (await db.scalars(
+            insert(models.Order).returning(models.Order, sort_by_parameter_order=True),
+            [order_data for _, order_data, _ in accepted],
+        )).all()
+        item_rows = [
+            dict(item, order_id=db_order.id)
+            for db_order, (_, _, db_items) in zip(db_orders, accepted)
+            for item in db_items
+        ]
+        items_by_order: Dict[int, List[OrderItem]] = defaultdict(list)
+        if item_rows:
+            for db_item in await db.scalars(insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True), item_rows):
+                items_by_order[db_item.order_id].append(db_item)
+        for db_order, (index, _, _) in zip(db_orders, accepted):
+            # Populate the relationship from the rows we already have instead of lazy loading it.
+            attributes.set_committed_value(db_order, "items", items_by_order[db_order.id])
+            results[index] = {"index": index, "order": db_order}
+        days = await rollups.apply_orders(db, db_orders)
+        await customer_stats.apply_orders(db, db_orders)
+        await notifications.add(db, [notifications.order_placed(db_order) for db_order in db_orders])
+        await db.commit()
+        await after_commit(db, lambda: report_cache.invalidate(days))
+        await after_commit(db, lambda: product_cache.invalidate(
+            item['product_id'] for _, _, db_items in accepted for item in db_items
+        ))
+
+    return {
+        "created": len(accepted),
+        "failed": len(payload.orders) - len(accepted),
+        "results": [results[index] for index in sorted(results)],
+    }
+
 @router.get("/", response_model=list[schemas.Order])
-def read_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = db.query(models.Order).offset(skip).limit(limit).all()
-    return orders
+async def read_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[OrderStatus] = None,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(*schema_columns(models.Order, schemas.Order))
+    # status and customer_id are backed by (column, id) indexes on Order, so id-ordered pages stay range scans.
+    if status is not None:
+        stmt = stmt.where(models.Order.status == status)
+    if customer_id is not None:
+        stmt = stmt.where(models.Order.customer_id == customer_id)
+    if created_from is None and created_to is None:
+        rows, next_cursor = trim((await db.execute(keyset(stmt, models.Order.id, cursor, limit))).all(), limit)
+    else:
+        rows, next_cursor = await _created_at_page(db, stmt, created_from, created_to, cursor, limit)
+    orders = rows_to_dicts(rows)
+    # Items for the whole page in one IN (...) query, like selectinload would.
+    items_by_order: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    if orders:
+        items = await db.execute(
+            select(*schema_columns(OrderItem, schemas.OrderItem))
+            .where(OrderItem.order_id.in_([order["id"] for order in orders]))
+            .order_by(OrderItem.id)
+        )
+        for item in rows_to_dicts(items.all()):
+            items_by_order[item["order_id"]].append(item)
+    for order in orders:
+        order["items"] = items_by_order[order["id"]]
+    return list_response(orders, next_cursor)
 
-@router.get("/{order_id}", response_model=schemas.Order)
-def read_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
+async def _created_at_page(
+    db: AsyncSession, stmt: Select, created_from: Optional[datetime], created_to: Optional[datetime],
+    cursor: Optional[str], limit: int,
+) -> Tuple[Any, Optional[str]]:
+    """A page of date-filtered orders, ordered by (created_at, id).
+
+    Ordering by id would make the database read the whole date range to
+    sort it; in (created_at, id) order the range and the page are one scan
+    of ix_orders_created_at_id, however deep the page. The cursor carries
+    the last created_at as well as the id.
+    """
+    order = models.Order
+    created: Any = order.created_at
+    bound: Callable[[datetime], Any] = lambda value: value
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite compares the stored text: server defaults store whole seconds while bound
+        # values carry microseconds. Compare both in one format (development only; no index).
+        bound = lambda value: func.strftime("%Y-%m-%d %H:%M:%f", value)
+        created = bound(order.created_at)
+    if created_from is not None:
+        stmt = stmt.where(created >= bound(created_from))
+    if created_to is not None:
+        stmt = stmt.where(created < bound(created_to))
+    if cursor:
+        fields = decode_cursor_fields(cursor)
+        try:
+            last_created = datetime.fromisoformat(fields["created_at"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(created, order.id) > tuple_(bound(last_created), fields["id"]))
+    rows = (await db.execute(stmt.order_by(created, order.id).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id, created_at=rows[-1].created_at.isoformat())
+
+@router.get("/export")
+async def export_orders(request: Request, fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    # One row per order line; orders without items still appear once.
+    order, item = models.Order, OrderItem
+    stmt = (
+        select(
+            order.id.label("order_id"), order.customer_id, order.status, order.payment_status,
+            order.subtotal, order.tax, order.shipping, order.total, order.created_at,
+            item.id.label("item_id"), item.product_id, item.quantity, item.price, item.total.label("item_total"),
+        )
+        .outerjoin(item, item.order_id == order.id)
+        .order_by(order.id, item.id)
+    )
+    return export_response(request, stmt, fmt, "orders")
+
+async def _get_order(db: AsyncSession, order_id: int) -> models.Order:
+    db_order = await db.get(models.Order, order_id, options=[selectinload(models.Order.items)])
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return db_order
 
+@router.get("/{order_id}", response_model=schemas.Order)
+async def read_order(order_id: int, db: AsyncSession = Depends(get_db)):
+    return await _get_order(db, order_id)
+
 @router.put("/{order_id}", response_model=schemas.Order)
-def update_order(order_id: int, order: schemas.OrderUpdate, db: Session = Depends(get_db)):
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
-    if db_order is None:
-        raise HTTPException(status_code=404, detail="Order not found")
+async def update_order(order_id: int, order: schemas.OrderUpdate, db: AsyncSession = Depends(get_db)):
+    db_order = await _get_order(db, order_id)
+    changes = order.dict(exclude_unset=True)
+    # Only status and total feed the sales rollups; swap the old contribution for the new one.
+    affects_rollups = bool({"status", "total"} & changes.keys())
+    # Customer stats also follow customer_id; clients resend unchanged fields, so compare values.
+    affects_stats = any(getattr(db_order, key) != changes[key] for key in ("status", "total", "customer_id") if key in changes)
+    days = []
+    if affects_rollups:
+        days += await rollups.apply_orders(db, [db_order], sign=-1)
+    if affects_stats:
+        await customer_stats.apply_orders(db, [db_order], sign=-1)
     
-    for key, value in order.dict(exclude_unset=True).items():
+    for key, value in changes.items():
         setattr(db_order, key, value)
     
-    db.commit()
-    db.refresh(db_order)
+    if affects_rollups:
+        days += await rollups.apply_orders(db, [db_order])
+    if affects_stats:
+        await customer_stats.apply_orders(db, [db_order])
+    await db.commit()
+    await report_cache.invalidate(days)
     return db_order
 
 @router.delete("/{order_id}")
-def delete_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
-    if db_order is None:
-        raise HTTPException(status_code=404, detail="Order not found")
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_db)):
+    db_order = await _get_order(db, order_id)
     
-    db.delete(db_order)
-    db.commit()
-    return {"message": "Order deleted successfully"}
\ No newline at end of file
+    days = await rollups.apply_orders(db, [db_order], sign=-1)
+    await customer_stats.apply_orders(db, [db_order], sign=-1)
+    await db.delete(db_order)
+    await db.commit()
+    await report_cache.invalidate(days)
+    return {"message": "Order deleted successfully"}
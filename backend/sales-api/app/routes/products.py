@@ -1,54 +1,206 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import schemas, models
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas, models, stock
 from app.database import get_db
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.models.product import ProductStatus
+from app.product_import import CatalogImport, csv_records
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, encode_cursor, keyset, page, trim
+from app.product_cache import (
+    CachedResponse, encode_product, encode_products, json_response, not_modified_response,
+    page_etag, product_cache, product_etag, validator_headers,
+)
+from app.search import search_statement
+from app.serialization import schema_columns
+import csv
+from typing import Optional
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Product)
-def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product: schemas.ProductCreate, db: AsyncSession = Depends(get_db)):
     db_product = models.Product(**product.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.flush()
+    await stock.record(db, [(db_product.id, None, None, db_product.stock, db_product.reorder_point)])
+    await db.commit()
+    product_cache.invalidate()
+    await db.refresh(db_product)
     return db_product
 
+@router.post("/import", response_model=schemas.ProductImportResult)
+async def import_products(request: Request, db: AsyncSession = Depends(get_db)):
+    """Upsert products from a CSV keyed on (supplier, sku).
+
+    Accepts the CSV as the raw request body (streamed) or as a multipart
+    ``file`` field.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a CSV upload in the 'file' field")
+
+        async def chunks():
+            while chunk := await upload.read(64 * 1024):
+                yield chunk
+        body = chunks()
+    else:
+        body = request.stream()
+    try:
+        return await CatalogImport(db).run(csv_records(body))
+    except (ValueError, csv.Error) as exc:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        # Chunks commit as they go, so even a failed import may have changed products.
+        product_cache.clear()
+
 @router.get("/", response_model=list[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = db.query(models.Product).offset(skip).limit(limit).all()
-    return products
+async def read_products(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    key = product_cache.page_key(cursor, limit)
+    cached = product_cache.get(key)
+    if cached is None:
+        generation = product_cache.generation
+        stmt = select(*schema_columns(models.Product, schemas.Product))
+        products, next_cursor = trim((await db.execute(keyset(stmt, models.Product.id, cursor, limit))).all(), limit)
+        headers = validator_headers(page_etag(products, next_cursor), products)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        unchanged = not_modified_response(request, headers)
+        if unchanged is not None:
+            return unchanged
+        cached = CachedResponse(encode_products(products), headers)
+        product_cache.put(key, cached, generation)
+    return not_modified_response(request, cached.headers) or json_response(cached)
+
+@router.get("/export")
+async def export_products(request: Request, fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    stmt = select(*models.Product.__table__.columns).order_by(models.Product.id)
+    return export_response(request, stmt, fmt, "products")
+
+@router.get("/search", response_model=list[schemas.ProductSearchResult])
+async def search_products(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    supplier: Optional[str] = None,
+    status: Optional[ProductStatus] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    filters = []
+    if category is not None:
+        filters.append(models.Product.category == category)
+    if supplier is not None:
+        filters.append(models.Product.supplier == supplier)
+    if status is not None:
+        filters.append(models.Product.status == status)
+    if min_price is not None:
+        filters.append(models.Product.price >= min_price)
+    if max_price is not None:
+        filters.append(models.Product.price <= max_price)
+    if in_stock is not None:
+        filters.append(models.Product.stock > 0 if in_stock else models.Product.stock <= 0)
+    stmt = search_statement(db.bind.dialect.name, q, filters, cursor, limit)
+    results = (await db.execute(stmt)).all()
+    if len(results) > limit:
+        results = results[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(results[-1].id, rank=results[-1].rank)
+    return results
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def read_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if db_product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+async def read_product(request: Request, product_id: int, db: AsyncSession = Depends(get_db)):
+    key = product_cache.product_key(product_id)
+    cached = product_cache.get(key)
+    if cached is None:
+        generation = product_cache.generation
+        db_product = await db.get(models.Product, product_id)
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        headers = validator_headers(product_etag(db_product), [db_product])
+        unchanged = not_modified_response(request, headers)
+        if unchanged is not None:
+            return unchanged
+        cached = CachedResponse(encode_product(db_product), headers)
+        product_cache.put(key, cached, generation)
+    return not_modified_response(request, cached.headers) or json_response(cached)
 
 @router.get("/low-stock/", response_model=list[schemas.Product])
-def read_low_stock_products(threshold: int = 10, db: Session = Depends(get_db)):
-    products = db.query(models.Product).filter(models.Product.stock <= threshold).all()
-    return products
+async def read_low_stock_products(
+    response: Response,
+    threshold: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    # Each product's own reorder point by default (served by the partial index);
+    # an explicit threshold applies one cut-off to the whole catalog.
+    if threshold is None:
+        low = models.Product.stock <= models.Product.reorder_point
+    else:
+        low = models.Product.stock <= threshold
+    stmt = keyset(select(models.Product).where(low), models.Product.id, cursor, limit)
+    products = (await db.scalars(stmt)).all()
+    return page(products, limit, response)
+
+@router.get("/low-stock/changes", response_model=list[schemas.StockEvent])
+async def read_low_stock_changes(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Watchlist entries and exits after ``cursor``, oldest first.
+
+    Unlike the list endpoints the feed always returns X-Next-Cursor, even when
+    caught up, so clients can keep polling from where they stopped.
+    """
+    events = (await db.scalars(keyset(select(models.StockEvent), models.StockEvent.id, cursor, limit))).all()
+    events = events[:limit]
+    if events:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(events[-1].id)
+    elif cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    else:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(0)
+    return events
 
 @router.put("/{product_id}", response_model=schemas.Product)
-def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)):
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
+async def update_product(product_id: int, product: schemas.ProductUpdate, db: AsyncSession = Depends(get_db)):
+    db_product = await db.get(models.Product, product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    before = (db_product.stock, db_product.reorder_point)
     for key, value in product.dict(exclude_unset=True).items():
         setattr(db_product, key, value)
+    db_product.version = models.Product.version + 1
+    await stock.record(db, [(db_product.id, *before, db_product.stock, db_product.reorder_point)])
     
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    product_cache.invalidate([product_id])
+    await db.refresh(db_product)
     return db_product
 
 @router.delete("/{product_id}")
-def delete_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
+    db_product = await db.get(models.Product, product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    db.delete(db_product)
-    db.commit()
-    return {"message": "Product deleted successfully"}
\ No newline at end of file
+    await stock.removed(db, [db_product])
+    await db.delete(db_product)
+    await db.commit()
+    product_cache.invalidate([product_id])
+    return {"message": "Product deleted successfully"}
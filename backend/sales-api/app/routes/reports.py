@@ -1,28 +1,117 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from app.cache import report_cache
+from app.database import SessionLocal, get_db
+from app.jobs import REPORT_TYPES, report_jobs, result_stream
+from app.models.report import ReportJobStatus
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
 
 router = APIRouter()
 
-@router.get("/sales")
-def get_sales_report(period: str = "month", db: Session = Depends(get_db)):
-    # In a real application, you would generate a sales report from the database
+PERIODS = ("day", "week", "month", "quarter", "custom")
+
+def period_range(period: str, start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """Resolve a report period to an inclusive (start, end) date range, in UTC."""
+    today = datetime.now(timezone.utc).date()
+    if period == "day":
+        return today, today
+    if period == "week":
+        return today - timedelta(days=today.weekday()), today
+    if period == "month":
+        return today.replace(day=1), today
+    if period == "quarter":
+        return today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1), today
+    if period == "custom":
+        if start is None or end is None or start > end:
+            raise HTTPException(status_code=400, detail="Custom period requires start <= end")
+        return start, end
+    raise HTTPException(status_code=400, detail=f"Unknown period '{period}', expected one of {', '.join(PERIODS)}")
+
+async def build_sales_report(db: AsyncSession, start: date, end: date, top: int) -> dict:
+    """Sum the daily rollups over [start, end]; never touches orders or order_items."""
+    daily = models.DailySales
+    total_orders, total_revenue = (await db.execute(
+        select(func.coalesce(func.sum(daily.order_count), 0), func.coalesce(func.sum(daily.revenue), 0.0))
+        .where(daily.day.between(start, end))
+    )).one()
+
+    product_sales = models.DailyProductSales
+    quantity_sold = func.sum(product_sales.quantity).label("quantity_sold")
+    revenue = func.sum(product_sales.revenue).label("revenue")
+    top_products = (await db.execute(
+        select(product_sales.product_id, models.Product.name, quantity_sold, revenue)
+        .outerjoin(models.Product, models.Product.id == product_sales.product_id)
+        .where(product_sales.day.between(start, end))
+        .group_by(product_sales.product_id, models.Product.name)
+        .having(func.sum(product_sales.quantity) > 0)
+        .order_by(revenue.desc(), product_sales.product_id)
+        .limit(top)
+    )).all()
+
     return {
-        "period": period,
-        "total_revenue": 10000.00,
-        "total_orders": 50,
-        "average_order_value": 200.00,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "total_revenue": round(total_revenue, 2),
+        "total_orders": total_orders,
+        "average_order_value": round(total_revenue / total_orders, 2) if total_orders else 0.0,
         "top_products": [
-            {"product_id": 1, "product_name": "Product A", "quantity_sold": 25, "revenue": 5000.00},
-            {"product_id": 2, "product_name": "Product B", "quantity_sold": 20, "revenue": 4000.00}
-        ]
+            {"product_id": row.product_id, "product_name": row.name, "quantity_sold": row.quantity_sold, "revenue": round(row.revenue, 2)}
+            for row in top_products
+        ],
     }
 
-@router.post("/generate")
-def generate_report(report_data: dict, db: Session = Depends(get_db)):
-    # In a real application, you would generate a custom report
-    return {
-        "title": f"Generated Report: {report_data.get('reportType', 'Custom')}",
-        "data": report_data,
-        "generated_at": "2025-10-02T10:00:00Z"
-    }
\ No newline at end of file
+@router.get("/sales")
+async def get_sales_report(
+    period: str = "month",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    top: int = Query(5, ge=1, le=50),
+):
+    start, end = period_range(period, start, end)
+
+    # Runs on a miss or as a background refresh, so it cannot borrow the request's session.
+    async def compute() -> dict:
+        async with SessionLocal() as db:
+            return await build_sales_report(db, start, end, top)
+
+    report = await report_cache.get_or_compute(report_cache.key("sales", start, end, top=top), compute)
+    return {"period": period, **report}
+
+@router.get("/cache/stats")
+async def get_report_cache_stats():
+    return report_cache.stats()
+
+@router.post("/generate", response_model=schemas.ReportJob, status_code=202)
+async def generate_report(report: schemas.ReportJobCreate, db: AsyncSession = Depends(get_db)):
+    if report.report_type not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown report type '{report.report_type}', expected one of {', '.join(REPORT_TYPES)}")
+    if report.start > report.end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    params = {"start": report.start.isoformat(), "end": report.end.isoformat()}
+    return await report_jobs.submit(db, report.report_type, params)
+
+async def _get_job(db: AsyncSession, job_id: str) -> models.ReportJob:
+    job = await db.get(models.ReportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=schemas.ReportJob)
+async def read_report_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    return await _get_job(db, job_id)
+
+@router.get("/jobs/{job_id}/result")
+async def download_report_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    job = await _get_job(db, job_id)
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status.value}")
+    # Rows are stored pre-encoded, chunk by chunk; stream them out without re-parsing.
+    return StreamingResponse(
+        result_stream(job.id, job.report_type, job.params),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{job.report_type}-{job.id}.json"'},
+    )
@@ -1,9 +1,21 @@
-from .customer import CustomerBase, CustomerCreate, CustomerUpdate, Customer
-from .order import OrderBase, OrderCreate, OrderUpdate, Order, OrderItem
-from .product import ProductBase, ProductCreate, ProductUpdate, Product
+from .customer import CustomerBase, CustomerCreate, CustomerUpdate, Customer, CustomerStats, CustomerWithStats
+from .notification import Notification, UnreadCount
+from .order import (
+    OrderBase, OrderCreate, OrderUpdate, Order, OrderItem,
+    OrderBulkCreate, OrderBulkResult, OrderBulkResponse,
+)
+from .product import (
+    ProductBase, ProductCreate, ProductUpdate, Product, ProductSearchResult,
+    ProductImportRow, ProductImportError, ProductImportResult, StockEvent,
+)
+from .report import ReportJobCreate, ReportJob
 
 __all__ = [
-    "CustomerBase", "CustomerCreate", "CustomerUpdate", "Customer",
+    "CustomerBase", "CustomerCreate", "CustomerUpdate", "Customer", "CustomerStats", "CustomerWithStats",
+    "Notification", "UnreadCount",
     "OrderBase", "OrderCreate", "OrderUpdate", "Order", "OrderItem",
-    "ProductBase", "ProductCreate", "ProductUpdate", "Product"
+    "OrderBulkCreate", "OrderBulkResult", "OrderBulkResponse",
+    "ProductBase", "ProductCreate", "ProductUpdate", "Product", "ProductSearchResult",
+    "ProductImportRow", "ProductImportError", "ProductImportResult", "StockEvent",
+    "ReportJobCreate", "ReportJob"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -22,5 +22,15 @@ class Customer(CustomerBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CustomerStats(BaseModel):
+    order_count: int = 0
+    total_spent: float = 0.0
+    first_order_at: Optional[datetime] = None
+    last_order_at: Optional[datetime] = None
+    # champion, loyal, new, promising, at_risk or lost; None without orders.
+    rfm_segment: Optional[str] = None
+
+class CustomerWithStats(Customer):
+    stats: CustomerStats
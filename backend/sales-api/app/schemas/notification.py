@@ -0,0 +1,17 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class Notification(BaseModel):
+    id: int
+    customer_id: Optional[int] = None
+    type: str
+    title: str
+    message: str
+    read: bool
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class UnreadCount(BaseModel):
+    unread: int
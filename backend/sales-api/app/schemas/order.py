@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -16,8 +16,7 @@ class OrderItem(OrderItemBase):
     id: int
     order_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class OrderBase(BaseModel):
     customer_id: int
@@ -42,5 +41,19 @@ class Order(OrderBase):
     updated_at: Optional[datetime] = None
     items: List[OrderItem] = []
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class OrderBulkCreate(BaseModel):
+    # Upper bound keeps a single batch inside one reasonably sized transaction.
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000)
+
+class OrderBulkResult(BaseModel):
+    # Position of the order in the submitted batch.
+    index: int
+    order: Optional[Order] = None
+    error: Optional[str] = None
+
+class OrderBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBulkResult]
\ No newline at end of file
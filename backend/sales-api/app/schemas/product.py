@@ -1,15 +1,20 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, List, Optional
 from datetime import datetime
 
+# Range of the Integer columns; a bigger CSV value is a row error, not a database error.
+Int32 = Annotated[int, Field(ge=-2**31, le=2**31 - 1)]
+
 class ProductBase(BaseModel):
     name: str
     description: Optional[str] = None
     price: float
     cost: float
     stock: int
+    reorder_point: int = 10
     category: str
     supplier: str
+    sku: Optional[str] = None
     status: Optional[str] = "active"
 
 class ProductCreate(BaseModel):
@@ -18,8 +23,10 @@ class ProductCreate(BaseModel):
     price: float
     cost: float
     stock: int
+    reorder_point: int = 10
     category: str
     supplier: str
+    sku: Optional[str] = None
     status: Optional[str] = "active"
 
 class ProductUpdate(BaseModel):
@@ -28,14 +35,47 @@ class ProductUpdate(BaseModel):
     price: Optional[float] = None
     cost: Optional[float] = None
     stock: Optional[int] = None
+    reorder_point: Optional[int] = None
     category: Optional[str] = None
     supplier: Optional[str] = None
+    sku: Optional[str] = None
     status: Optional[str] = None
 
 class Product(ProductBase):
     id: int
+    # Imports may create products without a category (see ProductImportRow).
+    category: Optional[str] = None
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductSearchResult(Product):
+    rank: float
+
+class ProductImportRow(ProductCreate):
+    sku: str
+    stock: Int32
+    reorder_point: Int32 = 10
+    category: Optional[str] = None
+
+class ProductImportError(BaseModel):
+    row: int
+    error: str
+
+class ProductImportResult(BaseModel):
+    inserted: int
+    updated: int
+    rejected: int
+    errors: List[ProductImportError]
+
+class StockEvent(BaseModel):
+    id: int
+    product_id: int
+    kind: str
+    stock: int
+    reorder_point: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from datetime import date, datetime
+
+class ReportJobCreate(BaseModel):
+    # Accepts the frontend's {"reportType": ..., ...params} payload.
+    model_config = ConfigDict(populate_by_name=True)
+
+    report_type: str = Field(alias="reportType")
+    start: date
+    end: date
+
+class ReportJob(BaseModel):
+    id: str
+    report_type: str
+    status: str
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,75 @@
+"""Ranked product search.
+
+On Postgres a query matches the weighted ``SEARCH_DOCUMENT`` tsvector
+(name over category/supplier over description, every term as a prefix)
+or is trigram-similar to the name, so typos still find products. Both
+predicates are served by GIN indexes, and the rank adds ``ts_rank_cd`` to
+the name similarity. On SQLite the FTS5 ``products_fts`` table is
+matched and ranked with bm25 using the same column weighting.
+
+Results are ordered by (rank desc, id) and paged with a keyset cursor
+carrying both keys.
+"""
+import re
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Float, Select, and_, column, func, literal_column, or_, select, table
+
+from app.models import Product
+from app.models.product import SEARCH_DOCUMENT
+from app.pagination import decode_cursor_fields
+
+# Terms beyond this are ignored; they rarely change the ranking and each one costs an index probe.
+MAX_TERMS = 8
+# bm25 weights for the FTS5 columns: name, description, category, supplier.
+FTS_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+
+_TERM = re.compile(r"\w+")
+_fts = table("products_fts", column("rowid"))
+
+def terms(q: str) -> List[str]:
+    words = _TERM.findall(q.lower())[:MAX_TERMS]
+    if not words:
+        raise HTTPException(status_code=400, detail="Search query must contain letters or digits")
+    return words
+
+def _ranked_postgres(q: str, words: List[str]) -> Select:
+    query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+    # Parenthesized: || and @@ share a precedence level.
+    document = literal_column(f"({SEARCH_DOCUMENT})")
+    rank = func.ts_rank_cd(document, query, type_=Float) + func.similarity(Product.name, q, type_=Float)
+    return select(Product.id.label("id"), rank.label("rank")).where(
+        or_(document.op("@@")(query), Product.name.op("%")(q))
+    )
+
+def _ranked_sqlite(words: List[str]) -> Select:
+    match = " ".join(f'"{word}"*' for word in words)
+    # bm25 is lower-is-better; negate it so both backends sort rank descending.
+    rank = -func.bm25(literal_column("products_fts"), *FTS_WEIGHTS, type_=Float)
+    return (
+        select(Product.id.label("id"), rank.label("rank"))
+        .join_from(_fts, Product, Product.id == _fts.c.rowid)
+        .where(literal_column("products_fts").op("MATCH")(match))
+    )
+
+def search_statement(
+    dialect: str,
+    q: str,
+    filters: list,
+    cursor: Optional[str],
+    limit: int,
+) -> Select:
+    """Page of products matching ``q`` with a ``rank`` column, plus one look-ahead row."""
+    words = terms(q)
+    ranked = _ranked_postgres(q, words) if dialect == "postgresql" else _ranked_sqlite(words)
+    ranked = ranked.where(*filters).subquery()
+    stmt = select(*Product.__table__.columns, ranked.c.rank).join(ranked, ranked.c.id == Product.id)
+    if cursor:
+        fields = decode_cursor_fields(cursor)
+        try:
+            last_rank = float(fields["rank"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(or_(ranked.c.rank < last_rank, and_(ranked.c.rank == last_rank, ranked.c.id > fields["id"])))
+    return stmt.order_by(ranked.c.rank.desc(), ranked.c.id).limit(limit + 1)
@@ -0,0 +1,74 @@
+"""Low-stock watchlist change feed.
+
+A product is on the watchlist while ``stock <= reorder_point``. Every
+write that changes stock or a reorder point reports the before/after
+values here, and only the writes that move a product onto or off the
+watchlist append a ``stock_events`` row, in the writer's transaction.
+Deleting a product that is on the watchlist appends a ``removed`` exit.
+The warehouse screen loads the watchlist once and then follows the feed
+by event id instead of rescanning the catalog. Entries onto the watchlist
+also raise a low-stock notification for every user.
+
+Following by id is only safe if ids become visible in order. Postgres
+hands out ids at insert time but concurrent transactions commit in any
+order, so a reader could pass an id whose row commits later. Feed writes
+therefore take a transaction-scoped advisory lock first, which makes them
+commit one at a time in id order. Only reorder-point crossings take it;
+SQLite already serializes all writers.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import notifications
+from app.models import Product, StockEvent
+from app.models.product import StockEventKind
+
+# pg_advisory_xact_lock key serializing stock_events inserts ("stkfeed").
+FEED_LOCK = 0x73746B66656564
+
+# (product_id, old_stock, old_reorder_point, new_stock, new_reorder_point)
+StockChange = Tuple[int, Optional[int], Optional[int], Optional[int], int]
+
+def is_low(stock: Optional[int], reorder_point: Optional[int]) -> bool:
+    return stock is not None and reorder_point is not None and stock <= reorder_point
+
+def transition(change: StockChange) -> Optional[StockEventKind]:
+    _, old_stock, old_point, new_stock, new_point = change
+    was_low, now_low = is_low(old_stock, old_point), is_low(new_stock, new_point)
+    if now_low and not was_low:
+        return StockEventKind.LOW
+    if was_low and not now_low:
+        return StockEventKind.RESTOCKED
+    return None
+
+async def record(db: AsyncSession, changes: Iterable[StockChange]) -> None:
+    """Append a feed event for every change that crosses a reorder point."""
+    rows = []
+    alerts = []
+    for change in changes:
+        kind = transition(change)
+        if kind is not None:
+            product_id, _, _, new_stock, new_point = change
+            rows.append({"product_id": product_id, "kind": kind, "stock": new_stock, "reorder_point": new_point})
+            if kind is StockEventKind.LOW:
+                alerts.append(notifications.low_stock(product_id, new_stock, new_point))
+    await _append(db, rows)
+    await notifications.add(db, alerts)
+
+async def removed(db: AsyncSession, products: Iterable[Product]) -> None:
+    """Append exits for ``products`` about to be deleted while on the watchlist."""
+    await _append(db, [
+        {"product_id": product.id, "kind": StockEventKind.REMOVED, "stock": product.stock, "reorder_point": product.reorder_point}
+        for product in products
+        if is_low(product.stock, product.reorder_point)
+    ])
+
+async def _append(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    if db.bind.dialect.name == "postgresql":
+        # Held until commit, so no later id can become visible before this one.
+        await db.execute(select(func.pg_advisory_xact_lock(FEED_LOCK)))
+    await db.execute(insert(StockEvent), rows)
@@ -0,0 +1,92 @@
+"""Measure how long a multi-worker sales-api takes to become ready.
+
+Migrates a database (a throwaway SQLite file unless DATABASE_URL is set),
+starts ``uvicorn --workers N`` and reports the wall time until every worker
+has finished its startup hook and until ``/health/ready`` first answers
+200, plus the per-process ``startup_seconds`` the workers measured
+themselves (process start to end of startup).
+
+    python benchmarks/cold_start.py [--workers 16] [--port 8099]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+STARTUP_COMPLETE = "Application startup complete."
+
+def readiness(url: str) -> Optional[dict]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "cold_start.db")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    workers_done: List[float] = []
+    all_started = threading.Event()
+
+    def watch() -> None:
+        assert server.stderr is not None
+        for line in server.stderr:
+            if STARTUP_COMPLETE in line:
+                workers_done.append(time.perf_counter() - started)
+                if len(workers_done) == args.workers:
+                    all_started.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    url = f"http://127.0.0.1:{args.port}/health/ready"
+    first_ready: Optional[float] = None
+    startup_seconds = set()
+    try:
+        deadline = started + args.timeout
+        while time.perf_counter() < deadline and (first_ready is None or not all_started.is_set()):
+            payload = readiness(url)
+            if payload is not None and payload.get("ready"):
+                first_ready = first_ready or time.perf_counter() - started
+                startup_seconds.add(payload["startup_seconds"])
+            time.sleep(0.01)
+        # Sample more workers' own measurements now that they are all up.
+        for _ in range(args.workers * 4):
+            payload = readiness(url)
+            if payload is not None and payload.get("startup_seconds") is not None:
+                startup_seconds.add(payload["startup_seconds"])
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"workers: {args.workers}")
+    print(f"first ready:       {first_ready:.3f}s" if first_ready is not None else "first ready:       never")
+    if workers_done:
+        print(f"all workers ready: {workers_done[-1]:.3f}s ({len(workers_done)}/{args.workers})")
+    if startup_seconds:
+        measured = sorted(startup_seconds)
+        print(f"per-process startup_seconds (sampled {len(measured)}): min {measured[0]:.3f}s max {measured[-1]:.3f}s")
+
+if __name__ == "__main__":
+    main()
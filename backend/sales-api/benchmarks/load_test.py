@@ -0,0 +1,406 @@
+"""HTTP load test and latency-regression check for the sales API.
+
+Seeds a reproducible dataset, starts sales-api locally (or targets --url)
+and drives a weighted mix of traffic from concurrent closed-loop clients:
+
+    browse  list a products page (sometimes the next one), open product
+            details, search the catalog
+    order   view a product, then POST an order of 1-3 items
+    report  read the sales report for a recent or random period, list
+            recent orders
+
+Per endpoint it records request count, errors, p50/p95/p99 latency of the
+successful requests (and how many there were) and throughput after a
+warm-up. ``--save-baseline`` writes them to JSON; ``--baseline`` compares
+a run against one and exits 1 when any endpoint is slower than the
+baseline by more than --tolerance (and --slack-ms), has lower throughput,
+or more errors; 2 when the run's settings differ. A percentile is only
+compared when both runs have enough samples to estimate it (100 for p99,
+20 for p95); rarely hit endpoints are gated on their lower percentiles.
+
+    # on the box that gates deploys, once
+    python benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+    # before each deploy
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json
+
+DATABASE_URL picks the database (postgresql://... or sqlite:///...); by
+default a throwaway SQLite file. Seeding the same --seed twice into one
+database reuses the earlier rows. A baseline only compares against runs
+with the same dataset, mix, concurrency and database dialect.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+WORDS = (
+    "steel", "oak", "compact", "wireless", "ergonomic", "classic", "portable", "premium", "solar", "modular",
+    "desk", "lamp", "chair", "router", "kettle", "backpack", "monitor", "speaker", "drill", "bottle",
+)
+CATEGORIES = ("office", "electronics", "kitchen", "outdoor", "tools", "furniture")
+SUPPLIERS = ("acme", "globex", "initech", "umbrella", "hooli")
+PERCENTILES = (50, 95, 99)
+DEFAULT_MIX = "browse=60,order=25,report=15"
+
+# ---------------------------------------------------------------- seeding
+
+@dataclass
+class Dataset:
+    customer_ids: List[int]
+    product_ids: List[int]
+
+async def seed(seed: int, customers: int, products: int, orders: int) -> Dataset:
+    """Insert the dataset for ``seed`` unless it is already there, then rebuild the report rollups."""
+    from sqlalchemy import select
+
+    from app import models, rollups
+    from app.database import SessionLocal, engine
+    from app.models.order import OrderStatus, PaymentStatus
+    from app.models.product import ProductStatus
+
+    prefix = f"load-{seed}-"
+    rng = random.Random(seed)
+    async with SessionLocal() as db:
+        existing = await db.scalar(select(models.Customer.id).where(models.Customer.email == f"{prefix}0@example.com"))
+        if existing is None:
+            now = datetime.now(timezone.utc)
+            db.add_all(
+                models.Customer(name=f"Load customer {i}", email=f"{prefix}{i}@example.com", phone=f"555-{i:07d}")
+                for i in range(customers)
+            )
+            db.add_all(
+                models.Product(
+                    name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                    description=" ".join(rng.choices(WORDS, k=8)),
+                    price=round(rng.uniform(2, 500), 2),
+                    cost=round(rng.uniform(1, 200), 2),
+                    # Deep enough that the order mix never runs a product dry.
+                    stock=1_000_000,
+                    category=rng.choice(CATEGORIES),
+                    supplier=rng.choice(SUPPLIERS),
+                    sku=f"{prefix}{i}",
+                    status=ProductStatus.ACTIVE,
+                )
+                for i in range(products)
+            )
+            await db.flush()
+            customer_ids = list(await db.scalars(select(models.Customer.id).where(models.Customer.email.like(f"{prefix}%"))))
+            product_rows = (await db.execute(select(models.Product.id, models.Product.price).where(models.Product.sku.like(f"{prefix}%")))).all()
+            statuses = list(OrderStatus)
+            for _ in range(orders):
+                items = [
+                    models.OrderItem(product_id=row.id, quantity=quantity, price=row.price, total=row.price * quantity)
+                    for row in rng.sample(product_rows, rng.randint(1, 4))
+                    for quantity in [rng.randint(1, 3)]
+                ]
+                subtotal = sum(item.total for item in items)
+                db.add(models.Order(
+                    customer_id=rng.choice(customer_ids),
+                    status=rng.choice(statuses),
+                    payment_status=PaymentStatus.PAID,
+                    subtotal=subtotal, tax=0.0, shipping=0.0, total=subtotal,
+                    created_at=now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                    items=items,
+                ))
+            await db.flush()
+            await rollups.rebuild(db)
+            await db.commit()
+        customer_ids = list(await db.scalars(select(models.Customer.id).where(models.Customer.email.like(f"{prefix}%"))))
+        product_ids = list(await db.scalars(select(models.Product.id).where(models.Product.sku.like(f"{prefix}%"))))
+    await engine.dispose()
+    return Dataset(sorted(customer_ids), sorted(product_ids))
+
+# -------------------------------------------------------------- workload
+
+Record = Callable[[str, float, int], None]
+
+@dataclass
+class Client:
+    http: httpx.AsyncClient
+    rng: random.Random
+    data: Dataset
+    record: Record
+
+    async def call(self, label: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.record(label, time.perf_counter() - started, 0)
+            raise
+        self.record(label, time.perf_counter() - started, response.status_code)
+        return response
+
+async def browse(client: Client) -> None:
+    rng = client.rng
+    page = await client.call("GET /products", "GET", "/products/", params={"limit": 20})
+    cursor = page.headers.get("x-next-cursor")
+    if cursor and rng.random() < 0.5:
+        await client.call("GET /products", "GET", "/products/", params={"limit": 20, "cursor": cursor})
+    for product_id in rng.sample(client.data.product_ids, rng.randint(1, 3)):
+        await client.call("GET /products/{id}", "GET", f"/products/{product_id}")
+    if rng.random() < 0.3:
+        await client.call("GET /products/search", "GET", "/products/search", params={"q": rng.choice(WORDS)})
+
+async def order(client: Client) -> None:
+    rng = client.rng
+    await client.call("GET /products/{id}", "GET", f"/products/{rng.choice(client.data.product_ids)}")
+    items = [{"product_id": pid, "quantity": rng.randint(1, 2)} for pid in rng.sample(client.data.product_ids, rng.randint(1, 3))]
+    await client.call("POST /orders", "POST", "/orders/", json={"customer_id": rng.choice(client.data.customer_ids), "items": items})
+
+async def report(client: Client) -> None:
+    rng = client.rng
+    if rng.random() < 0.7:
+        params: Dict[str, Any] = {"period": rng.choice(("week", "month", "quarter"))}
+    else:
+        # Arbitrary ranges mostly miss the report cache, as ad-hoc analysis would.
+        start = date.today() - timedelta(days=rng.randint(30, 365))
+        params = {"period": "custom", "start": start.isoformat(), "end": (start + timedelta(days=rng.randint(7, 90))).isoformat()}
+    await client.call("GET /reports/sales", "GET", "/reports/sales", params=params)
+    await client.call("GET /orders", "GET", "/orders/", params={"limit": 20, "customer_id": rng.choice(client.data.customer_ids)})
+
+SCENARIOS: Dict[str, Callable[[Client], Awaitable[None]]] = {"browse": browse, "order": order, "report": report}
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix: Dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"expected name=weight with name in {', '.join(SCENARIOS)}, got {part!r}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+# ---------------------------------------------------------------- stats
+
+@dataclass
+class Samples:
+    # Latencies of successful requests; failures return early or time out, either way skewing percentiles.
+    latencies: List[float] = field(default_factory=list)
+    requests: int = 0
+    errors: int = 0
+    # Status of each failed request (0 for transport errors).
+    failures: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+def percentile(ordered: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def min_samples(pct: float) -> int:
+    """Samples needed before the nearest-rank ``pct`` percentile is more than the single slowest one."""
+    return -(-100 // (100 - pct))
+
+def summarize(samples: Dict[str, Samples], seconds: float) -> Dict[str, Dict[str, Any]]:
+    summary = {}
+    for label, sample in sorted(samples.items()):
+        ordered = sorted(sample.latencies)
+        count = sample.requests
+        stats = {"requests": count, "errors": sample.errors, "error_rate": round(sample.errors / count, 4) if count else 0.0,
+                 "throughput": round(count / seconds, 2), "failures": {str(k): v for k, v in sorted(sample.failures.items())},
+                 "samples": len(ordered)}
+        for pct in PERCENTILES:
+            stats[f"p{pct}_ms"] = round(percentile(ordered, pct) * 1000, 2) if ordered else 0.0
+        summary[label] = stats
+    return summary
+
+async def drive(url: str, data: Dataset, mix: Dict[str, int], concurrency: int, warmup: float, duration: float, seed: int) -> Dict[str, Any]:
+    samples: Dict[str, Samples] = defaultdict(Samples)
+    measuring = False
+
+    def record(label: str, seconds: float, status: int) -> None:
+        if not measuring:
+            return
+        sample = samples[label]
+        sample.requests += 1
+        # Redirects count too: the mix should never hit one.
+        if not 200 <= status < 300:
+            sample.errors += 1
+            sample.failures[status] += 1
+        else:
+            sample.latencies.append(seconds)
+
+    names, weights = list(mix), list(mix.values())
+    # Expire idle connections before uvicorn's 5 s keep-alive timeout closes them under us.
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency, keepalive_expiry=4.0)
+    async with httpx.AsyncClient(base_url=url + "/api/v1", limits=limits, timeout=30.0) as http:
+        stop_at = 0.0
+
+        async def user(index: int) -> None:
+            client = Client(http, random.Random(seed * 1000 + index), data, record)
+            while time.perf_counter() < stop_at:
+                try:
+                    await SCENARIOS[client.rng.choices(names, weights)[0]](client)
+                except httpx.HTTPError:
+                    pass  # already counted as an error
+
+        stop_at = time.perf_counter() + warmup + duration
+        users = [asyncio.create_task(user(i)) for i in range(concurrency)]
+        await asyncio.sleep(warmup)
+        measuring = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*users)
+        measuring = False
+        elapsed = time.perf_counter() - measured_from
+    endpoints = summarize(samples, elapsed)
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {"seconds": round(elapsed, 2), "throughput": round(total / elapsed, 2), "endpoints": endpoints}
+
+# ----------------------------------------------------------- comparison
+
+def gated_percentiles(base: Dict[str, Any], now: Dict[str, Any]) -> List[int]:
+    """The percentiles both runs of an endpoint have enough samples for."""
+    # Baselines saved before samples were recorded counted every request.
+    samples = min(base.get("samples", base["requests"]), now["samples"])
+    return [pct for pct in PERCENTILES if samples >= min_samples(pct)]
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float, slack_ms: float) -> List[str]:
+    """Describe every way ``current`` is worse than ``baseline``; empty when it is not."""
+    problems = []
+    for label, base in baseline["endpoints"].items():
+        now = current["endpoints"].get(label)
+        if now is None:
+            problems.append(f"{label}: no requests in this run")
+            continue
+        for pct in gated_percentiles(base, now):
+            key = f"p{pct}_ms"
+            limit = base[key] * (1 + tolerance) + slack_ms
+            if now[key] > limit:
+                problems.append(f"{label}: {key} {now[key]:.2f} > {limit:.2f} (baseline {base[key]:.2f})")
+        floor = base["throughput"] * (1 - tolerance)
+        if now["throughput"] < floor:
+            problems.append(f"{label}: throughput {now['throughput']:.2f}/s < {floor:.2f}/s (baseline {base['throughput']:.2f}/s)")
+        if now["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{label}: error rate {now['error_rate']:.2%} (baseline {base['error_rate']:.2%})")
+    return problems
+
+def print_table(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"{'endpoint':<22} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in result["endpoints"].items():
+        line = (f"{label:<22} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput']:>8.1f} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+        if stats["failures"]:
+            line += "   failed: " + ", ".join(f"{count}x {status}" for status, count in stats["failures"].items())
+        base = baseline["endpoints"].get(label) if baseline else None
+        if base and base["p95_ms"]:
+            line += f"   p95 {stats['p95_ms'] / base['p95_ms'] - 1:+.0%} vs baseline"
+        print(line)
+    print(f"total: {result['throughput']:.1f} req/s over {result['seconds']:.1f}s")
+
+# ---------------------------------------------------------------- server
+
+def start_server(env: Dict[str, str], port: int, workers: int, log_path: str) -> subprocess.Popen:
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--no-access-log"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"sales-api exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("sales-api did not become ready within 60s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target an already running sales-api instead of starting one (seeding still uses DATABASE_URL)")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server")
+    parser.add_argument("--server-log", default=os.path.join(tempfile.gettempdir(), "sales-api-load-test.log"))
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="absolute latency slack added to the tolerance")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "load_test.db")
+    config = {
+        "customers": args.customers, "products": args.products, "orders": args.orders, "seed": args.seed,
+        "mix": args.mix, "concurrency": args.concurrency, "workers": args.workers,
+        "database": os.environ["DATABASE_URL"].partition(":")[0].partition("+")[0],
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = {key: (baseline["config"].get(key), value) for key, value in config.items() if baseline["config"].get(key) != value}
+        if mismatched:
+            print(f"run settings differ from the baseline's (baseline, this run): {mismatched}", file=sys.stderr)
+            raise SystemExit(2)
+
+    env = dict(os.environ)
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    seeded = time.perf_counter()
+    data = asyncio.run(seed(args.seed, args.customers, args.products, args.orders))
+    print(f"dataset ready in {time.perf_counter() - seeded:.1f}s: "
+          f"{len(data.customer_ids)} customers, {len(data.product_ids)} products, {args.orders} orders")
+
+    server = None if args.url else start_server(env, args.port, args.workers, args.server_log)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        result = asyncio.run(drive(url, data, args.mix, args.concurrency, args.warmup, args.duration, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    result = {
+        "config": config,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"host": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        **result,
+    }
+    print_table(result, baseline)
+    if server is not None and any(stats["errors"] for stats in result["endpoints"].values()):
+        print(f"server log: {args.server_log}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.save_baseline}")
+    if baseline is not None:
+        for label, base in baseline["endpoints"].items():
+            now = result["endpoints"].get(label)
+            skipped = [f"p{pct}" for pct in PERCENTILES if now and pct not in gated_percentiles(base, now)]
+            if skipped:
+                print(f"{label}: too few samples to compare {'/'.join(skipped)}")
+        problems = compare(baseline, result, args.tolerance, args.slack_ms)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            raise SystemExit(1)
+        print(f"no regression beyond {args.tolerance:.0%} of the baseline")
+
+if __name__ == "__main__":
+    main()
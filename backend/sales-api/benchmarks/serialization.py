@@ -0,0 +1,118 @@
+"""Compare the response_model path with the orjson fast path on list pages.
+
+Seeds a throwaway SQLite database, then times one page of customers,
+products and orders (with items) both ways: fetching ORM entities and
+running them through FastAPI's own ``serialize_response`` + JSONResponse,
+versus selecting the schema columns and encoding with app.serialization.
+Both timings include the query. Some seeded rows leave nullable columns
+empty, so the byte comparison (and response_model validation, which
+raises on a schema mismatch) covers NULLs too.
+
+    python benchmarks/serialization.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.serialization import dumps, rows_to_dicts, schema_columns  # noqa: E402
+
+def seed(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        customers = [models.Customer(name=f"Customer {i}", email=f"c{i}@example.com",
+                                     phone=None if i % 10 == 0 else "555-0100",
+                                     address=f"{i} Main Street") for i in range(rows)]
+        # Imported products may have no category or description.
+        products = [models.Product(name=f"Product {i}",
+                                   description=None if i % 10 == 0 else "A product used for benchmarking",
+                                   price=9.99, cost=4.5, stock=100, category=None if i % 10 == 0 else "bench",
+                                   supplier="acme", sku=f"SKU-{i}")
+                    for i in range(rows)]
+        db.add_all(customers + products)
+        db.flush()
+        for i in range(rows):
+            items = [models.OrderItem(product_id=products[(i + n) % rows].id, quantity=2, price=9.99, total=19.98)
+                     for n in range(3)]
+            db.add(models.Order(customer_id=customers[i].id, subtotal=59.94, tax=4.8, shipping=5.0, total=69.74,
+                                items=items))
+        db.commit()
+    engine.dispose()
+
+async def response_model_path(db: AsyncSession, model: Any, schema: Any, limit: int) -> bytes:
+    stmt = select(model).order_by(model.id).limit(limit)
+    if model is models.Order:
+        stmt = stmt.options(selectinload(models.Order.items))
+    objs = (await db.scalars(stmt)).all()
+    field = create_response_field(name="response", type_=List[schema])
+    content = await serialize_response(field=field, response_content=objs, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def fast_path(db: AsyncSession, model: Any, schema: Any, limit: int) -> bytes:
+    stmt = select(*schema_columns(model, schema)).order_by(model.id).limit(limit)
+    rows = rows_to_dicts((await db.execute(stmt)).all())
+    if model is models.Order:
+        items_by_order: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        items = await db.execute(
+            select(*schema_columns(models.OrderItem, schemas.OrderItem))
+            .where(models.OrderItem.order_id.in_([row["id"] for row in rows]))
+            .order_by(models.OrderItem.id)
+        )
+        for item in rows_to_dicts(items.all()):
+            items_by_order[item["order_id"]].append(item)
+        for row in rows:
+            row["items"] = items_by_order[row["id"]]
+    return dumps(rows)
+
+async def timed(sessions: Any, path: Callable[..., Awaitable[bytes]], repeat: int, *args: Any) -> float:
+    async with sessions() as db:
+        await path(db, *args)  # warm up statement caches
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await path(db, *args)
+            db.expunge_all()
+        return (time.perf_counter() - started) / repeat
+
+async def main(rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, rows)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        print(f"{'endpoint':<10} {'response_model':>15} {'fast path':>10} {'speedup':>8}")
+        for name, model, schema in (
+            ("customers", models.Customer, schemas.Customer),
+            ("products", models.Product, schemas.Product),
+            ("orders", models.Order, schemas.Order),
+        ):
+            async with sessions() as db:
+                expected = await response_model_path(db, model, schema, rows)
+                assert await fast_path(db, model, schema, rows) == expected, f"{name}: outputs differ"
+            slow = await timed(sessions, response_model_path, repeat, model, schema, rows)
+            fast = await timed(sessions, fast_path, repeat, model, schema, rows)
+            print(f"{name:<10} {slow * 1000:>12.2f} ms {fast * 1000:>7.2f} ms {slow / fast:>7.1f}x")
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=200, help="timed iterations per path")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
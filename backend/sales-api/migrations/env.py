@@ -0,0 +1,58 @@
+"""Alembic environment for the sales-api schema.
+
+Runs against DATABASE_URL through the same async driver mapping as the
+application, so ``alembic upgrade head`` works with any URL the app accepts.
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import DATABASE_URL, Base, async_database_url
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+# Product search objects are raw DDL, not metadata (see app.models.product);
+# keep autogenerate from proposing to drop them.
+UNMANAGED = ("products_fts", "ix_products_search", "ix_products_name_trgm")
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (name or "").startswith(UNMANAGED)
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=async_database_url(DATABASE_URL),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection: Connection) -> None:
+    # Batch mode lets ALTER-style operations run on SQLite by copying the table.
+    context.configure(
+        connection=connection, target_metadata=target_metadata, render_as_batch=True, include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(async_database_url(DATABASE_URL), poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
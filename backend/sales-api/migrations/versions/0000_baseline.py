@@ -0,0 +1,92 @@
+"""baseline
+
+The schema as ``Base.metadata.create_all`` built it at application startup
+before migrations existed: customers, products, orders and order items.
+Databases created that way already match it; record that with
+``alembic stamp 0000`` and then ``alembic upgrade head``.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17 10:04:12.552903
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ENUMS = ("orderstatus", "paymentstatus", "productstatus")
+
+
+def upgrade() -> None:
+    op.create_table('customers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_customers_email', 'customers', ['email'], unique=True)
+    op.create_index('ix_customers_id', 'customers', ['id'], unique=False)
+    op.create_index('ix_customers_name', 'customers', ['name'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('supplier', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'INACTIVE', 'DISCONTINUED', name='productstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_id', 'products', ['id'], unique=False)
+    op.create_index('ix_products_name', 'products', ['name'], unique=False)
+
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'SHIPPED', 'DELIVERED', 'CANCELLED', name='orderstatus'), nullable=True),
+    sa.Column('payment_status', sa.Enum('PENDING', 'PAID', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=True),
+    sa.Column('subtotal', sa.Float(), nullable=True),
+    sa.Column('tax', sa.Float(), nullable=True),
+    sa.Column('shipping', sa.Float(), nullable=True),
+    sa.Column('total', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_id', 'orders', ['id'], unique=False)
+
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('total', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_items_id', 'order_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ("order_items", "orders", "products", "customers"):
+        op.drop_table(table)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for name in ENUMS:
+            sa.Enum(name=name).drop(bind, checkfirst=True)
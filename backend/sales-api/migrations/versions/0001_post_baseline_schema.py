@@ -0,0 +1,204 @@
+"""post-baseline schema
+
+Everything added on top of the baseline tables before migrations existed:
+product reorder points, SKUs and versions, the order listing indexes,
+idempotency keys, notifications, stock events, report jobs, the sales
+rollups, and the product search indexes (Postgres) or FTS5 table and
+triggers (SQLite). The rollups and the search index are filled from the
+rows already present, so an upgraded baseline database serves the same
+reports and search results as a fresh one.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-16 22:33:54.189490
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(supplier, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (({SEARCH_DOCUMENT}))",
+        "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, description, category, supplier, content='products', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, description, category, supplier) "
+        "VALUES (new.id, new.name, new.description, new.category, new.supplier); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description, category, supplier) "
+        "VALUES ('delete', old.id, old.name, old.description, old.category, old.supplier); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_update "
+        "AFTER UPDATE OF name, description, category, supplier ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description, category, supplier) "
+        "VALUES ('delete', old.id, old.name, old.description, old.category, old.supplier); "
+        "INSERT INTO products_fts(rowid, name, description, category, supplier) "
+        "VALUES (new.id, new.name, new.description, new.category, new.supplier); END",
+        # Index the products that predate the table.
+        "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+    ],
+}
+SEARCH_DROP = {
+    "postgresql": ["DROP INDEX IF EXISTS ix_products_search", "DROP INDEX IF EXISTS ix_products_name_trgm"],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS products_fts_insert",
+        "DROP TRIGGER IF EXISTS products_fts_delete",
+        "DROP TRIGGER IF EXISTS products_fts_update",
+        "DROP TABLE IF EXISTS products_fts",
+    ],
+}
+# Frozen copy of app.rollups.rebuild: days are UTC dates, enum columns store member names.
+ORDER_DAY = {"postgresql": "(o.created_at AT TIME ZONE 'UTC')::date", "sqlite": "date(o.created_at)"}
+ROLLUP_BACKFILL = [
+    """
+    INSERT INTO sales_daily (day, order_count, revenue)
+    SELECT {day}, count(o.id), coalesce(sum(o.total), 0.0)
+    FROM orders o
+    WHERE o.status != 'CANCELLED'
+    GROUP BY 1
+    """,
+    """
+    INSERT INTO sales_daily_products (day, product_id, quantity, revenue)
+    SELECT {day}, oi.product_id, coalesce(sum(oi.quantity), 0), coalesce(sum(oi.total), 0.0)
+    FROM order_items oi JOIN orders o ON o.id = oi.order_id
+    WHERE o.status != 'CANCELLED' AND oi.product_id IS NOT NULL
+    GROUP BY 1, 2
+    """,
+]
+ENUMS = ("stockeventkind", "reportjobstatus", "notificationtype")
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('headers', sa.Text(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'], unique=False)
+
+    op.create_table('notification_counters',
+    sa.Column('customer_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('received', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('read', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('read_through', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+
+    op.create_table('notification_reads',
+    sa.Column('customer_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('notification_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('customer_id', 'notification_id')
+    )
+
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.add_column(sa.Column('reorder_point', sa.Integer(), server_default='10', nullable=False))
+        batch_op.add_column(sa.Column('sku', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_unique_constraint('uq_products_supplier_sku', ['supplier', 'sku'])
+    op.create_index('ix_products_low_stock', 'products', ['id'], unique=False, postgresql_where=sa.text('stock <= reorder_point'), sqlite_where=sa.text('stock <= reorder_point'))
+    op.create_index('ix_products_stock_id', 'products', ['stock', 'id'], unique=False)
+
+    op.create_table('report_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('report_type', sa.String(), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('params_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'DONE', 'FAILED', name='reportjobstatus'), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_jobs_params_hash', 'report_jobs', ['params_hash'], unique=False)
+
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    op.create_table('sales_daily_products',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+
+    op.create_table('stock_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.Enum('LOW', 'RESTOCKED', name='stockeventkind'), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('reorder_point', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_events_product_id', 'stock_events', ['product_id'], unique=False)
+
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('type', sa.Enum('INFO', 'SUCCESS', 'WARNING', 'ERROR', name='notificationtype'), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_customer_id_id', 'notifications', ['customer_id', 'id'], unique=False)
+
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_customer_id_id', 'orders', ['customer_id', 'id'], unique=False)
+    op.create_index('ix_orders_status_id', 'orders', ['status', 'id'], unique=False)
+
+    bind = op.get_bind()
+    for statement in ROLLUP_BACKFILL:
+        op.execute(statement.format(day=ORDER_DAY[bind.dialect.name]))
+    for statement in SEARCH_DDL.get(bind.dialect.name, ()):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for statement in SEARCH_DROP.get(bind.dialect.name, ()):
+        op.execute(statement)
+    op.drop_index('ix_orders_status_id', table_name='orders')
+    op.drop_index('ix_orders_customer_id_id', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    for table in (
+        "notifications", "stock_events", "sales_daily_products", "sales_daily",
+        "report_jobs", "notification_reads", "notification_counters", "idempotency_keys",
+    ):
+        op.drop_table(table)
+    op.drop_index('ix_products_stock_id', table_name='products')
+    op.drop_index('ix_products_low_stock', table_name='products')
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_constraint('uq_products_supplier_sku', type_='unique')
+        batch_op.drop_column('version')
+        batch_op.drop_column('sku')
+        batch_op.drop_column('reorder_point')
+    if bind.dialect.name == "postgresql":
+        for name in ENUMS:
+            sa.Enum(name=name).drop(bind, checkfirst=True)
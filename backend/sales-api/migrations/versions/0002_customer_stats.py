@@ -0,0 +1,47 @@
+"""customer stats
+
+Adds ``customer_stats`` (see app.customer_stats) and backfills it from
+existing orders in the same transaction, cancelled orders excluded, so
+every customer has a row once the upgrade finishes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 22:58:24.570568
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.customer_stats.rebuild; enum columns store member names.
+BACKFILL = """
+INSERT INTO customer_stats (customer_id, order_count, total_spent, first_order_at, last_order_at)
+SELECT c.id, count(o.id), coalesce(sum(o.total), 0.0), min(o.created_at), max(o.created_at)
+FROM customers c
+LEFT JOIN orders o ON o.customer_id = c.id AND o.status != 'CANCELLED'
+GROUP BY c.id
+"""
+
+
+def upgrade() -> None:
+    op.create_table('customer_stats',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('first_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.execute(BACKFILL)
+    # Built after the backfill: one sort per index instead of a row-by-row insert.
+    op.create_index('ix_customer_stats_order_count', 'customer_stats', ['order_count', 'customer_id'], unique=False)
+    op.create_index('ix_customer_stats_total_spent', 'customer_stats', ['total_spent', 'customer_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('customer_stats')
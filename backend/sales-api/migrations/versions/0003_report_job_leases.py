@@ -0,0 +1,68 @@
+"""report job leases and chunked results
+
+Running report jobs now hold a lease (``lease`` token plus ``heartbeat_at``)
+so a job orphaned by a dead process is picked up again, and results are
+stored as ``report_job_chunks`` rows instead of one ``result`` blob (see
+app.jobs). Stored results are split into chunks; jobs left RUNNING have no
+heartbeat to expire, so they are queued again.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:12:40.318207
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.jobs.CHUNK_ROWS.
+CHUNK_ROWS = 1000
+
+jobs = sa.table('report_jobs', sa.column('id', sa.String), sa.column('result', sa.Text))
+chunks = sa.table('report_job_chunks', sa.column('job_id', sa.String), sa.column('seq', sa.Integer), sa.column('rows', sa.Text))
+
+
+def upgrade() -> None:
+    op.create_table('report_job_chunks',
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('rows', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['report_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'seq')
+    )
+    bind = op.get_bind()
+    for job_id, result in bind.execute(sa.select(jobs.c.id, jobs.c.result).where(jobs.c.result.is_not(None))).all():
+        rows = json.loads(result)["rows"]
+        parts = [
+            {"job_id": job_id, "seq": seq, "rows": ",".join(json.dumps(row) for row in rows[start:start + CHUNK_ROWS])}
+            for seq, start in enumerate(range(0, len(rows), CHUNK_ROWS))
+        ]
+        if parts:
+            bind.execute(chunks.insert(), parts)
+    with op.batch_alter_table('report_jobs') as batch_op:
+        batch_op.add_column(sa.Column('lease', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.drop_column('result')
+    op.execute("UPDATE report_jobs SET status = 'QUEUED' WHERE status = 'RUNNING'")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('report_jobs') as batch_op:
+        batch_op.add_column(sa.Column('result', sa.Text(), nullable=True))
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('lease')
+    bind = op.get_bind()
+    done = bind.execute(sa.text("SELECT id, report_type, params FROM report_jobs WHERE status = 'DONE'")).all()
+    for job_id, report_type, params in done:
+        parts = bind.execute(
+            sa.select(chunks.c.rows).where(chunks.c.job_id == job_id).order_by(chunks.c.seq)
+        ).scalars().all()
+        result = '{"report_type": %s, "params": %s, "rows": [%s]}' % (json.dumps(report_type), params, ",".join(parts))
+        bind.execute(jobs.update().where(jobs.c.id == job_id).values(result=result))
+    op.drop_table('report_job_chunks')
@@ -0,0 +1,29 @@
+"""stock event kind for deleted products
+
+Adds ``removed`` to the stock event kinds: deleting a product that is on
+the low-stock watchlist now appends an exit to the feed (see app.stock).
+SQLite stores the kind as plain text, so only Postgres needs a change.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:26:05.904113
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # A new enum value cannot be used in the transaction that adds it.
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE stockeventkind ADD VALUE IF NOT EXISTS 'REMOVED'")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop an enum value; map the events onto the closest remaining kind.
+    op.execute("UPDATE stock_events SET kind = 'RESTOCKED' WHERE kind = 'REMOVED'")
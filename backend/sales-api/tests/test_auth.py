@@ -0,0 +1,36 @@
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def login(email):
+    r = requests.post(f"{BASE}/auth/login", data={"username": email, "password": "x"})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_current_user_reflects_updates_and_deletes():
+    email = f"auth.{uuid.uuid4().hex[:8]}@example.com"
+    r = requests.post(f"{BASE}/auth/register", json={"name": "auth user", "email": email})
+    assert r.status_code == 200
+    customer_id = r.json()["id"]
+    headers = login(email)
+
+    # second call is served from the token cache
+    for _ in range(2):
+        r = requests.get(f"{BASE}/auth/me", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["name"] == "auth user"
+
+    requests.put(f"{BASE}/customers/{customer_id}", json={"name": "renamed"})
+    assert requests.get(f"{BASE}/auth/me", headers=headers).json()["name"] == "renamed"
+
+    requests.delete(f"{BASE}/customers/{customer_id}")
+    assert requests.get(f"{BASE}/auth/me", headers=headers).status_code == 401
+
+
+def test_current_user_rejects_bad_token():
+    r = requests.get(f"{BASE}/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    assert r.status_code == 401
@@ -0,0 +1,102 @@
+import os
+import uuid
+import pytest
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_customer():
+    cust = {"name": "stats user", "email": f"stats.{uuid.uuid4().hex[:8]}@example.com"}
+    r = requests.post(f"{BASE}/customers", json=cust)
+    assert r.status_code in (200, 201)
+    return r.json()["id"]
+
+
+def make_product(price):
+    product = {"name": "stats product", "description": "d", "price": price, "cost": 1.0, "stock": 100, "category": "t", "supplier": "s", "status": "active"}
+    return requests.post(f"{BASE}/products", json=product).json()["id"]
+
+
+def place_order(customer_id, product_id, quantity):
+    r = requests.post(f"{BASE}/orders", json={"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": quantity}]})
+    assert r.status_code in (200, 201)
+    return r.json()
+
+
+def stats(customer_id):
+    r = requests.get(f"{BASE}/customers/{customer_id}")
+    assert r.status_code == 200
+    return r.json()["stats"]
+
+
+def test_customer_stats_follow_order_writes():
+    customer_id = make_customer()
+    assert stats(customer_id) == {"order_count": 0, "total_spent": 0.0, "first_order_at": None, "last_order_at": None, "rfm_segment": None}
+
+    product_id = make_product(10.0)
+    first = place_order(customer_id, product_id, 1)
+    second = place_order(customer_id, product_id, 3)
+    current = stats(customer_id)
+    assert current["order_count"] == 2
+    assert current["total_spent"] == pytest.approx(40.0)
+    assert current["first_order_at"] == first["created_at"]
+    assert current["last_order_at"] == second["created_at"]
+    assert current["rfm_segment"] == "loyal"
+
+    # cancelling the latest order moves last_order_at back to the remaining one
+    r = requests.put(f"{BASE}/orders/{second['id']}", json={"customer_id": customer_id, "status": "cancelled"})
+    assert r.status_code == 200
+    current = stats(customer_id)
+    assert (current["order_count"], current["total_spent"]) == (1, pytest.approx(10.0))
+    assert current["last_order_at"] == first["created_at"]
+    assert current["rfm_segment"] == "new"
+
+    assert requests.delete(f"{BASE}/orders/{first['id']}").status_code == 200
+    current = stats(customer_id)
+    assert (current["order_count"], current["first_order_at"], current["last_order_at"]) == (0, None, None)
+
+
+def test_customers_sorted_by_lifetime_value():
+    product_id = make_product(1000000.0)
+    small, big = make_customer(), make_customer()
+    place_order(small, product_id, 2)
+    place_order(big, product_id, 3)
+
+    seen = []
+    cursor = None
+    while len(seen) < 6:
+        params = {"sort": "total_spent", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = requests.get(f"{BASE}/customers", params=params)
+        assert r.status_code == 200
+        seen.extend((c["stats"]["total_spent"], c["id"]) for c in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == len(seen)
+    # ties (earlier runs of this test) go newest first, so this run's biggest spender leads
+    assert seen[0][1] == big
+
+    assert requests.get(f"{BASE}/customers", params={"sort": "email"}).status_code == 422
+
+
+def test_registered_customer_is_listed_by_lifetime_value():
+    email = f"stats.{uuid.uuid4().hex[:8]}@example.com"
+    r = requests.post(f"{BASE}/auth/register", json={"name": "registered", "email": email})
+    assert r.status_code == 200
+    customer_id = r.json()["id"]
+    assert stats(customer_id)["order_count"] == 0
+
+    cursor, listed = None, []
+    while True:
+        params = {"sort": "total_spent", "limit": 500, **({"cursor": cursor} if cursor else {})}
+        r = requests.get(f"{BASE}/customers", params=params)
+        assert r.status_code == 200
+        listed.extend(c["id"] for c in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if customer_id in listed or not cursor:
+            break
+    assert customer_id in listed
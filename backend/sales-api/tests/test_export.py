@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def test_export_customers_ndjson():
+    email = f"export.{uuid.uuid4().hex[:8]}@example.com"
+    assert requests.post(f"{BASE}/customers", json={"name": "export user", "email": email}).status_code in (200, 201)
+
+    r = requests.get(f"{BASE}/customers/export", params={"format": "ndjson"}, headers={"Accept-Encoding": "identity"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert any(row["email"] == email for row in rows)
+    ids = [row["id"] for row in rows]
+    assert ids == sorted(ids)
+
+
+def test_export_orders_csv_gzip():
+    cust = {"name": "export user 2", "email": f"export.{uuid.uuid4().hex[:8]}@example.com"}
+    customer_id = requests.post(f"{BASE}/customers", json=cust).json()["id"]
+    product = {"name": "export product", "description": "d", "price": 3.0, "cost": 1.0, "stock": 10, "category": "t", "supplier": "s", "status": "active"}
+    product_id = requests.post(f"{BASE}/products", json=product).json()["id"]
+    order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 2}]}
+    order_id = requests.post(f"{BASE}/orders", json=order).json()["id"]
+
+    r = requests.get(f"{BASE}/orders/export", params={"format": "csv"}, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(r.text)))  # requests transparently gunzips
+    line = next(row for row in rows if row["order_id"] == str(order_id))
+    assert line["product_id"] == str(product_id)
+    assert float(line["item_total"]) == 6.0
+
+
+def test_export_rejects_unknown_format():
+    assert requests.get(f"{BASE}/products/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,25 @@
+import os
+import requests
+
+ROOT = os.getenv("SALES_API_URL", "http://127.0.0.1:8001")
+
+
+def test_liveness_needs_nothing_but_the_process():
+    for path in ("/health", "/health/live"):
+        response = requests.get(f"{ROOT}{path}")
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+
+
+def test_readiness_reports_database_schema_and_startup_time():
+    response = requests.get(f"{ROOT}/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert body["database"] == "ok"
+    assert body["schema"] == "current"
+    assert body["revision"]
+    assert body["startup_seconds"] > 0
+
+    metrics = requests.get(f"{ROOT}/metrics").text
+    assert "app_startup_seconds " in metrics
@@ -0,0 +1,86 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_customer():
+    r = requests.post(f"{BASE}/customers", json={"name": "idem", "email": f"idem.{uuid.uuid4().hex[:8]}@example.com"})
+    return r.json()["id"]
+
+
+def make_product(stock=100):
+    product = {"name": "idem product", "price": 4.0, "cost": 1.0, "stock": stock, "category": "test", "supplier": "s"}
+    return requests.post(f"{BASE}/products", json=product).json()["id"]
+
+
+def orders_of(customer_id):
+    return requests.get(f"{BASE}/orders", params={"customer_id": customer_id}).json()
+
+
+def test_retried_order_is_replayed_not_recreated():
+    customer_id, product_id = make_customer(), make_product(stock=10)
+    order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 3}]}
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    first = requests.post(f"{BASE}/orders", json=order, headers=headers)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    retry = requests.post(f"{BASE}/orders", json=order, headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.content == first.content
+    assert retry.headers["content-type"] == first.headers["content-type"]
+
+    assert len(orders_of(customer_id)) == 1
+    assert requests.get(f"{BASE}/products/{product_id}").json()["stock"] == 7
+
+    # the key is bound to the request it was first used with
+    changed = dict(order, items=[{"product_id": product_id, "quantity": 1}])
+    assert requests.post(f"{BASE}/orders", json=changed, headers=headers).status_code == 422
+
+
+def test_concurrent_duplicates_wait_for_the_first():
+    customer_id, product_id = make_customer(), make_product()
+    order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]}
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: requests.post(f"{BASE}/orders", json=order, headers=headers), range(8)))
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.content for r in responses}) == 1
+    assert sum("Idempotent-Replayed" not in r.headers for r in responses) == 1
+    assert len(orders_of(customer_id)) == 1
+
+
+def test_client_errors_are_replayed_and_keys_are_per_endpoint():
+    key = uuid.uuid4().hex
+    order = {"customer_id": make_customer(), "items": [{"product_id": make_product(stock=1), "quantity": 5}]}
+    first = requests.post(f"{BASE}/orders", json=order, headers={"Idempotency-Key": key})
+    assert first.status_code == 409
+    retry = requests.post(f"{BASE}/orders", json=order, headers={"Idempotency-Key": key})
+    assert (retry.status_code, retry.content) == (409, first.content)
+
+    # the same key on another endpoint is a different request
+    customer = {"name": "idem", "email": f"idem.{uuid.uuid4().hex[:8]}@example.com"}
+    created = requests.post(f"{BASE}/customers", json=customer, headers={"Idempotency-Key": key})
+    assert created.status_code == 200
+    # a plain duplicate is rejected, but the retry replays the original success
+    assert requests.post(f"{BASE}/customers", json=customer).status_code == 400
+    replayed = requests.post(f"{BASE}/customers", json=customer, headers={"Idempotency-Key": key})
+    assert (replayed.status_code, replayed.content) == (200, created.content)
+
+
+def test_keys_are_scoped_to_the_caller():
+    customer_id, product_id = make_customer(), make_product()
+    order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]}
+    key = uuid.uuid4().hex
+    for _ in range(2):
+        email = f"idem.{uuid.uuid4().hex[:8]}@example.com"
+        assert requests.post(f"{BASE}/auth/register", json={"name": "idem caller", "email": email}).status_code == 200
+        token = requests.post(f"{BASE}/auth/login", data={"username": email, "password": "x"}).json()["access_token"]
+        r = requests.post(f"{BASE}/orders", json=order, headers={"Idempotency-Key": key, "Authorization": f"Bearer {token}"})
+        assert r.status_code == 200
+        assert "Idempotent-Replayed" not in r.headers
+    assert len(orders_of(customer_id)) == 2
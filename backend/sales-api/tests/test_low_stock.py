@@ -0,0 +1,79 @@
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_product(stock, reorder_point):
+    product = {"name": f"watch {uuid.uuid4().hex[:6]}", "price": 2.0, "cost": 1.0, "stock": stock,
+               "reorder_point": reorder_point, "category": "test", "supplier": "s"}
+    r = requests.post(f"{BASE}/products", json=product)
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def drain(url, cursor=None, **params):
+    """Follow X-Next-Cursor until a page comes back short; return (rows, last cursor)."""
+    rows = []
+    while True:
+        r = requests.get(url, params={"limit": 50, **params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        rows.extend(r.json())
+        next_cursor = r.headers.get("X-Next-Cursor")
+        if not next_cursor or len(r.json()) < 50:
+            return rows, next_cursor
+        cursor = next_cursor
+
+
+def test_low_stock_uses_per_product_reorder_points():
+    watched = make_product(stock=4, reorder_point=5)
+    healthy = make_product(stock=4, reorder_point=2)
+
+    ids = [p["id"] for p in drain(f"{BASE}/products/low-stock/")[0]]
+    assert watched in ids
+    assert healthy not in ids
+    assert ids == sorted(ids)
+
+    # an explicit threshold still overrides every reorder point
+    ids = [p["id"] for p in drain(f"{BASE}/products/low-stock/", threshold=4)[0]]
+    assert watched in ids and healthy in ids
+
+
+def test_change_feed_follows_threshold_crossings():
+    _, cursor = drain(f"{BASE}/products/low-stock/changes")
+    product_id = make_product(stock=12, reorder_point=10)
+    r = requests.post(f"{BASE}/customers", json={"name": "feed", "email": f"feed.{uuid.uuid4().hex[:8]}@example.com"})
+    customer_id = r.json()["id"]
+
+    # 12 -> 11 stays above the reorder point; 11 -> 9 crosses it
+    for quantity in (1, 2):
+        r = requests.post(f"{BASE}/orders", json={"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": quantity}]})
+        assert r.status_code == 200
+    events, cursor = drain(f"{BASE}/products/low-stock/changes", cursor)
+    mine = [(e["kind"], e["stock"]) for e in events if e["product_id"] == product_id]
+    assert mine == [("low", 9)]
+
+    # a further decrement while already low is not a crossing
+    requests.post(f"{BASE}/orders", json={"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]})
+    requests.put(f"{BASE}/products/{product_id}", json={"stock": 40})
+    events, cursor = drain(f"{BASE}/products/low-stock/changes", cursor)
+    assert [(e["kind"], e["stock"]) for e in events if e["product_id"] == product_id] == [("restocked", 40)]
+
+    # caught up: empty page, cursor echoed back
+    r = requests.get(f"{BASE}/products/low-stock/changes", params={"cursor": cursor})
+    assert r.json() == []
+    assert r.headers["X-Next-Cursor"] == cursor
+
+
+def test_deleting_a_watched_product_leaves_the_feed():
+    _, cursor = drain(f"{BASE}/products/low-stock/changes")
+    watched = make_product(stock=1, reorder_point=5)
+    healthy = make_product(stock=50, reorder_point=5)
+    for product_id in (watched, healthy):
+        assert requests.delete(f"{BASE}/products/{product_id}").status_code == 200
+
+    events, _ = drain(f"{BASE}/products/low-stock/changes", cursor)
+    assert [(e["product_id"], e["kind"]) for e in events if e["product_id"] in (watched, healthy)] == [
+        (watched, "low"), (watched, "removed"),
+    ]
@@ -0,0 +1,66 @@
+import os
+import uuid
+from datetime import date, timedelta
+
+import requests
+
+ROOT = os.getenv("SALES_API_URL", "http://127.0.0.1:8001")
+BASE = ROOT + "/api/v1"
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{{wanted}}} "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_are_labelled_by_route_template():
+    before = requests.get(f"{ROOT}/metrics").text
+    assert requests.get(f"{BASE}/customers/999999").status_code == 404
+    assert requests.get(f"{BASE}/customers/999998").status_code == 404
+    after = requests.get(f"{ROOT}/metrics").text
+
+    labels = {"method": "GET", "route": "/api/v1/customers/{customer_id}", "status": "4xx"}
+    assert sample(after, "http_requests_total", **labels) - sample(before, "http_requests_total", **labels) == 2
+    # raw paths never become labels
+    assert "/api/v1/customers/999999" not in after
+
+    route = {"method": "GET", "route": "/api/v1/customers/{customer_id}"}
+    assert sample(after, "http_request_duration_seconds_count", **route) >= 2
+    assert sample(after, "http_request_db_queries_sum", **route) - sample(before, "http_request_db_queries_sum", **route) >= 2
+    assert "http_requests_in_progress" in after
+
+
+def test_unmatched_paths_share_one_label():
+    requests.get(f"{ROOT}/no/such/path/{os.getpid()}")
+    text = requests.get(f"{ROOT}/metrics").text
+    assert 'route="<unmatched>"' in text
+    assert f"/no/such/path/{os.getpid()}" not in text
+
+
+def test_report_cache_is_exported():
+    def unlabelled(text, name):
+        for line in text.splitlines():
+            if line.startswith(f"{name} "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    before = requests.get(f"{ROOT}/metrics").text
+    # A past range no other run asks for, so the first request is a miss.
+    day = date(2000, 1, 1) + timedelta(days=uuid.uuid4().int % 5000)
+    params = {"period": "custom", "start": day.isoformat(), "end": day.isoformat()}
+    assert requests.get(f"{BASE}/reports/sales", params=params).status_code == 200
+    assert requests.get(f"{BASE}/reports/sales", params=params).status_code == 200
+    after = requests.get(f"{ROOT}/metrics").text
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("report_cache_lookups_total", result="miss") >= 1
+    assert delta("report_cache_lookups_total", result="hit") + delta("report_cache_lookups_total", result="stale") >= 1
+    recomputes = unlabelled(after, "report_cache_recomputes_total") - unlabelled(before, "report_cache_recomputes_total")
+    assert recomputes >= 1
+    assert unlabelled(after, "report_cache_recompute_seconds_count") - unlabelled(before, "report_cache_recompute_seconds_count") == recomputes
+    assert 'report_cache_recompute_seconds_bucket{le="+Inf"}' in after
@@ -0,0 +1,131 @@
+import json
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def register_and_login():
+    email = f"notify.{uuid.uuid4().hex[:8]}@example.com"
+    customer_id = requests.post(f"{BASE}/auth/register", json={"name": "notify", "email": email}).json()["id"]
+    r = requests.post(f"{BASE}/auth/login", data={"username": email, "password": "x"})
+    return customer_id, r.json()["access_token"]
+
+
+def place_order(customer_id, stock=20, reorder_point=5, quantity=1):
+    product = {"name": "notify product", "price": 2.0, "cost": 1.0, "stock": stock, "reorder_point": reorder_point,
+               "category": "test", "supplier": "s"}
+    product_id = requests.post(f"{BASE}/products", json=product).json()["id"]
+    r = requests.post(f"{BASE}/orders", json={"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": quantity}]})
+    assert r.status_code == 200
+    return r.json()["id"], product_id
+
+
+def read_events(response, count):
+    """Parse SSE frames from a streaming response until ``count`` notifications arrived."""
+    events, frame = [], {}
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("retry:") or line.startswith(":"):
+            continue
+        if line:
+            field, _, value = line.partition(": ")
+            frame[field] = value
+            continue
+        if frame.get("event") == "notification":
+            events.append((int(frame["id"]), json.loads(frame["data"])))
+            if len(events) == count:
+                return events
+        frame = {}
+    return events
+
+
+def newest_id(token):
+    r = requests.get(f"{BASE}/notifications", params={"limit": 1}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    return r.json()[0]["id"] if r.json() else 0
+
+
+def test_notifications_require_auth():
+    assert requests.get(f"{BASE}/notifications").status_code == 401
+    assert requests.get(f"{BASE}/notifications/stream").status_code == 401
+
+
+def test_order_and_low_stock_are_pushed_live():
+    customer_id, token = register_and_login()
+    after = newest_id(token)
+    with requests.get(f"{BASE}/notifications/stream", params={"access_token": token, "after": after},
+                      stream=True, timeout=10) as stream:
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        # 6 -> 4 crosses the reorder point of 5: one order notification, one broadcast low-stock warning
+        order_id, product_id = place_order(customer_id, stock=6, reorder_point=5, quantity=2)
+        events = read_events(stream, 2)
+    by_title = {data["title"]: data for _, data in events}
+    assert f"#{order_id}" in by_title["Order received"]["message"]
+    assert by_title["Order received"]["customer_id"] == customer_id
+    assert f"#{product_id}" in by_title["Low stock"]["message"]
+    assert by_title["Low stock"]["customer_id"] is None
+
+    # the same notifications are persisted, newest first
+    listed = requests.get(f"{BASE}/notifications", headers={"Authorization": f"Bearer {token}"}).json()
+    assert {n["id"] for n in listed} >= {event_id for event_id, _ in events}
+    assert [n["id"] for n in listed] == sorted((n["id"] for n in listed), reverse=True)
+
+
+def test_stream_resumes_from_last_event_id():
+    customer_id, token = register_and_login()
+    after = newest_id(token)
+    order_id, _ = place_order(customer_id)
+    headers = {"Authorization": f"Bearer {token}", "Last-Event-ID": str(after)}
+    with requests.get(f"{BASE}/notifications/stream", headers=headers, stream=True, timeout=10) as stream:
+        events = read_events(stream, 1)
+    assert events[0][0] > after
+    assert f"#{order_id}" in events[0][1]["message"]
+
+
+def test_other_users_orders_are_not_listed():
+    customer_id, token = register_and_login()
+    other_id, other_token = register_and_login()
+    after = newest_id(token)
+    place_order(other_id)
+    mine = requests.get(f"{BASE}/notifications", headers={"Authorization": f"Bearer {token}"}).json()
+    assert {n["customer_id"] for n in mine if n["id"] > after} <= {None, customer_id}
+
+
+def unread(headers):
+    r = requests.get(f"{BASE}/notifications/unread-count", headers=headers)
+    assert r.status_code == 200
+    return r.json()["unread"]
+
+
+def test_read_marks_and_unread_counter():
+    customer_id, token = register_and_login()
+    headers = {"Authorization": f"Bearer {token}"}
+    requests.put(f"{BASE}/notifications/read-all", headers=headers)
+    assert unread(headers) == 0
+    assert all(n["read"] for n in requests.get(f"{BASE}/notifications", headers=headers).json())
+
+    place_order(customer_id)
+    place_order(customer_id)
+    assert unread(headers) == 2
+    newest = requests.get(f"{BASE}/notifications", params={"limit": 2}, headers=headers).json()
+    assert [n["read"] for n in newest] == [False, False]
+
+    # marking one is counted once, however often it is repeated
+    for _ in range(2):
+        assert requests.put(f"{BASE}/notifications/{newest[0]['id']}/read", headers=headers).status_code == 200
+    assert unread(headers) == 1
+    listed = {n["id"]: n["read"] for n in requests.get(f"{BASE}/notifications", params={"limit": 2}, headers=headers).json()}
+    assert listed == {newest[0]["id"]: True, newest[1]["id"]: False}
+
+    assert requests.put(f"{BASE}/notifications/read-all", headers=headers).status_code == 200
+    assert unread(headers) == 0
+    assert all(n["read"] for n in requests.get(f"{BASE}/notifications", headers=headers).json())
+
+    # another user's notification is neither visible nor markable
+    other_id, other_token = register_and_login()
+    place_order(other_id)
+    theirs = requests.get(f"{BASE}/notifications", params={"limit": 1},
+                          headers={"Authorization": f"Bearer {other_token}"}).json()[0]
+    assert theirs["customer_id"] == other_id
+    assert requests.put(f"{BASE}/notifications/{theirs['id']}/read", headers=headers).status_code == 404
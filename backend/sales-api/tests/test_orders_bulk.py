@@ -0,0 +1,80 @@
+import os
+import uuid
+import pytest
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_customer():
+    cust = {"name": "bulk user", "email": f"bulk.{uuid.uuid4().hex[:8]}@example.com"}
+    r = requests.post(f"{BASE}/customers", json=cust)
+    assert r.status_code in (200, 201)
+    return r.json()["id"]
+
+
+def make_product(price, stock=100):
+    product = {"name": "bulk product", "description": "d", "price": price, "cost": 1.0, "stock": stock, "category": "t", "supplier": "s", "status": "active"}
+    r = requests.post(f"{BASE}/products", json=product)
+    assert r.status_code in (200, 201)
+    return r.json()["id"]
+
+
+def test_bulk_create_orders():
+    customer_id = make_customer()
+    p1 = make_product(2.0)
+    p2 = make_product(3.5)
+
+    payload = {"orders": [
+        {"customer_id": customer_id, "items": [{"product_id": p1, "quantity": 2}, {"product_id": p2, "quantity": 1}]},
+        {"customer_id": customer_id, "tax": 1.0, "items": [{"product_id": p2, "quantity": 4}]},
+    ]}
+    r = requests.post(f"{BASE}/orders/bulk", json=payload)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 2
+    assert body["failed"] == 0
+
+    first, second = body["results"]
+    assert first["index"] == 0 and second["index"] == 1
+    assert first["order"]["subtotal"] == pytest.approx(2.0 * 2 + 3.5)
+    assert len(first["order"]["items"]) == 2
+    assert second["order"]["total"] == pytest.approx(3.5 * 4 + 1.0)
+    assert second["order"]["items"][0]["order_id"] == second["order"]["id"]
+
+
+def test_bulk_create_orders_reports_per_order_errors():
+    customer_id = make_customer()
+    product_id = make_product(1.0)
+
+    payload = {"orders": [
+        {"customer_id": customer_id, "items": [{"product_id": 999999, "quantity": 1}]},
+        {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 0}]},
+        {"customer_id": 999999, "items": [{"product_id": product_id, "quantity": 1}]},
+        {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]},
+    ]}
+    r = requests.post(f"{BASE}/orders/bulk", json=payload)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 1
+    assert body["failed"] == 3
+    errors = [res["error"] for res in body["results"][:3]]
+    assert all(errors)
+    assert body["results"][3]["order"]["customer_id"] == customer_id
+
+
+def test_bulk_create_orders_insufficient_stock_fails_only_that_order():
+    customer_id = make_customer()
+    product_id = make_product(1.0, stock=3)
+
+    payload = {"orders": [
+        {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 2}]},
+        {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 2}]},
+        {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]},
+    ]}
+    r = requests.post(f"{BASE}/orders/bulk", json=payload)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 2
+    assert body["results"][1]["error"]
+    assert requests.get(f"{BASE}/products/{product_id}").json()["stock"] == 0
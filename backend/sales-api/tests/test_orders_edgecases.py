@@ -79,3 +79,26 @@ def test_delete_order():
     # delete
     r = requests.delete(f"{BASE}/orders/{order_id}")
     assert r.status_code in (200, 204)
+
+
+def test_create_order_reserves_stock():
+    cust = {"name": "edge user 4", "email": make_unique_email("edge4")}
+    r = requests.post(f"{BASE}/customers", json=cust)
+    assert r.status_code in (200, 201)
+    customer_id = r.json()["id"]
+
+    product = {"name": "edge product 3", "description": "d", "price": 4.0, "cost": 1.0, "stock": 5, "category": "t", "supplier": "s", "status": "active"}
+    r = requests.post(f"{BASE}/products", json=product)
+    assert r.status_code in (200, 201)
+    product_id = r.json()["id"]
+
+    order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 3}]}
+    r = requests.post(f"{BASE}/orders", json=order)
+    assert r.status_code in (200, 201)
+    assert r.json()["created_at"]
+    assert requests.get(f"{BASE}/products/{product_id}").json()["stock"] == 2
+
+    # not enough stock left: rejected and nothing is decremented
+    r = requests.post(f"{BASE}/orders", json=order)
+    assert r.status_code == 409
+    assert requests.get(f"{BASE}/products/{product_id}").json()["stock"] == 2
@@ -0,0 +1,79 @@
+"""In-process regression test: order reads must not issue a query per order."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.database import Base, get_db
+from app.main import app
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "orders.db"
+    seed_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(seed_engine)
+    with Session(seed_engine) as db:
+        customer = models.Customer(name="n+1", email="n+1@example.com")
+        product = models.Product(name="p", price=1.0, cost=0.5, stock=1000, category="t", supplier="s")
+        db.add_all([customer, product])
+        db.flush()
+        for _ in range(30):
+            items = [models.OrderItem(product_id=product.id, quantity=1, price=1.0, total=1.0) for _ in range(3)]
+            db.add(models.Order(customer_id=customer.id, subtotal=3.0, tax=0.0, shipping=0.0, total=3.0, items=items))
+        db.commit()
+    seed_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app), statements
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("limit", [1, 10, 25])
+def test_order_list_query_count_is_constant(client, limit):
+    http, statements = client
+    statements.clear()
+    r = http.get("/api/v1/orders/", params={"limit": limit})
+    assert r.status_code == 200
+    orders = r.json()
+    assert len(orders) == limit
+    assert all(len(o["items"]) == 3 for o in orders)
+    # one SELECT for the page of orders, one selectin load for all of their items
+    assert len(statements) == 2
+
+
+def test_order_detail_query_count(client):
+    http, statements = client
+    statements.clear()
+    r = http.get("/api/v1/orders/1")
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 3
+    assert len(statements) == 2
+
+
+@pytest.mark.parametrize("orders", [2, 40])
+def test_bulk_stock_reservation_is_one_statement(client, orders):
+    http, statements = client
+    payload = {"orders": [
+        {"customer_id": 1, "items": [{"product_id": 1, "quantity": 1}]} for _ in range(orders)
+    ]}
+    statements.clear()
+    r = http.post("/api/v1/orders/bulk", json=payload)
+    assert r.status_code == 200
+    assert r.json()["created"] == orders
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE PRODUCTS")]) == 1
@@ -0,0 +1,88 @@
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_customer():
+    cust = {"name": "page user", "email": f"page.{uuid.uuid4().hex[:8]}@example.com"}
+    r = requests.post(f"{BASE}/customers", json=cust)
+    assert r.status_code in (200, 201)
+    return r.json()["id"]
+
+
+def test_customers_cursor_pagination():
+    for _ in range(3):
+        make_customer()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = requests.get(f"{BASE}/customers", params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page) <= 2
+        seen.extend(c["id"] for c in page)
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen))
+    assert len(seen) >= 3
+
+
+def test_page_size_is_capped():
+    r = requests.get(f"{BASE}/products", params={"limit": 100000})
+    assert r.status_code == 422
+
+
+def test_invalid_cursor_rejected():
+    r = requests.get(f"{BASE}/orders", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+def test_orders_filtered_by_customer():
+    customer_id = make_customer()
+    product = {"name": "page product", "description": "d", "price": 1.0, "cost": 0.5, "stock": 10, "category": "t", "supplier": "s", "status": "active"}
+    product_id = requests.post(f"{BASE}/products", json=product).json()["id"]
+    for _ in range(3):
+        order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]}
+        assert requests.post(f"{BASE}/orders", json=order).status_code in (200, 201)
+
+    r = requests.get(f"{BASE}/orders", params={"customer_id": customer_id, "status": "pending", "limit": 2})
+    assert r.status_code == 200
+    first = r.json()
+    assert len(first) == 2
+    assert all(o["customer_id"] == customer_id for o in first)
+
+    r = requests.get(f"{BASE}/orders", params={"customer_id": customer_id, "limit": 2, "cursor": r.headers["X-Next-Cursor"]})
+    second = r.json()
+    assert len(second) == 1
+    assert second[0]["id"] > first[-1]["id"]
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_orders_filtered_by_date_page_in_created_order():
+    customer_id = make_customer()
+    product = {"name": "page product", "description": "d", "price": 1.0, "cost": 0.5, "stock": 10, "category": "t", "supplier": "s", "status": "active"}
+    product_id = requests.post(f"{BASE}/products", json=product).json()["id"]
+    created = []
+    for _ in range(3):
+        order = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]}
+        created.append(requests.post(f"{BASE}/orders", json=order).json())
+    window = {"customer_id": customer_id, "created_from": created[0]["created_at"], "limit": 2}
+
+    r = requests.get(f"{BASE}/orders", params=window)
+    assert r.status_code == 200
+    first = r.json()
+    r = requests.get(f"{BASE}/orders", params={**window, "cursor": r.headers["X-Next-Cursor"]})
+    assert r.status_code == 200
+    assert "X-Next-Cursor" not in r.headers
+    listed = first + r.json()
+    assert [o["id"] for o in listed] == [o["id"] for o in created]
+    assert [o["created_at"] for o in listed] == sorted(o["created_at"] for o in listed)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import re
+import time
+
+import requests
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.pool import InstrumentedPool, checkout_waits, connect_times
+
+ROOT = os.getenv("SALES_API_URL", "http://127.0.0.1:8001")
+BASE = ROOT + "/api/v1"
+
+
+def test_responses_report_pool_wait():
+    r = requests.get(f"{BASE}/customers", params={"limit": 1})
+    assert r.status_code == 200
+    assert re.fullmatch(r"db-pool;dur=\d+\.\d{2}", r.headers["Server-Timing"])
+
+
+def test_debug_pool_serves_histograms():
+    r = requests.get(f"{ROOT}/debug/pool")
+    assert r.status_code == 200
+    status = r.json()
+    assert status["pool_class"]
+    for name in ("checkout_wait", "connect"):
+        histogram = status[name]
+        assert histogram["buckets_ms"]["+Inf"] == histogram["count"]
+        assert list(histogram["buckets_ms"].values()) == sorted(histogram["buckets_ms"].values())
+
+
+def slow_connect_engine(connect_seconds):
+    # One connection, no overflow: a second checkout has to wait for the first.
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=InstrumentedPool, pool_size=1, max_overflow=0)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def slow(dbapi_connection, record):
+        time.sleep(connect_seconds)
+
+    return engine
+
+
+def test_connect_time_is_not_counted_as_waiting():
+    async def run():
+        engine = slow_connect_engine(0.2)
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        await engine.dispose()
+
+    waits, connects = checkout_waits.snapshot(), connect_times.snapshot()
+    asyncio.run(run())
+    assert connect_times.count == connects["count"] + 1
+    assert connect_times.total_ms - connects["sum_ms"] >= 200
+    assert checkout_waits.count == waits["count"] + 1
+    assert checkout_waits.total_ms - waits["sum_ms"] < 100
+
+
+def test_checkout_waits_for_a_busy_pool():
+    async def run():
+        engine = slow_connect_engine(0)
+        holding = asyncio.Event()
+
+        async def hold():
+            async with engine.connect():
+                holding.set()
+                await asyncio.sleep(0.2)
+
+        async def wait():
+            await holding.wait()
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+        await asyncio.gather(hold(), wait())
+        await engine.dispose()
+
+    waits = checkout_waits.snapshot()
+    asyncio.run(run())
+    assert checkout_waits.count == waits["count"] + 2
+    assert checkout_waits.max_ms >= 150
@@ -0,0 +1,67 @@
+import os
+import uuid
+import requests
+
+from app.pagination import encode_cursor
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_product(stock=10):
+    product = {"name": f"etag {uuid.uuid4().hex[:6]}", "price": 3.0, "cost": 1.0, "stock": stock,
+               "category": "test", "supplier": "s"}
+    r = requests.post(f"{BASE}/products", json=product)
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def test_product_detail_revalidates_and_follows_writes():
+    product_id = make_product()
+    r = requests.get(f"{BASE}/products/{product_id}")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    assert r.headers["Last-Modified"]
+    assert r.json()["version"] == 1
+
+    r = requests.get(f"{BASE}/products/{product_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+
+    # an update is visible immediately and changes the validator
+    requests.put(f"{BASE}/products/{product_id}", json={"price": 4.5})
+    r = requests.get(f"{BASE}/products/{product_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["price"] == 4.5
+    assert r.headers["ETag"] != etag
+
+    # so does a stock reservation made by an order
+    etag = r.headers["ETag"]
+    customer = requests.post(f"{BASE}/customers", json={"name": "etag", "email": f"etag.{uuid.uuid4().hex[:8]}@example.com"}).json()
+    requests.post(f"{BASE}/orders", json={"customer_id": customer["id"], "items": [{"product_id": product_id, "quantity": 2}]})
+    r = requests.get(f"{BASE}/products/{product_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["stock"] == 8
+
+    # deletes are covered with a product no order references; order_items keeps a foreign key to this one
+    unordered_id = make_product()
+    assert requests.delete(f"{BASE}/products/{unordered_id}").status_code == 200
+    assert requests.get(f"{BASE}/products/{unordered_id}").status_code == 404
+
+
+def test_product_list_pages_revalidate():
+    product_id = make_product()
+    # the page that starts at the new product
+    page = {"limit": 5, "cursor": encode_cursor(product_id - 1)}
+    r = requests.get(f"{BASE}/products", params=page)
+    assert r.status_code == 200
+    assert r.json()[0]["id"] == product_id
+    etag = r.headers["ETag"]
+    r = requests.get(f"{BASE}/products", params=page, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    # any product write can change a page, so the cached pages are dropped
+    requests.put(f"{BASE}/products/{product_id}", json={"stock": 11})
+    r = requests.get(f"{BASE}/products", params=page, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()[0]["stock"] == 11
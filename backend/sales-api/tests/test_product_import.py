@@ -0,0 +1,79 @@
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+HEADER = "sku,supplier,name,description,price,cost,stock,category\n"
+
+
+def import_csv(body, **kwargs):
+    return requests.post(f"{BASE}/products/import", data=body.encode(), headers={"Content-Type": "text/csv"}, **kwargs)
+
+
+def test_import_inserts_updates_and_rejects():
+    supplier = f"sup-{uuid.uuid4().hex[:8]}"
+    body = HEADER + "".join(f"A{i},{supplier},Item {i},,{i + 1}.5,1,{i},import\n" for i in range(20))
+    body += f'B1,{supplier},"Quoted, with comma","multi\nline",2,1,5,import\n'
+    body += f"B2,{supplier},Bad price,,abc,1,5,import\n"
+    r = import_csv(body)
+    assert r.status_code == 200
+    assert r.json()["inserted"] == 21
+    assert r.json()["rejected"] == 1
+    assert r.json()["errors"][0]["row"] == 22
+
+    # re-import: existing keys update, columns missing from the header are left alone
+    requests_body = "sku,supplier,name,price,cost,stock\n" + f"A0,{supplier},Renamed,9,1,0\nC1,{supplier},New,3,1,1\n"
+    r = requests.post(f"{BASE}/products/import", files={"file": ("catalog.csv", requests_body, "text/csv")})
+    assert r.status_code == 200
+    assert (r.json()["inserted"], r.json()["updated"], r.json()["rejected"]) == (1, 1, 0)
+
+    products = requests.get(f"{BASE}/products/search", params={"q": "Renamed", "limit": 50}).json()
+    renamed = next(p for p in products if p["supplier"] == supplier)
+    assert (renamed["sku"], renamed["price"], renamed["stock"], renamed["category"]) == ("A0", 9.0, 0, "import")
+
+
+def test_import_requires_key_columns():
+    r = import_csv("name,price\nx,1\n")
+    assert r.status_code == 400
+    assert "sku" in r.json()["detail"]
+
+
+def test_imported_product_without_category_is_served():
+    supplier = f"sup-{uuid.uuid4().hex[:8]}"
+    name = f"Nocat {uuid.uuid4().hex[:8]}"
+    r = import_csv(f"sku,supplier,name,price,cost,stock,reorder_point\nN1,{supplier},{name},3,1,1,5\n")
+    assert r.status_code == 200 and r.json()["inserted"] == 1
+
+    found = requests.get(f"{BASE}/products/search", params={"q": name})
+    assert found.status_code == 200
+    product = next(p for p in found.json() if p["supplier"] == supplier)
+    assert product["category"] is None
+
+    # stock 1 is under its reorder point of 5, so the product is on the low-stock list
+    cursor, listed = None, []
+    while product["id"] not in listed:
+        r = requests.get(f"{BASE}/products/low-stock/", params={"limit": 500, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        listed = [p["id"] for p in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        assert product["id"] in listed or cursor
+
+    r = requests.put(f"{BASE}/products/{product['id']}", json={"price": 4.0})
+    assert r.status_code == 200
+    assert (r.json()["price"], r.json()["category"]) == (4.0, None)
+
+
+def test_import_rejects_out_of_range_integers():
+    supplier = f"sup-{uuid.uuid4().hex[:8]}"
+    body = "sku,supplier,name,price,cost,stock,reorder_point\n"
+    body += f"R1,{supplier},Huge stock,1,1,{2**31},5\n"
+    body += f"R2,{supplier},Huge reorder point,1,1,1,{-2**40}\n"
+    body += f"R3,{supplier},Fine,1,1,{2**31 - 1},5\n"
+    r = import_csv(body)
+    assert r.status_code == 200
+    assert (r.json()["inserted"], r.json()["rejected"]) == (1, 2)
+    errors = r.json()["errors"]
+    assert [error["row"] for error in errors] == [1, 2]
+    assert errors[0]["error"].startswith("stock:")
+    assert errors[1]["error"].startswith("reorder_point:")
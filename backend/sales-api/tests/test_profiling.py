@@ -0,0 +1,84 @@
+"""In-process tests for the sampled SQL profiler."""
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.database import Base, get_db
+from app.main import app
+from app.profiling import fingerprint, install_profile_hooks, sql_profiler
+
+
+def test_fingerprint_ignores_values():
+    assert fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x'") == "select * from t where id = ? and name = ?"
+    assert fingerprint("SELECT * FROM t WHERE id IN ($1, $2, $3)") == fingerprint("select *\n from t where id in (?, ?)")
+    assert fingerprint("UPDATE t SET a=%(a)s WHERE id = %s") == "update t set a=? where id = ?"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / "profile.db"
+    seed_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(seed_engine)
+    with Session(seed_engine) as db:
+        db.add_all(models.Customer(name=f"c{i}", email=f"c{i}@example.com") for i in range(3))
+        db.commit()
+    seed_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    install_profile_hooks(engine.sync_engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(sql_profiler, "sample_rate", 1.0)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_profiled_response_headers(client):
+    r = client.get("/api/v1/customers/1")
+    assert r.status_code == 200
+    assert r.headers["X-Query-Count"] == "1"
+    assert float(r.headers["X-DB-Time"]) >= 0
+    assert r.headers["X-Query-Duplicates"] == "0"
+
+
+def test_unsampled_requests_are_untouched(client, monkeypatch):
+    monkeypatch.setattr(sql_profiler, "sample_rate", 0.0)
+    r = client.get("/api/v1/customers/1")
+    assert r.status_code == 200
+    assert "X-Query-Count" not in r.headers
+
+
+def test_slow_request_log(client, monkeypatch, caplog):
+    monkeypatch.setattr(sql_profiler, "slow_ms", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        for customer_id in (1, 2):
+            client.get(f"/api/v1/customers/{customer_id}")
+    record = json.loads(caplog.records[-1].getMessage().split(" ", 2)[2])
+    assert record["route"] == "/api/v1/customers/{customer_id}"
+    assert record["query_count"] == 1
+    assert record["top_statements"][0]["sql"].startswith("select customers.")
+
+
+def test_slow_request_log_ignores_sampling(client, monkeypatch, caplog):
+    monkeypatch.setattr(sql_profiler, "sample_rate", 0.0)
+    monkeypatch.setattr(sql_profiler, "slow_ms", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        r = client.get("/api/v1/customers/1")
+    assert "X-Query-Count" not in r.headers
+    record = json.loads(caplog.records[-1].getMessage().split(" ", 2)[2])
+    assert record["route"] == "/api/v1/customers/{customer_id}"
+    assert record["status"] == 200
+    assert record["sampled"] is False
+    assert "query_count" not in record
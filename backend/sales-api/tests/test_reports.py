@@ -0,0 +1,91 @@
+import os
+import uuid
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def report_around_today():
+    today = datetime.now(timezone.utc).date()
+    params = {"period": "custom", "start": str(today - timedelta(days=1)), "end": str(today + timedelta(days=1)), "top": 50}
+    r = requests.get(f"{BASE}/reports/sales", params=params)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_sales_report_tracks_order_writes():
+    cust = {"name": "report user", "email": f"report.{uuid.uuid4().hex[:8]}@example.com"}
+    customer_id = requests.post(f"{BASE}/customers", json=cust).json()["id"]
+    product = {"name": "report product", "description": "d", "price": 7.0, "cost": 1.0, "stock": 10, "category": "t", "supplier": "s", "status": "active"}
+    product_id = requests.post(f"{BASE}/products", json=product).json()["id"]
+
+    before = report_around_today()
+    order = {"customer_id": customer_id, "shipping": 1.0, "items": [{"product_id": product_id, "quantity": 2}]}
+    r = requests.post(f"{BASE}/orders", json=order)
+    assert r.status_code in (200, 201)
+    created = r.json()
+
+    after = report_around_today()
+    assert after["total_orders"] == before["total_orders"] + 1
+    assert after["total_revenue"] == pytest.approx(before["total_revenue"] + 15.0)
+    top = next(p for p in after["top_products"] if p["product_id"] == product_id)
+    assert top == {"product_id": product_id, "product_name": "report product", "quantity_sold": 2, "revenue": 14.0}
+
+    # cancelling removes the order from the report
+    r = requests.put(f"{BASE}/orders/{created['id']}", json={"customer_id": customer_id, "status": "cancelled"})
+    assert r.status_code == 200
+    cancelled = report_around_today()
+    assert cancelled["total_orders"] == before["total_orders"]
+    assert all(p["product_id"] != product_id for p in cancelled["top_products"])
+
+
+def test_sales_report_periods():
+    for period in ("day", "week", "month", "quarter"):
+        r = requests.get(f"{BASE}/reports/sales", params={"period": period})
+        assert r.status_code == 200
+        assert r.json()["start_date"] <= r.json()["end_date"]
+    assert requests.get(f"{BASE}/reports/sales", params={"period": "decade"}).status_code == 400
+    assert requests.get(f"{BASE}/reports/sales", params={"period": "custom"}).status_code == 400
+
+
+def test_sales_report_cache_stats():
+    requests.get(f"{BASE}/reports/sales", params={"period": "quarter", "top": 3})
+    requests.get(f"{BASE}/reports/sales", params={"period": "quarter", "top": 3})
+    r = requests.get(f"{BASE}/reports/cache/stats")
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["hits"] + stats["stale_hits"] >= 1
+    assert stats["recomputes"] >= 1
+    assert 0.0 <= stats["hit_ratio"] <= 1.0
+
+
+def test_generate_report_job():
+    today = datetime.now(timezone.utc).date()
+    payload = {"reportType": "orders", "start": str(today - timedelta(days=1)), "end": str(today + timedelta(days=1))}
+    r = requests.post(f"{BASE}/reports/generate", json=payload)
+    assert r.status_code == 202
+    job = r.json()
+    assert job["status"] in ("queued", "running", "done")
+
+    for _ in range(50):
+        job = requests.get(f"{BASE}/reports/jobs/{job['id']}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "done"
+    assert job["progress"] == 1.0
+
+    r = requests.get(f"{BASE}/reports/jobs/{job['id']}/result")
+    assert r.status_code == 200
+    result = r.json()
+    assert result["report_type"] == "orders"
+    assert all("total" in row for row in result["rows"])
+
+
+def test_generate_report_rejects_unknown_type():
+    r = requests.post(f"{BASE}/reports/generate", json={"reportType": "nope", "start": "2025-01-01", "end": "2025-01-31"})
+    assert r.status_code == 400
+    assert requests.get(f"{BASE}/reports/jobs/doesnotexist").status_code == 404
@@ -0,0 +1,58 @@
+import os
+import uuid
+import requests
+
+BASE = os.getenv("SALES_API_URL", "http://127.0.0.1:8001") + "/api/v1"
+
+
+def make_product(name, description="", category="search", supplier="acme", price=5.0, stock=10):
+    product = {"name": name, "description": description, "price": price, "cost": 1.0, "stock": stock,
+               "category": category, "supplier": supplier}
+    r = requests.post(f"{BASE}/products", json=product)
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def test_search_ranks_name_matches_first_and_pages():
+    tag = "zx" + uuid.uuid4().hex[:8]
+    in_description = make_product("plain widget", description=f"compatible with {tag} mounts")
+    in_name = make_product(f"{tag} bracket")
+    in_supplier = make_product("other widget", supplier=f"{tag} supply")
+    make_product("unrelated gadget")
+
+    r = requests.get(f"{BASE}/products/search", params={"q": tag})
+    assert r.status_code == 200
+    results = r.json()
+    assert [p["id"] for p in results] == [in_name, in_supplier, in_description]
+    assert results[0]["rank"] >= results[1]["rank"] >= results[2]["rank"]
+
+    # prefixes match, and the cursor walks the same order one row at a time
+    seen, cursor = [], None
+    while True:
+        params = {"q": tag[:6], "limit": 1, **({"cursor": cursor} if cursor else {})}
+        r = requests.get(f"{BASE}/products/search", params=params)
+        seen.extend(p["id"] for p in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [i for i in seen if i in (in_name, in_supplier, in_description)] == [in_name, in_supplier, in_description]
+
+
+def test_search_filters_and_follows_updates():
+    tag = "qy" + uuid.uuid4().hex[:8]
+    cheap = make_product(f"{tag} cheap", price=1.0)
+    pricey = make_product(f"{tag} pricey", price=100.0, stock=0)
+
+    ids = [p["id"] for p in requests.get(f"{BASE}/products/search", params={"q": tag, "max_price": 10}).json()]
+    assert ids == [cheap]
+    ids = [p["id"] for p in requests.get(f"{BASE}/products/search", params={"q": tag, "in_stock": "false"}).json()]
+    assert ids == [pricey]
+
+    # renames and deletes are reflected in the index
+    requests.put(f"{BASE}/products/{cheap}", json={"name": "renamed thing"})
+    requests.delete(f"{BASE}/products/{pricey}")
+    assert requests.get(f"{BASE}/products/search", params={"q": tag}).json() == []
+
+
+def test_search_rejects_queries_without_terms():
+    assert requests.get(f"{BASE}/products/search", params={"q": "!!!"}).status_code == 400
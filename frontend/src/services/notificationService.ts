@@ -34,6 +34,39 @@ class NotificationService {
     }
   }
 
+  // Served from a maintained counter, cheap enough to call on every navigation.
+  async getUnreadCount(): Promise<number> {
+    try {
+      const response = await axios.get<{ unread: number }>(`${API_BASE_URL}/api/notifications/unread-count`, {
+        headers: this.getAuthHeaders()
+      });
+      return response.data.unread;
+    } catch (error) {
+      console.error('Error fetching unread notification count:', error);
+      throw error;
+    }
+  }
+
+  // Pushes new notifications as they are created instead of polling.
+  // EventSource cannot send headers, so the token travels as a query
+  // parameter; on reconnect the browser sends Last-Event-ID and the server
+  // replays whatever was missed. Returns a function that closes the stream.
+  subscribe(onNotification: (notification: Notification) => void, afterId?: number): () => void {
+    const params = new URLSearchParams();
+    const token = this.getAuthToken();
+    if (token) {
+      params.set('access_token', token);
+    }
+    if (afterId !== undefined) {
+      params.set('after', String(afterId));
+    }
+    const source = new EventSource(`${API_BASE_URL}/api/notifications/stream?${params.toString()}`);
+    source.addEventListener('notification', (event) => {
+      onNotification(JSON.parse((event as MessageEvent).data) as Notification);
+    });
+    return () => source.close();
+  }
+
   async markAsRead(id: number): Promise<Notification> {
     try {
       const response = await axios.put<Notification>(
@@ -0,0 +1,510 @@
+"""Synthetic data generator and bulk loader for the sales, finance and HR services.
+
+Generates consistent, reproducible data for the tables the three services
+read and streams it into Postgres with COPY:
+
+    sales    customers, products, orders, order_items
+    finance  accounting_account, accounting_transaction, billing_invoice, billing_payment
+    hr       employees_department, employees_employee, payroll_payrollperiod, payroll_payrollitem
+
+Run sales-api's ``alembic upgrade head`` and the Django services'
+``manage.py migrate`` first; the tables must exist and be empty (or pass
+--truncate).
+
+    python scripts/datagen.py --database-url postgresql://postgres@localhost/enterprise --scale 10
+    python scripts/datagen.py --rows orders=40000000 --only sales --jobs 16
+
+Work is split into fixed-size chunks of parent rows, each generated from
+its own RNG (derived from --seed, the table and the chunk), so the output
+depends only on --seed, --scale/--rows and --until, never on --jobs. Chunks
+run in a process pool, each worker holding one connection and loading a
+chunk per transaction. Rows that must agree are generated together: an
+order and its items, an invoice and its payment, an employee and their
+payroll.
+
+As pg_restore does, foreign keys, unique constraints and secondary indexes
+on the target tables are dropped for the load and recreated afterwards
+(indexes in parallel, foreign keys last, validated in one pass each), so
+COPY only appends rows and primary keys. If recreating fails, the
+outstanding statements are printed.
+
+Surrogate ids are assigned here, not by sequences, so they are
+reproducible too; sequences are moved past them when loading finishes.
+Afterwards, rebuild the sales report rollups and customer stats with
+``python -m app.rollups`` and ``python -m app.customer_stats`` in
+backend/sales-api.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+# Parent rows per chunk. Fixed, because chunk boundaries feed the RNG seeds.
+CHUNK_ROWS = 50_000
+MAX_ITEMS_PER_ORDER = 4
+# Per index build; one build per --jobs runs at a time.
+MAINTENANCE_WORK_MEM = "256MB"
+
+# Rows at --scale 1; every count scales linearly except the fixed-size lookup tables.
+BASE_ROWS = {
+    "customers": 10_000,
+    "products": 2_000,
+    "orders": 100_000,
+    "accounts": 200,
+    "transactions": 200_000,
+    "invoices": 50_000,
+    "departments": 20,
+    "employees": 2_000,
+    "payroll_periods": 24,
+}
+FIXED_SIZE = {"accounts", "departments", "payroll_periods"}
+
+COLUMNS = {
+    "customers": ("id", "name", "email", "phone", "address", "created_at", "updated_at"),
+    "products": ("id", "name", "description", "price", "cost", "stock", "reorder_point", "category", "supplier",
+                 "sku", "status", "created_at", "updated_at", "version"),
+    "orders": ("id", "customer_id", "status", "payment_status", "subtotal", "tax", "shipping", "total",
+               "created_at", "updated_at"),
+    "order_items": ("id", "order_id", "product_id", "quantity", "price", "total"),
+    "accounting_account": ("id", "name", "code", "account_type", "description", "created_at", "updated_at"),
+    "accounting_transaction": ("id", "transaction_type", "amount", "description", "transaction_date", "created_at",
+                               "account_id"),
+    "billing_invoice": ("id", "invoice_number", "customer_name", "customer_email", "amount", "due_date", "status",
+                        "issued_date", "created_at", "updated_at"),
+    "billing_payment": ("id", "amount", "payment_method", "payment_date", "transaction_id", "created_at",
+                        "invoice_id"),
+    "employees_department": ("id", "name", "description", "created_at", "updated_at"),
+    "employees_employee": ("id", "first_name", "last_name", "email", "phone", "position", "hire_date",
+                           "employment_status", "salary", "created_at", "updated_at", "department_id"),
+    "payroll_payrollperiod": ("id", "name", "period_type", "start_date", "end_date", "processed", "processed_at",
+                              "created_at"),
+    "payroll_payrollitem": ("id", "gross_salary", "tax_deductions", "other_deductions", "net_salary", "paid",
+                            "paid_at", "created_at", "employee_id", "payroll_period_id"),
+}
+
+FIRST_NAMES = (
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth", "William",
+    "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Karen", "Daniel", "Lisa",
+    "Matthew", "Nancy", "Anthony", "Sofia", "Mark", "Ana", "Wei", "Priya", "Kenji", "Fatima", "Omar", "Ingrid",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Clark", "Lewis", "Nguyen", "Chen", "Patel", "Kim", "Silva",
+)
+STREETS = ("Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Park Rd", "Elm St", "Lake View", "Hill Rd", "River Way")
+CITIES = ("Springfield", "Riverside", "Franklin", "Greenville", "Bristol", "Clinton", "Fairview", "Salem", "Madison")
+ADJECTIVES = ("Compact", "Wireless", "Ergonomic", "Classic", "Portable", "Premium", "Solar", "Modular", "Smart", "Pro")
+NOUNS = ("Desk", "Lamp", "Chair", "Router", "Kettle", "Backpack", "Monitor", "Speaker", "Drill", "Bottle", "Laptop")
+CATEGORIES = ("Electronics", "Furniture", "Kitchen", "Outdoor", "Tools", "Office", "Sports", "Toys")
+SUPPLIERS = ("TechSupplier Inc.", "Furniture Co.", "Globex", "Initech", "Acme Corp", "Umbrella Supply", "Hooli")
+DEPARTMENTS = ("Engineering", "Marketing", "Human Resources", "Finance", "Sales", "Support", "Operations", "Legal",
+               "Product", "Design", "Logistics", "Procurement")
+POSITIONS = ("Engineer", "Senior Engineer", "Manager", "Analyst", "Specialist", "Coordinator", "Director",
+             "Associate", "Consultant", "Administrator")
+ACCOUNT_TYPES = ("asset", "liability", "equity", "revenue", "expense")
+PAYMENT_METHODS = ("credit_card", "bank_transfer", "cash", "check")
+# sales-api stores enum names.
+ORDER_STATUSES = ("PENDING", "PROCESSING", "SHIPPED", "DELIVERED", "DELIVERED", "DELIVERED", "CANCELLED")
+INVOICE_STATUSES = ("draft", "sent", "paid", "paid", "paid", "overdue", "cancelled")
+
+# ------------------------------------------------------------------ values
+
+@dataclass(frozen=True)
+class Plan:
+    seed: int
+    until: date
+    days: int
+    rows: Dict[str, int]
+
+class Clock:
+    """Timestamps as text, without building a datetime per row."""
+
+    def __init__(self, until: date, days: int):
+        self.days = days
+        self.dates = [(until - timedelta(days=days - 1 - offset)).isoformat() for offset in range(days)]
+
+    def timestamp(self, day: int, second: int) -> str:
+        return f"{self.dates[day]} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}+00"
+
+def _mix(*values: int) -> int:
+    """Deterministic 64-bit hash (splitmix64 over the values)."""
+    state = 0x9E3779B97F4A7C15
+    for value in values:
+        state = (state ^ value) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+        state = (state ^ (state >> 27)) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+        state ^= state >> 31
+    return state
+
+# Derived from ids alone so every table that mentions them agrees without a lookup.
+def product_price(seed: int, product_id: int) -> float:
+    return round(2 + _mix(seed, 1, product_id) % 99_800 / 100, 2)
+
+@lru_cache(maxsize=1)
+def price_list(seed: int, products: int) -> List[float]:
+    """product_price for every product id, computed once per worker."""
+    return [0.0] + [product_price(seed, pid) for pid in range(1, products + 1)]
+
+def customer_name(seed: int, customer_id: int) -> Tuple[str, str]:
+    h = _mix(seed, 2, customer_id)
+    first, last = FIRST_NAMES[h % len(FIRST_NAMES)], LAST_NAMES[h // 64 % len(LAST_NAMES)]
+    return f"{first} {last}", f"{first.lower()}.{last.lower()}.{customer_id}@example.com"
+
+def payroll_period(plan: Plan, index: int) -> Tuple[date, date]:
+    """Monthly periods ending with the month before --until; index 0 is the oldest."""
+    months_back = plan.rows["payroll_periods"] - index
+    month = plan.until.year * 12 + plan.until.month - 1 - months_back
+    start = date(month // 12, month % 12 + 1, 1)
+    following = date((month + 1) // 12, (month + 1) % 12 + 1, 1)
+    return start, following - timedelta(days=1)
+
+def chunk_rng(plan: Plan, group: str, start: int) -> random.Random:
+    return random.Random(f"{plan.seed}:{group}:{start}")
+
+# --------------------------------------------------------------- generators
+
+Buffers = Dict[str, List[str]]
+Generator = Callable[[Plan, random.Random, int, int], Buffers]
+
+def gen_customers(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rnd, rows = Clock(plan.until, plan.days), rng.random, []
+    for cid in range(start, end):
+        name, email = customer_name(plan.seed, cid)
+        created = clock.timestamp(int(rnd() * clock.days), int(rnd() * 86400))
+        address = f"{1 + int(rnd() * 9999)} {STREETS[int(rnd() * len(STREETS))]}, {CITIES[int(rnd() * len(CITIES))]}"
+        rows.append(f"{cid}\t{name}\t{email}\t+1{2000000000 + int(rnd() * 7999999999)}\t{address}\t{created}\t{created}")
+    return {"customers": rows}
+
+def gen_products(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rnd, rows = Clock(plan.until, plan.days), rng.random, []
+    for pid in range(start, end):
+        price = product_price(plan.seed, pid)
+        adjective, noun = ADJECTIVES[int(rnd() * len(ADJECTIVES))], NOUNS[int(rnd() * len(NOUNS))]
+        created = clock.timestamp(int(rnd() * clock.days), int(rnd() * 86400))
+        rows.append(
+            f"{pid}\t{adjective} {noun} {pid}\t{adjective} {noun.lower()} for everyday use\t{price:.2f}\t"
+            f"{price * (0.4 + rnd() * 0.4):.2f}\t{int(rnd() * 5000)}\t10\t{CATEGORIES[int(rnd() * len(CATEGORIES))]}\t"
+            f"{SUPPLIERS[int(rnd() * len(SUPPLIERS))]}\tSKU-{pid:09d}\tACTIVE\t{created}\t{created}\t1"
+        )
+    return {"products": rows}
+
+def gen_orders(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rnd = Clock(plan.until, plan.days), rng.random
+    customers, products = plan.rows["customers"], plan.rows["products"]
+    prices = price_list(plan.seed, products)
+    orders, items = [], []
+    for oid in range(start, end):
+        subtotal = 0.0
+        item_base = (oid - 1) * MAX_ITEMS_PER_ORDER
+        for slot in range(1 + int(rnd() * MAX_ITEMS_PER_ORDER)):
+            pid = 1 + int(rnd() * products)
+            quantity = 1 + int(rnd() * 3)
+            price = prices[pid]
+            total = round(price * quantity, 2)
+            subtotal += total
+            items.append(f"{item_base + slot + 1}\t{oid}\t{pid}\t{quantity}\t{price:.2f}\t{total:.2f}")
+        status = ORDER_STATUSES[int(rnd() * len(ORDER_STATUSES))]
+        payment = "REFUNDED" if status == "CANCELLED" else "PENDING" if status == "PENDING" else "PAID"
+        # Skewed towards recent days, as real order volume grows.
+        day = int(clock.days * rnd() ** 0.5)
+        created = clock.timestamp(min(day, clock.days - 1), int(rnd() * 86400))
+        tax = round(subtotal * 0.08, 2)
+        shipping = 0.0 if subtotal > 100 else 9.99
+        orders.append(
+            f"{oid}\t{1 + int(rnd() * customers)}\t{status}\t{payment}\t{subtotal:.2f}\t{tax:.2f}\t{shipping:.2f}\t"
+            f"{subtotal + tax + shipping:.2f}\t{created}\t{created}"
+        )
+    return {"orders": orders, "order_items": items}
+
+def gen_accounts(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rows = Clock(plan.until, plan.days), []
+    for aid in range(start, end):
+        account_type = ACCOUNT_TYPES[(aid - 1) % len(ACCOUNT_TYPES)]
+        created = clock.timestamp(0, 0)
+        rows.append(f"{aid}\t{account_type.title()} account {aid}\t{1000 + aid}\t{account_type}\t\t{created}\t{created}")
+    return {"accounting_account": rows}
+
+def gen_transactions(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rnd, accounts, rows = Clock(plan.until, plan.days), rng.random, plan.rows["accounts"], []
+    for tid in range(start, end):
+        kind = "debit" if rnd() < 0.5 else "credit"
+        stamp = clock.timestamp(int(rnd() * clock.days), int(rnd() * 86400))
+        rows.append(f"{tid}\t{kind}\t{rnd() * 10000:.2f}\tJournal entry {tid}\t{stamp}\t{stamp}\t{1 + int(rnd() * accounts)}")
+    return {"accounting_transaction": rows}
+
+def gen_invoices(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    clock, rnd, customers = Clock(plan.until, plan.days), rng.random, plan.rows["customers"]
+    invoices, payments = [], []
+    for iid in range(start, end):
+        name, email = customer_name(plan.seed, 1 + int(rnd() * customers))
+        amount = round(20 + rnd() * 5000, 2)
+        day = int(rnd() * clock.days)
+        issued = clock.dates[day]
+        due = clock.dates[min(day + 30, clock.days - 1)]
+        status = INVOICE_STATUSES[int(rnd() * len(INVOICE_STATUSES))]
+        created = clock.timestamp(day, int(rnd() * 86400))
+        invoices.append(f"{iid}\tINV-{iid:010d}\t{name}\t{email}\t{amount:.2f}\t{due}\t{status}\t{issued}\t{created}\t{created}")
+        if status == "paid" or (status in ("sent", "overdue") and rnd() < 0.3):
+            paid = amount if status == "paid" else round(amount * (0.1 + rnd() * 0.8), 2)
+            stamp = clock.timestamp(min(day + int(rnd() * 30), clock.days - 1), int(rnd() * 86400))
+            method = PAYMENT_METHODS[int(rnd() * len(PAYMENT_METHODS))]
+            # At most one payment per invoice, so it can share the invoice's id.
+            payments.append(f"{iid}\t{paid:.2f}\t{method}\t{stamp}\tTX-{iid:010d}\t{stamp}\t{iid}")
+    return {"billing_invoice": invoices, "billing_payment": payments}
+
+def gen_departments(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    created, rows = Clock(plan.until, plan.days).timestamp(0, 0), []
+    for did in range(start, end):
+        base = DEPARTMENTS[(did - 1) % len(DEPARTMENTS)]
+        name = base if did <= len(DEPARTMENTS) else f"{base} {(did - 1) // len(DEPARTMENTS) + 1}"
+        rows.append(f"{did}\t{name}\t{name} department\t{created}\t{created}")
+    return {"employees_department": rows}
+
+def gen_payroll_periods(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    rows = []
+    for pid in range(start, end):
+        first, last = payroll_period(plan, pid - 1)
+        processed = f"{last + timedelta(days=1)} 09:00:00+00"
+        rows.append(f"{pid}\t{first:%B %Y}\tmonthly\t{first}\t{last}\tt\t{processed}\t{processed}")
+    return {"payroll_payrollperiod": rows}
+
+def gen_employees(plan: Plan, rng: random.Random, start: int, end: int) -> Buffers:
+    rnd, departments, periods = rng.random, plan.rows["departments"], plan.rows["payroll_periods"]
+    bounds = [payroll_period(plan, index) for index in range(periods)]
+    first_period = bounds[0][0] if bounds else plan.until
+    employees, payroll = [], []
+    for eid in range(start, end):
+        first, last = FIRST_NAMES[int(rnd() * len(FIRST_NAMES))], LAST_NAMES[int(rnd() * len(LAST_NAMES))]
+        # Hired up to three years before the first payroll period, or during the covered months.
+        hired = first_period + timedelta(days=int(rnd() * (1095 + 30 * periods)) - 1095)
+        status = "terminated" if rnd() < 0.05 else "active"
+        salary = round(35_000 + rnd() * 145_000, 2)
+        created = f"{hired} 09:00:00+00"
+        employees.append(
+            f"{eid}\t{first}\t{last}\t{first.lower()}.{last.lower()}.{eid}@company.example\t"
+            f"+1{2000000000 + int(rnd() * 7999999999)}\t{POSITIONS[int(rnd() * len(POSITIONS))]}\t{hired}\t{status}\t"
+            f"{salary:.2f}\t{created}\t{created}\t{1 + int(rnd() * departments)}"
+        )
+        gross = round(salary / 12, 2)
+        tax = round(gross * 0.22, 2)
+        other = round(gross * 0.05, 2)
+        for index, (period_start, period_end) in enumerate(bounds):
+            if period_end < hired:
+                continue
+            paid_at = f"{period_end + timedelta(days=1)} 09:00:00+00"
+            payroll.append(
+                f"{(eid - 1) * periods + index + 1}\t{gross:.2f}\t{tax:.2f}\t{other:.2f}\t{gross - tax - other:.2f}\t"
+                f"t\t{paid_at}\t{paid_at}\t{eid}\t{index + 1}"
+            )
+    return {"employees_employee": employees, "payroll_payrollitem": payroll}
+
+@dataclass(frozen=True)
+class Group:
+    """Tables generated together from one count (parents with their children)."""
+    service: str
+    generate: Generator
+
+GROUPS: Dict[str, Group] = {
+    "customers": Group("sales", gen_customers),
+    "products": Group("sales", gen_products),
+    "orders": Group("sales", gen_orders),
+    "accounts": Group("finance", gen_accounts),
+    "transactions": Group("finance", gen_transactions),
+    "invoices": Group("finance", gen_invoices),
+    "departments": Group("hr", gen_departments),
+    "payroll_periods": Group("hr", gen_payroll_periods),
+    "employees": Group("hr", gen_employees),
+}
+
+# ------------------------------------------------------------------ loading
+
+_connection = None
+
+def _init_worker(dsn: str) -> None:
+    global _connection
+    _connection = psycopg2.connect(dsn)
+    with _connection.cursor() as cursor:
+        cursor.execute("SET synchronous_commit = off")
+    _connection.commit()
+
+def load_chunk(task: Tuple[Plan, str, int, int]) -> Dict[str, int]:
+    plan, group, start, end = task
+    buffers = GROUPS[group].generate(plan, chunk_rng(plan, group, start), start, end)
+    with _connection.cursor() as cursor:
+        for table, rows in buffers.items():
+            if rows:
+                data = io.StringIO("\n".join(rows) + "\n")
+                cursor.copy_expert(f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN", data, size=1 << 20)
+    _connection.commit()
+    return {table: len(rows) for table, rows in buffers.items()}
+
+def tasks(plan: Plan, groups: Sequence[str]) -> Iterator[Tuple[Plan, str, int, int]]:
+    for group in groups:
+        total = plan.rows[group]
+        for start in range(1, total + 1, CHUNK_ROWS):
+            yield plan, group, start, min(start + CHUNK_ROWS, total + 1)
+
+def tables_of(groups: Sequence[str]) -> List[str]:
+    # One empty chunk reveals each group's tables without listing them twice.
+    empty = Plan(0, date.today(), 1, defaultdict(int))
+    return [table for group in groups for table in GROUPS[group].generate(empty, random.Random(0), 1, 1)]
+
+def prepare(dsn: str, tables: Sequence[str], truncate: bool) -> List[str]:
+    """Empty or check the tables, then drop what COPY would maintain row by row.
+
+    Foreign keys, unique constraints and secondary indexes are dropped and
+    their definitions returned; primary keys stay. Returns the statements
+    that recreate them, foreign keys last.
+    """
+    connection = psycopg2.connect(dsn)
+    with connection, connection.cursor() as cursor:
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(tables)} CASCADE")
+        else:
+            for table in tables:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+                if cursor.fetchone()[0]:
+                    raise SystemExit(f"{table} already has rows; pass --truncate to replace them")
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = ANY(%s::regclass[]) AND contype IN ('f', 'u') ORDER BY contype, conname",
+            (list(tables),),
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = ANY(%s::regclass[]) AND NOT indisprimary "
+            "AND indexrelid NOT IN (SELECT conindid FROM pg_constraint WHERE contype IN ('p', 'u', 'x'))",
+            (list(tables),),
+        )
+        indexes = cursor.fetchall()
+        # Foreign keys first: they may depend on the unique constraints.
+        for table, name, _, _ in constraints:
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+    connection.close()
+    return (
+        [definition for _, definition in indexes]
+        + [f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+           for table, name, kind, definition in constraints if kind == "u"]
+        + [f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+           for table, name, kind, definition in constraints if kind == "f"]
+    )
+
+def _execute(dsn: str, statement: str) -> None:
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+            cursor.execute(statement)
+    finally:
+        connection.close()
+
+def restore(dsn: str, statements: Sequence[str], jobs: int) -> None:
+    """Rebuild indexes and unique constraints in parallel, then validate foreign keys in bulk."""
+    foreign = [statement for statement in statements if " FOREIGN KEY " in statement]
+    pending = list(statements)
+    try:
+        with ThreadPoolExecutor(jobs) as pool:
+            for batch in ([s for s in statements if s not in foreign], foreign):
+                for statement, _ in zip(batch, pool.map(partial(_execute, dsn), batch)):
+                    pending.remove(statement)
+    except psycopg2.Error:
+        print("could not restore; run these by hand once fixed:", *pending, sep="\n  ", file=sys.stderr)
+        raise
+
+def finish(dsn: str, tables: Sequence[str]) -> None:
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}), true) "
+                f"WHERE EXISTS (SELECT 1 FROM {table})"
+            )
+            cursor.execute(f"ANALYZE {table}")
+    connection.close()
+
+def run(dsn: str, plan: Plan, groups: Sequence[str], jobs: int) -> Dict[str, int]:
+    loaded: Dict[str, int] = defaultdict(int)
+    started = time.perf_counter()
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(dsn,)) as pool:
+        for counts in pool.imap_unordered(load_chunk, tasks(plan, groups)):
+            for table, count in counts.items():
+                loaded[table] += count
+            elapsed = time.perf_counter() - started
+            total = sum(loaded.values())
+            print(f"\r{total:>14,} rows  {total / elapsed:>12,.0f} rows/s  {elapsed:8.1f}s", end="", flush=True)
+    print()
+    return loaded
+
+def parse_rows(text: str) -> Tuple[str, int]:
+    name, _, count = text.partition("=")
+    if name not in BASE_ROWS or not count.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=COUNT with NAME in {', '.join(BASE_ROWS)}")
+    return name, int(count)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="defaults to DATABASE_URL")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on the default row counts")
+    parser.add_argument("--rows", type=parse_rows, action="append", default=[], metavar="NAME=COUNT",
+                        help=f"override one count; NAME is one of {', '.join(BASE_ROWS)}")
+    parser.add_argument("--only", default="sales,finance,hr", help="comma-separated services to load")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--until", type=date.fromisoformat, default=date.today(),
+                        help="last day of generated activity (default today; pin it to reproduce a dataset)")
+    parser.add_argument("--days", type=int, default=730, help="days of order, invoice and transaction history")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="parallel loader processes")
+    parser.add_argument("--truncate", action="store_true", help="empty the target tables first")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    # Accept SQLAlchemy-style URLs (postgresql+asyncpg://) as sales-api uses them.
+    scheme, sep, rest = args.database_url.partition("://")
+    dsn = scheme.partition("+")[0] + sep + rest
+
+    rows = {
+        name: count if name in FIXED_SIZE else max(1, round(count * args.scale))
+        for name, count in BASE_ROWS.items()
+    }
+    rows.update(args.rows)
+    services = {service.strip() for service in args.only.split(",")}
+    groups = [group for group, spec in GROUPS.items() if spec.service in services]
+    plan = Plan(args.seed, args.until, args.days, rows)
+    tables = tables_of(groups)
+
+    print(f"seed {plan.seed}, until {plan.until}, {args.jobs} jobs: "
+          + ", ".join(f"{group} {rows[group]:,}" for group in groups))
+    deferred = prepare(dsn, tables, args.truncate)
+    started = time.perf_counter()
+    try:
+        loaded = run(dsn, plan, groups, args.jobs)
+    finally:
+        load_seconds = time.perf_counter() - started
+        restore(dsn, deferred, args.jobs)
+    finish(dsn, tables)
+    for table in tables:
+        print(f"  {table:<24} {loaded[table]:>14,}")
+    total = sum(loaded.values())
+    print(f"loaded {total:,} rows in {load_seconds:.1f}s ({total / load_seconds:,.0f} rows/s); "
+          f"{len(deferred)} indexes and constraints rebuilt and analyzed by {time.perf_counter() - started:.1f}s")
+    if "sales" in services:
+        print("rebuild the derived sales tables in backend/sales-api: "
+              "`python -m app.rollups` and `python -m app.customer_stats`")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -129,7 +129,7 @@ echo ""
 echo "🎉 Setup complete! You can now start the development servers:"
 echo ""
 echo "📋 To start the services:"
-echo "   1. Backend API:  cd backend/sales-api && source venv/bin/activate && uvicorn app.main:app --host 0.0.0.0 --port 8001 --reload"
+echo "   1. Backend API:  cd backend/sales-api && source venv/bin/activate && alembic upgrade head && uvicorn app.main:app --host 0.0.0.0 --port 8001 --reload"
 echo "   2. Frontend:     cd frontend && npm start"
 echo ""
 echo "🌐 Application URLs:"